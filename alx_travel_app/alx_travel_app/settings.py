@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
+from celery.schedules import crontab
 from dotenv import load_dotenv
 import os
 
@@ -56,6 +57,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    "listings.profiling.ProfilingMiddleware",
 ]
 
 ROOT_URLCONF = 'alx_travel_app.urls'
@@ -97,6 +99,28 @@ DATABASES = {
 }
 
 
+# Cache
+# Shared Redis cache when REDIS_URL is set (required for multi-process
+# deployments); per-process memory cache otherwise (development).
+
+REDIS_URL = os.environ.get("REDIS_URL")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django_redis.cache.RedisCache",
+            "LOCATION": REDIS_URL,
+            "OPTIONS": {"CLIENT_CLASS": "django_redis.client.DefaultClient"},
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -154,10 +178,34 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Django REST framework: JSON is encoded with orjson (listings.renderers)
+REST_FRAMEWORK = {
+    "DEFAULT_RENDERER_CLASSES": [
+        "listings.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+}
+
 # Payment Integration
 CHAPA_SECRET_KEY = os.environ.get("CHAPA_SECRET_KEY")
 CHAPA_PUBLIC_KEY = os.environ.get("CHAPA_PUBLIC_KEY")
 CHAPA_BASE_URL = os.environ.get("CHAPA_BASE_URL", "https://api.chapa.co/v1")
+CHAPA_TIMEOUT = (3.05, 10)  # (connect, read) seconds
+# Shared (via the cache) circuit breaker around Chapa; see listings/circuit_breaker.py
+CHAPA_CIRCUIT_BREAKER = {
+    "failure_rate": 0.5,
+    "slow_call_rate": 0.5,
+    "slow_call_seconds": 5.0,
+    "min_calls": 10,
+    "window_seconds": 30,
+    "open_seconds": 30,
+    "half_open_calls": 3,
+    # Chapa calls in flight across all processes: half of the default 2 x 4
+    # gunicorn threads, so a slow Chapa cannot take every worker
+    "max_concurrent": int(os.environ.get("CHAPA_MAX_CONCURRENT_CALLS", 4)),
+    # a slot left by a killed process frees itself after this long
+    "slot_seconds": 60,
+}
 
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend" # "django.core.mail.backends.console.EmailBackend" (for development)
 EMAIL_HOST = os.environ.get("DJANGO_EMAIL_HOST")
@@ -174,6 +222,155 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'Africa/Lagos'  # or your timezone
 CELERY_ENABLE_UTC = True
+CELERY_BEAT_SCHEDULE = {
+    "archive-old-records": {
+        "task": "listings.tasks.archive_old_records",
+        "schedule": crontab(hour=3, minute=30),
+    },
+    "expire-booking-holds": {
+        "task": "listings.tasks.expire_booking_holds",
+        "schedule": 60.0,
+    },
+    "refresh-similar-listings": {
+        "task": "listings.tasks.refresh_similar_listings",
+        "schedule": 15 * 60.0,
+    },
+    "rebuild-similar-listings": {
+        "task": "listings.tasks.refresh_similar_listings",
+        "schedule": crontab(hour=4, minute=0),
+        "kwargs": {"full": True},
+    },
+    "update-dynamic-prices": {
+        "task": "listings.tasks.update_dynamic_prices",
+        "schedule": crontab(hour=4, minute=30),
+    },
+}
+
+# Token-bucket throttles (listings/throttling.py): per user/IP and global limits per endpoint
+TOKEN_BUCKET_THROTTLES = {
+    "payments_initiate": {"rate": "10/min", "burst": 5, "global_rate": "600/min", "global_burst": 100},
+    "payments_verify": {"rate": "30/min", "burst": 10, "global_rate": "1200/min", "global_burst": 200},
+    "payments_verify_batch": {"rate": "60/min", "burst": 10, "global_rate": "600/min", "global_burst": 60},
+    "chapa_webhook": {"rate": "300/min", "burst": 100, "global_rate": "1200/min", "global_burst": 300},
+}
+
+# Batch verify for partner reconciliation (listings/reconcile.py): tx_refs per
+# request and concurrent Chapa verify calls per request
+BATCH_VERIFY = {
+    "max_refs": 200,
+    "max_workers": 8,  # also capped by CHAPA_CIRCUIT_BREAKER["max_concurrent"] slots free
+    "max_upstream": 50,  # pending refs sent to Chapa per request; the rest are "unavailable"
+    "time_budget_seconds": 15.0,  # no Chapa call starts later than this into a request
+    "busy_retry_seconds": 0.05,
+}
+
+# Idempotency-Key handling for payment/booking creation (seconds)
+IDEMPOTENCY_TTL = int(os.environ.get("IDEMPOTENCY_TTL", 24 * 60 * 60))
+IDEMPOTENCY_LOCK_TTL = 60
+IDEMPOTENCY_WAIT_TIMEOUT = 20
+
+# Celery enqueue deduplication (listings/dedup.py), seconds
+TASK_DEDUP = {
+    "ttl": 60 * 60,  # duplicate enqueues within this window are dropped
+    "done_ttl": 7 * 24 * 60 * 60,  # completed keys are skipped by workers this long
+    "lock_ttl": 5 * 60,  # upper bound on one run
+}
+
+# Batched task publishing (listings/fanout.py): calls per message, and the
+# queue depth above which fan_out() pauses (checked every check_every messages)
+TASK_FANOUT = {
+    "chunk_size": 1,
+    "max_queue_depth": 10000,
+    "check_every": 500,
+    "max_wait": 60,  # seconds before giving up with BrokerBackpressure
+}
+
+# "Similar listings" (listings/similar.py): neighbours kept per listing, rows
+# per distance block (memory is block_size x listings floats) and feature weights
+SIMILAR_LISTINGS = {
+    "k": 10,
+    "block_size": 256,
+    "weights": {"price": 1.0, "location": 2.0, "rating": 0.5, "reviews": 0.25},
+}
+
+# Nightly price multipliers (listings/dynamic_pricing.py): nights ahead, booking
+# pace window (days), smoothing window (nights), demand weights and bounds
+DYNAMIC_PRICING = {
+    "horizon_days": 180,
+    "pace_days": 7,
+    "window_nights": 7,
+    "weights": {"own": 0.3, "comparable": 0.5, "pace": 0.2},
+    "target_occupancy": 0.5,
+    "sensitivity": 0.4,
+    "min_multiplier": 0.85,
+    "max_multiplier": 1.5,
+    "batch_size": 1000,  # listings per upsert statement
+}
+
+# iCal availability feeds (listings/ical.py): rendered feeds are cached until a
+# booking of the listing changes (cache_timeout bounds it); past_days of history
+ICAL_FEEDS = {
+    "cache_timeout": 6 * 60 * 60,
+    "past_days": 30,
+    "max_age": 5 * 60,  # Cache-Control for pollers
+    "fetch_timeout": 10,
+    "max_bytes": 2 * 1024 * 1024,  # largest remote feed fetch_events() reads
+}
+
+# Two-tier cache for hot reference data (listings/tiered_cache.py): entries and
+# seconds per in-process LRU, seconds in Redis, the pub/sub invalidation channel
+# and how often each process adds its hit/miss counts to the shared counters
+TIERED_CACHE = {
+    "maxsize": 10000,
+    "ttl": 30,
+    "remote_ttl": 60 * 60,
+    "channel": "tiered-cache:invalidate",
+    "stats_flush_seconds": 10,
+}
+
+# Days rebuilt per run of the backfill_rollups task (listings/rollups.py)
+ROLLUP_BACKFILL_CHUNK_DAYS = 7
+
+# Minutes a pending booking holds its dates before expire_booking_holds cancels it (listings/holds.py)
+BOOKING_HOLD_MINUTES = int(os.environ.get("BOOKING_HOLD_MINUTES", 30))
+
+# Retention before finished payments / past bookings move to the archive tables (listings/archive.py)
+ARCHIVE_RETENTION_DAYS = {
+    "payments": int(os.environ.get("ARCHIVE_PAYMENTS_AFTER_DAYS", 365)),
+    "bookings": int(os.environ.get("ARCHIVE_BOOKINGS_AFTER_DAYS", 365)),
+}
+
+# Startup regression budgets checked by `manage.py profile_startup --check`.
+# Modules listed under forbidden_modules must only load on first use.
+STARTUP_BUDGETS = {
+    "web": {"max_ms": 2500, "forbidden_modules": ["drf_yasg.views", "numpy", "celery.worker"]},
+    "worker": {"max_ms": 4000, "forbidden_modules": ["drf_yasg.views", "numpy"]},
+}
+
+# Work done once in the preloaded gunicorn master before forking
+# (alx_travel_app/warmup.py, deploy/gunicorn.conf.py): templates to compile and
+# lazily imported modules to load so every worker shares them
+SERVER_WARMUP = {
+    "templates": ["rest_framework/api.html"],
+    "modules": ["numpy", "requests"],
+}
+
+# On-demand profiling (listings/profiling.py). Off unless PROFILING_ENABLED is set;
+# individual requests opt in with an `X-Profile` header from `profile_report --token`.
+PROFILING = {
+    "enabled": os.environ.get("PROFILING_ENABLED", "").lower() in ("1", "true", "yes"),
+    "mode": os.environ.get("PROFILING_MODE", "sample"),  # or "cprofile"
+    "interval": 0.005,
+    "dir": os.environ.get("PROFILING_DIR", str(BASE_DIR / "profiles")),
+    "sample_rate": float(os.environ.get("PROFILING_SAMPLE_RATE", 0)),
+    "task_sample_rate": float(os.environ.get("PROFILING_TASK_SAMPLE_RATE", 0)),
+    # per-task sample rates, e.g. {"listings.tasks.send_booking_confirmation": 0.1}
+    "tasks": {},
+    "token_max_age": 3600,
+    # retention in "dir": older profiles, and all but the newest max_files, are deleted
+    "max_files": int(os.environ.get("PROFILING_MAX_FILES", 1000)),
+    "max_age_days": 7,
+}
 
 SWAGGER_SETTINGS = {
     "USE_SESSION_AUTH": False,
@@ -0,0 +1,39 @@
+"""
+Settings for the test suite: in-memory SQLite, per-process cache and mail,
+Celery tasks run eagerly in the test process.
+
+    python manage.py test --settings=alx_travel_app.test_settings
+"""
+import os
+
+from .settings import *  # noqa: F401,F403
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": ":memory:",
+    }
+}
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+ALLOWED_HOSTS = ["testserver", "localhost", "127.0.0.1"]
+STATICFILES_DIRS = []
+STATICFILES_STORAGE = "django.contrib.staticfiles.storage.StaticFilesStorage"
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+DEFAULT_FROM_EMAIL = "noreply@example.com"
+
+CELERY_TASK_ALWAYS_EAGER = True
+CELERY_TASK_EAGER_PROPAGATES = True
+CELERY_BROKER_URL = "memory://"
+CELERY_RESULT_BACKEND = "cache+memory://"
+
+PROFILING = {**PROFILING, "enabled": False}  # noqa: F405
+
+# Multiplier for the wall-clock budgets in listings/tests (slow CI machines)
+TEST_TIME_BUDGET_SCALE = float(os.environ.get("TEST_TIME_BUDGET_SCALE", 1))
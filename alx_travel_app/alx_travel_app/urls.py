@@ -16,24 +16,16 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, re_path, include
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
-from rest_framework import permissions
+from .api_docs import LazySchemaView
 
-# Schema view for Swagger documentation
-schema_view = get_schema_view(
-    openapi.Info(
-        title="ALX Travel App API",
-        default_version='v1',
-        description="ALX ProDev Backend Cohort 3 • API",
-        terms_of_service="https://dohoudanielfavour.vercel.app",
-        contact=openapi.Contact(email="dohoudanielfavour@gmail.com"),
-        license=openapi.License(name="BSD License"),
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-    # important: do not include session authentication for this view
-    authentication_classes=(),  # <- this prevents session auth/login redirect
+# Schema view for Swagger documentation (drf_yasg is loaded on first request)
+schema_view = LazySchemaView(
+    title="ALX Travel App API",
+    default_version='v1',
+    description="ALX ProDev Backend Cohort 3 • API",
+    terms_of_service="https://dohoudanielfavour.vercel.app",
+    contact_email="dohoudanielfavour@gmail.com",
+    license_name="BSD License",
 )
 
 urlpatterns = [
@@ -0,0 +1,52 @@
+# deploy/gunicorn.conf.py
+"""
+Production gunicorn profile.
+
+The app is preloaded in the master and warmed up (alx_travel_app/warmup.py),
+then gc.freeze() moves everything it allocated out of the collector's reach
+before each fork. Collections in the workers no longer write to those
+objects' GC headers, so the pages stay shared copy-on-write and each worker
+costs only what it allocates itself. GC is off while the app loads so no
+collection runs half-way through.
+
+Environment:
+    WEB_CONCURRENCY        worker processes (default 2)
+    GUNICORN_WORKER_CLASS  sync (default) or gthread
+    GUNICORN_THREADS       threads per gthread worker (default 4)
+    GUNICORN_PRELOAD       0 to load the app in each worker instead
+    GUNICORN_MAX_REQUESTS  recycle a worker after this many requests (0: never)
+    PORT                   bind port (default 8000)
+
+Compare profiles with ``python manage.py bench_server``.
+"""
+import gc
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "sync")
+threads = int(os.environ.get("GUNICORN_THREADS", 4)) if worker_class == "gthread" else 1
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") != "0"
+timeout = 120
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 0))
+max_requests_jitter = max_requests // 10
+
+if preload_app:
+    gc.disable()
+
+
+def when_ready(server):
+    """Master, after the preload and before the first fork."""
+    if preload_app:
+        from alx_travel_app.warmup import warm_up
+
+        report = warm_up()
+        server.log.info("Warm-up: %s", ", ".join(
+            f"{step} {count} in {ms:.0f} ms" for step, (count, ms) in report.items()))
+    gc.freeze()
+    gc.enable()
+
+
+def pre_fork(server, worker):
+    # objects the master created since (e.g. before respawning a worker)
+    gc.freeze()
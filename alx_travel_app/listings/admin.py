@@ -1,9 +1,163 @@
 from django.contrib import admin
-from .models import Payment
+from django.contrib.admin.views.main import ChangeList, ORDER_VAR, PAGE_VAR
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from .models import ArchivedPayment, Payment, PricingRule
+
+# Query-string parameter carrying the primary key of the last row on the
+# previous page, for keyset ("seek") navigation on large tables.
+KEYSET_VAR = "before"
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that avoids exact COUNT(*) on large tables.
+
+    Unfiltered changelists read the row estimate the database already keeps
+    in its statistics (pg_class / information_schema). Filtered changelists
+    count at most ``count_cap`` rows, so a broad search never scans the table.
+    """
+    # Below this many rows an exact count is cheap and more accurate.
+    exact_count_threshold = 10000
+    count_cap = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = self._estimated_table_rows(queryset)
+            if estimate is not None and estimate >= self.exact_count_threshold:
+                return estimate
+            if estimate is not None:
+                return queryset.count()
+        return queryset.order_by()[: self.count_cap].count()
+
+    @staticmethod
+    def _estimated_table_rows(queryset):
+        connection = connections[queryset.db]
+        table = queryset.model._meta.db_table
+        if connection.vendor == "postgresql":
+            sql = "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass"
+        elif connection.vendor == "mysql":
+            sql = (
+                "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s"
+            )
+        else:
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [table])
+            row = cursor.fetchone()
+        if not row or row[0] is None or row[0] < 0:
+            return None
+        return int(row[0])
+
+
+class KeysetChangeList(ChangeList):
+    """
+    ChangeList that pages by ``pk < last_seen_pk`` instead of OFFSET when the
+    list is in its default newest-first order, and defers heavy columns.
+    """
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(KEYSET_VAR, None)
+        return lookup_params
+
+    @property
+    def keyset_active(self):
+        return ORDER_VAR not in self.params
+
+    def get_queryset(self, request, exclude_parameters=None):
+        qs = super().get_queryset(request, exclude_parameters)
+        deferred = self.model_admin.changelist_deferred_fields
+        if deferred:
+            qs = qs.defer(*deferred)
+        before = self.keyset_before
+        if before is not None and self.keyset_active:
+            qs = qs.filter(pk__lt=before)
+        return qs
+
+    @cached_property
+    def keyset_before(self):
+        """The ``before`` pk as the pk field's Python value; None if absent or malformed."""
+        value = self.params.get(KEYSET_VAR)
+        if not value:
+            return None
+        try:
+            return self.model._meta.pk.to_python(value)
+        except ValidationError:
+            return None
+
+    def get_results(self, request):
+        super().get_results(request)
+        self.keyset_next_url = None
+        if not self.keyset_active or self.show_all:
+            return
+        rows = list(self.result_list)
+        if len(rows) >= self.list_per_page:
+            self.keyset_next_url = self.get_query_string(
+                {KEYSET_VAR: rows[-1].pk}, remove=[PAGE_VAR]
+            )
+
+
+class LargeTableAdminMixin:
+    """
+    ModelAdmin mixin for tables with tens of millions of rows: estimated
+    counts, keyset navigation and deferred loading of blob columns.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    changelist_deferred_fields = ()
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
 
 @admin.register(Payment)
-class PaymentAdmin(admin.ModelAdmin):
+class PaymentAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("booking_reference", "tx_ref", "amount", "status", "created_at")
+    list_filter = ("status",)
     readonly_fields = ("created_at", "updated_at")
+    search_fields = ("tx_ref", "booking_reference")
+    search_help_text = "Prefix of a tx_ref or booking reference."
+    date_hierarchy = "created_at"
+    changelist_deferred_fields = ("metadata",)
+
+    def get_search_results(self, request, queryset, search_term):
+        # Case-sensitive prefix lookups compile to LIKE 'term%', which the
+        # tx_ref and booking_reference indexes can serve (unlike %term%).
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        return queryset.filter(
+            Q(tx_ref__startswith=term) | Q(booking_reference__startswith=term)
+        ), False
+
+
+@admin.register(PricingRule)
+class PricingRuleAdmin(admin.ModelAdmin):
+    list_display = ("listing", "rule_type", "adjustment", "start_date", "end_date", "min_nights", "active")
+    list_filter = ("rule_type", "active")
+    raw_id_fields = ("listing",)
 
 # Register your models here.
+
+
+@admin.register(ArchivedPayment)
+class ArchivedPaymentAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ("booking_reference", "tx_ref", "amount", "status", "created_at", "archived_at")
+    list_filter = ("status",)
+    search_fields = ("tx_ref", "booking_reference")
+    date_hierarchy = "created_at"
+    changelist_deferred_fields = ("metadata",)
+    get_search_results = PaymentAdmin.get_search_results
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
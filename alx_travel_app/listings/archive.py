@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Time-based archival of finished payments and past bookings.
+
+Rows older than the retention window (settings.ARCHIVE_RETENTION_DAYS) are
+moved to ArchivedPayment / ArchivedBooking in small batches: each batch is
+one transaction that locks up to ``batch_size`` rows, copies them (same
+ids) and deletes the originals. Short transactions keep lock times and
+replication lag low while the job runs next to live traffic.
+
+Moving a row is not a change of history, so the daily rollups are left
+untouched (rollups.suspended) and rollups.rebuild reads both tables.
+"""
+import time
+from datetime import timedelta
+from typing import Dict, List
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import rollups
+from .models import ArchivedBooking, ArchivedPayment, Booking, Payment
+
+FINISHED_PAYMENT_STATUSES = ("COMPLETED", "FAILED", "CANCELLED")
+
+
+def payments_to_archive(days=None):
+    """Finished payments created more than ``days`` ago."""
+    days = days if days is not None else settings.ARCHIVE_RETENTION_DAYS["payments"]
+    cutoff = timezone.now() - timedelta(days=days)
+    # served by payment_status_created_idx
+    return Payment.objects.filter(status__in=FINISHED_PAYMENT_STATUSES, created_at__lt=cutoff)
+
+
+def bookings_to_archive(days=None):
+    """Bookings whose stay ended more than ``days`` ago."""
+    days = days if days is not None else settings.ARCHIVE_RETENTION_DAYS["bookings"]
+    cutoff = timezone.localdate() - timedelta(days=days)
+    return Booking.objects.filter(end_date__lt=cutoff)
+
+
+def _copy(instance, archive_model):
+    return archive_model(**{
+        field.attname: getattr(instance, field.attname)
+        for field in instance._meta.concrete_fields
+    })
+
+
+def move_batches(queryset, archive_model, batch_size=500, sleep=0.0, max_batches=None) -> int:
+    """Move rows matching ``queryset`` to ``archive_model``; returns rows moved."""
+    model = queryset.model
+    skip_locked = connection.features.has_select_for_update_skip_locked
+    moved = batches = 0
+    while max_batches is None or batches < max_batches:
+        with transaction.atomic(), rollups.suspended():
+            batch = list(
+                queryset.order_by("pk").select_for_update(skip_locked=skip_locked)[:batch_size]
+            )
+            if not batch:
+                break
+            archive_model.objects.bulk_create(
+                [_copy(row, archive_model) for row in batch], ignore_conflicts=True
+            )
+            model.objects.filter(pk__in=[row.pk for row in batch]).delete()
+        moved += len(batch)
+        batches += 1
+        if len(batch) < batch_size:
+            break
+        if sleep:
+            time.sleep(sleep)
+    return moved
+
+
+def archive_payments(days=None, **kwargs) -> int:
+    return move_batches(payments_to_archive(days), ArchivedPayment, **kwargs)
+
+
+def archive_bookings(days=None, **kwargs) -> int:
+    return move_batches(bookings_to_archive(days), ArchivedBooking, **kwargs)
+
+
+ARCHIVED_TABLES = (Payment, ArchivedPayment, Booking, ArchivedBooking)
+
+
+def table_sizes(models=ARCHIVED_TABLES) -> List[Dict]:
+    """
+    Rows and on-disk data/index bytes per table. Sizes come from the
+    database's statistics (None where the backend does not expose them);
+    on MySQL the statistics are refreshed with ANALYZE TABLE first.
+    """
+    tables = [model._meta.db_table for model in models]
+    sizes = {table: {"table": table, "rows": None, "data_bytes": None, "index_bytes": None}
+             for table in tables}
+    with connection.cursor() as cursor:
+        if connection.vendor == "mysql":
+            cursor.execute("ANALYZE TABLE " + ", ".join(connection.ops.quote_name(t) for t in tables))
+            cursor.fetchall()
+            cursor.execute(
+                "SELECT table_name, table_rows, data_length, index_length "
+                "FROM information_schema.tables WHERE table_schema = DATABASE() "
+                f"AND table_name IN ({', '.join(['%s'] * len(tables))})",
+                tables,
+            )
+            for table, rows, data, index in cursor.fetchall():
+                sizes[table].update(rows=rows, data_bytes=data, index_bytes=index)
+        elif connection.vendor == "postgresql":
+            cursor.execute(
+                "SELECT relname, reltuples::bigint, pg_table_size(oid), pg_indexes_size(oid) "
+                "FROM pg_class WHERE relkind = 'r' AND relname = ANY(%s)",
+                [tables],
+            )
+            for table, rows, data, index in cursor.fetchall():
+                sizes[table].update(rows=rows, data_bytes=data, index_bytes=index)
+        else:
+            for table in tables:
+                cursor.execute(f"SELECT COUNT(*) FROM {connection.ops.quote_name(table)}")
+                sizes[table]["rows"] = cursor.fetchone()[0]
+            if connection.vendor == "sqlite":
+                _sqlite_sizes(cursor, sizes)
+    return [sizes[table] for table in tables]
+
+
+def _sqlite_sizes(cursor, sizes):
+    # dbstat is only available when SQLite is built with SQLITE_ENABLE_DBSTAT_VTAB
+    try:
+        cursor.execute(
+            "SELECT s.name, m.type, m.tbl_name, SUM(s.pgsize) FROM dbstat s "
+            "JOIN sqlite_master m ON m.name = s.name GROUP BY s.name"
+        )
+    except Exception:
+        return
+    for _, kind, table, size in cursor.fetchall():
+        if table in sizes:
+            key = "data_bytes" if kind == "table" else "index_bytes"
+            sizes[table][key] = (sizes[table][key] or 0) + size
+
+
+def reclaim_space(models=ARCHIVED_TABLES[::2]) -> None:
+    """Return freed pages to the OS (OPTIMIZE TABLE / VACUUM); locks tables on some backends."""
+    with connection.cursor() as cursor:
+        if connection.vendor == "mysql":
+            for model in models:
+                cursor.execute(f"OPTIMIZE TABLE {connection.ops.quote_name(model._meta.db_table)}")
+                cursor.fetchall()
+        elif connection.vendor == "postgresql":
+            for model in models:
+                cursor.execute(f"VACUUM {connection.ops.quote_name(model._meta.db_table)}")
+        elif connection.vendor == "sqlite":
+            cursor.execute("VACUUM")
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Thin client for the Chapa payment API.
+
+Every upstream call goes through a circuit breaker shared by all processes
+(see circuit_breaker.py), so when Chapa degrades requests fail fast with a
+retry-after instead of tying up a worker for the whole timeout.
+"""
+import requests
+from django.conf import settings
+
+from .circuit_breaker import BulkheadFullError, CircuitBreaker, CircuitOpenError
+
+__all__ = ["ChapaBusy", "ChapaError", "ChapaUnavailable", "breaker", "check_available", "initialize", "verify"]
+
+ChapaUnavailable = CircuitOpenError
+# the bulkhead is full: a ChapaUnavailable worth retrying after a short wait
+ChapaBusy = BulkheadFullError
+
+
+class ChapaError(Exception):
+    """Transport or HTTP error talking to Chapa."""
+
+
+breaker = CircuitBreaker("chapa", **settings.CHAPA_CIRCUIT_BREAKER)
+
+
+def _base_url():
+    return getattr(settings, "CHAPA_BASE_URL", "https://api.chapa.co/v1")
+
+
+def _headers():
+    return {
+        "Authorization": f"Bearer {settings.CHAPA_SECRET_KEY}",
+        "Content-Type": "application/json",
+    }
+
+
+def _is_upstream_failure(exc):
+    # 4xx responses are our request's fault, not a sign that Chapa is unhealthy.
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return exc.response.status_code >= 500
+    return isinstance(exc, requests.RequestException)
+
+
+def _send(method, url, **kwargs):
+    resp = requests.request(method, url, headers=_headers(), timeout=settings.CHAPA_TIMEOUT, **kwargs)
+    resp.raise_for_status()
+    return resp.json()
+
+
+def _call(method, url, **kwargs):
+    try:
+        return breaker.call(_send, method, url, is_failure=_is_upstream_failure, **kwargs)
+    except requests.RequestException as exc:
+        raise ChapaError(str(exc)) from exc
+
+
+def check_available():
+    """Raise ChapaUnavailable if the breaker is open (cheap, no upstream call)."""
+    breaker.check()
+
+
+def initialize(payload):
+    """POST /transaction/initialize. Raises ChapaError or ChapaUnavailable."""
+    return _call("POST", f"{_base_url()}/transaction/initialize", json=payload)
+
+
+def verify(tx_ref):
+    """GET /transaction/verify/<tx_ref>. Raises ChapaError or ChapaUnavailable."""
+    return _call("GET", f"{_base_url()}/transaction/verify/{tx_ref}")
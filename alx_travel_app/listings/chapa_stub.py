@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Chapa API with fault injection, for exercising the
+circuit breaker and retry paths without touching the real provider.
+
+Point CHAPA_BASE_URL at it (e.g. http://127.0.0.1:8765) and adjust faults
+at runtime with POST /_faults {"error_rate": 0.5, "latency": 2.0,
+"status": 503}. GET /_stats returns request counts.
+"""
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class Faults:
+    def __init__(self, error_rate=0.0, latency=0.0, status=503, seed=None):
+        self.error_rate = error_rate
+        self.latency = latency
+        self.status = status
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        self.lock = threading.Lock()
+
+    def update(self, values):
+        with self.lock:
+            for name in ("error_rate", "latency", "status"):
+                if name in values:
+                    setattr(self, name, type(getattr(self, name))(values[name]))
+
+    def roll(self):
+        """Count a request; return True if it should fail."""
+        with self.lock:
+            self.requests += 1
+            failed = self.rng.random() < self.error_rate
+            if failed:
+                self.errors += 1
+            return failed
+
+
+class ChapaStubHandler(BaseHTTPRequestHandler):
+    server_version = "ChapaStub/1.0"
+
+    def log_message(self, format, *args):  # keep test output quiet
+        pass
+
+    def _json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _faulty(self):
+        faults = self.server.faults
+        if faults.latency:
+            time.sleep(faults.latency)
+        if faults.roll():
+            self._json(faults.status, {"status": "failed", "message": "injected fault"})
+            return True
+        return False
+
+    def do_POST(self):
+        path = self.path.rstrip("/")
+        if path.endswith("/_faults"):
+            self.server.faults.update(self._body())
+            return self._json(200, {"ok": True})
+        if path.endswith("/transaction/initialize"):
+            payload = self._body()
+            if self._faulty():
+                return
+            tx_ref = payload.get("tx_ref") or uuid.uuid4().hex
+            return self._json(200, {
+                "status": "success",
+                "message": "Hosted Link",
+                "data": {"checkout_url": f"http://checkout.local/{tx_ref}", "id": uuid.uuid4().hex},
+            })
+        self._json(404, {"message": "not found"})
+
+    def do_GET(self):
+        path = self.path.rstrip("/")
+        if path.endswith("/_stats"):
+            faults = self.server.faults
+            return self._json(200, {"requests": faults.requests, "errors": faults.errors})
+        if "/transaction/verify/" in path:
+            if self._faulty():
+                return
+            tx_ref = path.rsplit("/", 1)[1]
+            return self._json(200, {
+                "status": "success",
+                "message": "Payment details",
+                "data": {"status": "success", "tx_ref": tx_ref, "reference": f"CH-{tx_ref[-8:]}"},
+            })
+        self._json(404, {"message": "not found"})
+
+
+def make_stub_server(host="127.0.0.1", port=0, **fault_options):
+    server = ThreadingHTTPServer((host, port), ChapaStubHandler)
+    server.daemon_threads = True
+    server.faults = Faults(**fault_options)
+    return server
+
+
+def start_stub(host="127.0.0.1", port=0, **fault_options):
+    """Start the stub in a daemon thread. Returns (server, base_url)."""
+    server = make_stub_server(host, port, **fault_options)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}"
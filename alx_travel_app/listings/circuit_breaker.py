@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Circuit breaker and concurrency limit shared across processes.
+
+State is kept in the default cache (Redis in production), so every gunicorn
+and Celery process sees the same breaker:
+
+  cb:<name>:open          present while open; value = epoch when it may probe
+  cb:<name>:half_open     present after a trip until probes succeed
+  cb:<name>:probes        probe calls admitted in the current half-open period
+  cb:<name>:ok_probes     successful probes in the current half-open period
+  cb:<name>:w:<bucket>:*  call / failure / slow-call counters per time bucket
+  cb:<name>:slot:<i>      one per call in progress (bulkhead); value = call id
+
+Closed: calls pass and are counted; the breaker trips when, over the last
+window, enough calls were made and either the failure rate or the slow-call
+rate crosses its threshold. Open: calls fail fast with a retry-after hint.
+Half-open (after open_seconds): a limited number of probe calls pass; enough
+successes close the breaker, any failure re-opens it.
+
+Bulkhead: at most ``max_concurrent`` calls run at once across processes.
+A call takes one of the slot keys with cache.add() and deletes it when it
+ends; each slot expires on its own after ``slot_seconds``, so a slot held
+by a killed process frees itself and nothing can push the count below
+zero.
+"""
+import logging
+import random
+import time
+import uuid
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the upstream while the breaker rejects calls."""
+
+    def __init__(self, name, retry_after, reason="circuit open"):
+        super().__init__(f"{name}: {reason}")
+        self.name = name
+        self.retry_after = max(int(retry_after), 1)
+        self.reason = reason
+
+
+class BulkheadFullError(CircuitOpenError):
+    """Raised when ``max_concurrent`` calls are already in progress; a slot frees up soon."""
+
+
+class CircuitBreaker:
+    def __init__(self, name, failure_rate=0.5, slow_call_rate=0.5, slow_call_seconds=5.0,
+                 min_calls=10, window_seconds=30, open_seconds=30, half_open_calls=3,
+                 max_concurrent=None, slot_seconds=60):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.slow_call_rate = slow_call_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self.max_concurrent = max_concurrent
+        self.slot_seconds = slot_seconds
+
+    def _key(self, suffix):
+        return f"cb:{self.name}:{suffix}"
+
+    @staticmethod
+    def _incr(key, timeout, delta=1):
+        cache.add(key, 0, timeout)
+        try:
+            return cache.incr(key, delta)
+        except ValueError:  # expired between add and incr
+            cache.add(key, delta, timeout)
+            return delta
+
+    # -- state -------------------------------------------------------------
+
+    @property
+    def state(self):
+        if cache.get(self._key("open")) is not None:
+            return "open"
+        if cache.get(self._key("half_open")) is not None:
+            return "half_open"
+        return "closed"
+
+    def check(self):
+        """Raise CircuitOpenError if the breaker is open. Does not admit a probe."""
+        opened_until = cache.get(self._key("open"))
+        if opened_until is not None:
+            raise CircuitOpenError(self.name, opened_until - time.time())
+
+    def _admit(self):
+        """Admit one call or raise. Returns True when the call is a half-open probe."""
+        self.check()
+        if cache.get(self._key("half_open")) is None:
+            return False
+        probes = self._incr(self._key("probes"), self.open_seconds)
+        if probes > self.half_open_calls:
+            raise CircuitOpenError(self.name, 1, "circuit half-open, probe quota used")
+        return True
+
+    def _buckets(self):
+        bucket = int(time.time() // self.window_seconds)
+        return bucket, bucket - 1
+
+    def _window_counts(self):
+        keys = [
+            self._key(f"w:{bucket}:{kind}")
+            for bucket in self._buckets()
+            for kind in ("calls", "failures", "slow")
+        ]
+        values = cache.get_many(keys)
+        totals = {"calls": 0, "failures": 0, "slow": 0}
+        for key, value in values.items():
+            totals[key.rsplit(":", 1)[1]] += value
+        return totals
+
+    def _record(self, failed, duration, probe):
+        if probe:
+            if failed:
+                self.trip("half-open probe failed")
+            elif self._incr(self._key("ok_probes"), self.open_seconds) >= self.half_open_calls:
+                self.reset()
+                logger.info("Circuit %s closed after successful probes", self.name)
+            return
+
+        bucket = self._buckets()[0]
+        ttl = self.window_seconds * 2 + 1
+        self._incr(self._key(f"w:{bucket}:calls"), ttl)
+        if failed:
+            self._incr(self._key(f"w:{bucket}:failures"), ttl)
+        slow = duration >= self.slow_call_seconds
+        if slow:
+            self._incr(self._key(f"w:{bucket}:slow"), ttl)
+        if not (failed or slow):
+            return
+
+        counts = self._window_counts()
+        if counts["calls"] < self.min_calls:
+            return
+        if counts["failures"] / counts["calls"] >= self.failure_rate:
+            self.trip(f"failure rate {counts['failures']}/{counts['calls']}")
+        elif counts["slow"] / counts["calls"] >= self.slow_call_rate:
+            self.trip(f"slow-call rate {counts['slow']}/{counts['calls']}")
+
+    def trip(self, reason=""):
+        cache.set(self._key("open"), time.time() + self.open_seconds, self.open_seconds)
+        cache.set(self._key("half_open"), 1, None)
+        cache.delete_many([self._key("probes"), self._key("ok_probes")])
+        logger.warning("Circuit %s opened: %s", self.name, reason)
+
+    def _slot_keys(self):
+        return [self._key(f"slot:{i}") for i in range(self.max_concurrent)]
+
+    def free_slots(self):
+        """Calls the bulkhead would admit right now across all processes (None when unlimited)."""
+        if self.max_concurrent is None:
+            return None
+        return self.max_concurrent - len(cache.get_many(self._slot_keys()))
+
+    def _acquire_slot(self):
+        """Take a free bulkhead slot; returns (key, call id) or raises BulkheadFullError."""
+        call_id = uuid.uuid4().hex
+        keys = self._slot_keys()
+        random.shuffle(keys)  # spread contending callers over the slots
+        for key in keys:
+            if cache.add(key, call_id, self.slot_seconds):
+                return key, call_id
+        raise BulkheadFullError(self.name, 1, "too many concurrent upstream calls")
+
+    @staticmethod
+    def _release_slot(slot):
+        key, call_id = slot
+        # a call that outlived slot_seconds must not free a slot taken since
+        if cache.get(key) == call_id:
+            cache.delete(key)
+
+    def reset(self):
+        keys = [self._key(k) for k in ("open", "half_open", "probes", "ok_probes")]
+        for bucket in self._buckets():
+            keys += [self._key(f"w:{bucket}:{kind}") for kind in ("calls", "failures", "slow")]
+        cache.delete_many(keys)
+
+    # -- calls -------------------------------------------------------------
+
+    def call(self, fn, *args, is_failure=None, **kwargs):
+        """
+        Run ``fn`` through the breaker. Exceptions count as failures unless
+        ``is_failure(exc)`` says otherwise; they are always re-raised.
+        """
+        probe = self._admit()
+        # Bulkhead: never let slow upstream calls occupy every worker.
+        slot = self._acquire_slot() if self.max_concurrent is not None else None
+
+        start = time.monotonic()
+        failed = False
+        try:
+            return fn(*args, **kwargs)
+        except Exception as exc:
+            failed = is_failure(exc) if is_failure else True
+            raise
+        finally:
+            if slot is not None:
+                self._release_slot(slot)
+            self._record(failed, time.monotonic() - start, probe)
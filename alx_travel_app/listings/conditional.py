@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Conditional GET (ETag / Last-Modified) for read endpoints.
+
+Validators are computed from ``updated_at`` with one cheap query, before
+anything is serialized:
+
+  detail  the object's updated_at (values_list, no model instance)
+  list    Max(updated_at) and Count over the filtered queryset; the count
+          catches deletions, which do not move the max
+
+The ETag also covers the full path (pagination, ?fields=), the negotiated
+format and the user, since all of them change the body. A matching
+If-None-Match gets ``304 Not Modified``; so does If-Modified-Since, but
+only for details: a deletion from a list leaves its Last-Modified as it
+was, so lists are only revalidated by ETag.
+
+Rows changed with queryset.update() must set updated_at themselves, or
+clients keep their cached copy.
+"""
+import hashlib
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+class NotModified(Exception):
+    """Raised from ConditionalGetMixin.initial() to short-circuit the handler."""
+
+    def __init__(self, response):
+        super().__init__("not modified")
+        self.response = response
+
+
+def make_etag(*parts) -> str:
+    """Weak ETag over ``parts`` (same representation, not byte-identical)."""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()[:32]
+    return "W/" + quote_etag(digest)
+
+
+def object_validators(queryset, **lookup):
+    """(updated_at, None) of the single row matching ``lookup``, or (None, None)."""
+    try:
+        updated_at = queryset.filter(**lookup).order_by().values_list("updated_at", flat=True).first()
+    except (TypeError, ValueError, ValidationError):
+        return None, None  # malformed lookup value; the handler answers 404
+    return updated_at, None
+
+
+def list_validators(queryset):
+    """(Max(updated_at), row count) of ``queryset``."""
+    summary = queryset.order_by().aggregate(last=Max("updated_at"), count=Count("pk"))
+    return summary["last"], summary["count"]
+
+
+def conditional_response(request, etag, last_modified):
+    """Django's 304/412 response for ``request``, or None to serve the body."""
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None and response.status_code == 304:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified):
+    """Add ETag / Last-Modified headers to ``response`` unless already set."""
+    if etag and not response.has_header("ETag"):
+        response["ETag"] = etag
+    if last_modified and not response.has_header("Last-Modified"):
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    DRF view mixin answering GET/HEAD with 304 when the resource is unchanged.
+
+    Runs after authentication and permission checks. get_validators()
+    returns (last_modified, version), where version is anything else that
+    changes the body (the row count for lists). Since a version change does
+    not move last_modified, If-Modified-Since alone never gets a 304 when
+    there is a version. (None, None), e.g. for an unknown object, skips the
+    check and lets the handler respond as usual.
+    """
+
+    def get_validators(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset())
+        if lookup_url_kwarg in kwargs:
+            return object_validators(queryset, **{self.lookup_field: kwargs[lookup_url_kwarg]})
+        return list_validators(queryset)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._validators = (None, None)
+        if request.method not in ("GET", "HEAD"):
+            return
+        last_modified, version = self.get_validators(request, *args, **kwargs)
+        if last_modified is None and version is None:
+            return
+        etag = make_etag(
+            request.get_full_path(),
+            getattr(request.accepted_renderer, "format", ""),
+            request.user.pk,
+            last_modified.isoformat() if last_modified else "",
+            version,
+        )
+        self._validators = (etag, last_modified)
+        response = conditional_response(request, etag, last_modified if version is None else None)
+        if response is not None:
+            raise NotModified(set_validators(response, etag, last_modified))
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        etag, last_modified = getattr(self, "_validators", (None, None))
+        if response.status_code == 200:
+            set_validators(response, etag, last_modified)
+        patch_vary_headers(response, ("Accept", "Authorization", "Cookie"))
+        return response
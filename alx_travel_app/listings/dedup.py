@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Deduplication of Celery task enqueues.
+
+Tasks declared with ``base=DedupTask`` and a ``dedup_key`` template (formatted
+with the task's call arguments) run at most once per key:
+
+  taskdedup:<task>:<key>          seen-set entry, held for TASK_DEDUP["ttl"]
+                                  from the first enqueue; later enqueues of
+                                  the same key are dropped before they reach
+                                  the broker
+  taskdedup:<task>:<key>:running  held while a worker runs the task
+  taskdedup:<task>:<key>:done     set after a successful run and kept for
+                                  TASK_DEDUP["done_ttl"], so copies already on
+                                  the queue (or enqueued after the seen entry
+                                  expired) are skipped by the worker
+
+A failed run clears the seen entry so the work can be enqueued again.
+Counters of enqueued, dropped and skipped tasks are kept under
+``taskdedup:stats:<task>:<event>`` (see stats()).
+
+    @shared_task(base=DedupTask, dedup_key="payment:{payment_id}")
+    def send_payment_confirmation_email(payment_id): ...
+"""
+import inspect
+import logging
+
+from celery import Task
+from celery.exceptions import Retry
+from celery.utils import uuid
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+STATS_EVENTS = ("enqueued", "dropped", "skipped")
+
+
+def _stats_key(task_name, event):
+    return f"taskdedup:stats:{task_name}:{event}"
+
+
+def _count(task_name, event):
+    key = _stats_key(task_name, event)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:  # evicted between add and incr
+        cache.set(key, 1, None)
+
+
+def stats(task_names):
+    """{task name: {event: count}} for the given tasks."""
+    keys = {_stats_key(name, event): (name, event) for name in task_names for event in STATS_EVENTS}
+    values = cache.get_many(list(keys))
+    result = {name: dict.fromkeys(STATS_EVENTS, 0) for name in task_names}
+    for key, value in values.items():
+        name, event = keys[key]
+        result[name][event] = value
+    return result
+
+
+def reset_stats(task_names):
+    cache.delete_many([_stats_key(name, event) for name in task_names for event in STATS_EVENTS])
+
+
+class DedupTask(Task):
+    """Celery base task that drops duplicate enqueues and skips duplicate runs."""
+
+    abstract = True
+    dedup_key = None
+
+    def dedup_cache_key(self, args, kwargs):
+        """Cache key for this call, or None if the task does not deduplicate."""
+        if not self.dedup_key:
+            return None
+        arguments = inspect.signature(self.run).bind(*(args or ()), **(kwargs or {})).arguments
+        return f"taskdedup:{self.name}:{self.dedup_key.format(**arguments)}"
+
+    def apply_async(self, args=None, kwargs=None, task_id=None, **options):
+        key = self.dedup_cache_key(args, kwargs)
+        if key is None:
+            return super().apply_async(args, kwargs, task_id=task_id, **options)
+
+        # a retry of the task holding the key is re-published with its own id
+        if task_id is None or cache.get(key) != task_id:
+            task_id = task_id or uuid()
+            if not cache.add(key, task_id, settings.TASK_DEDUP["ttl"]):
+                _count(self.name, "dropped")
+                logger.info("Dropped duplicate %s (%s)", self.name, key)
+                return self.AsyncResult(cache.get(key) or task_id)
+        try:
+            result = super().apply_async(args, kwargs, task_id=task_id, **options)
+        except Exception:
+            cache.delete(key)
+            raise
+        _count(self.name, "enqueued")
+        return result
+
+    def __call__(self, *args, **kwargs):
+        key = self.dedup_cache_key(args, kwargs)
+        if key is None:
+            return super().__call__(*args, **kwargs)
+
+        config = settings.TASK_DEDUP
+        if cache.get(f"{key}:done") or not cache.add(f"{key}:running", 1, config["lock_ttl"]):
+            _count(self.name, "skipped")
+            logger.info("Skipped duplicate run of %s (%s)", self.name, key)
+            return None
+        try:
+            result = super().__call__(*args, **kwargs)
+        except Retry:
+            raise
+        except Exception:
+            cache.delete(key)
+            raise
+        else:
+            cache.set(f"{key}:done", 1, config["done_ttl"])
+            return result
+        finally:
+            cache.delete(f"{key}:running")
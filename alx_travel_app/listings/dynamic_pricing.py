@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Occupancy-driven nightly price multipliers for the whole catalogue.
+
+run() loads every live booking (confirmed, or pending with an unexpired
+hold) that overlaps the next ``horizon_days`` nights with one query and
+turns it into (listings x nights) arrays with NumPy: booked nights, and
+nights booked in the last ``pace_days`` (booking pace). Both are smoothed
+over ``window_nights``. A listing's comparables are its precomputed similar
+listings (similar.py); listings without any use the catalogue average.
+Per night, demand is a weighted mix of own occupancy, comparable occupancy
+and pace, and the multiplier is
+
+    clip(1 + sensitivity * (demand - target_occupancy), min, max)
+
+rounded to cents of a multiplier. Results are upserted into
+ListingDynamicPrice, one row per listing, ``batch_size`` listings per
+statement, and the cached pricing profiles of those listings are dropped so
+quotes pick them up. Settings live in settings.DYNAMIC_PRICING.
+"""
+import logging
+import time
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from .lazy import lazy_import
+from .models import Booking, Listing, ListingDynamicPrice, ListingNeighbor
+from .pricing import invalidate_profiles
+
+np = lazy_import("numpy")
+
+logger = logging.getLogger(__name__)
+
+
+def _booked(rows, starts, ends, listings, nights):
+    """(listings x nights) 0/1 matrix of nights covered by [starts, ends)."""
+    diff = np.zeros((listings, nights + 1))
+    np.add.at(diff, (rows, starts), 1)
+    np.add.at(diff, (rows, ends), -1)
+    return (np.cumsum(diff, axis=1)[:, :nights] > 0).astype(float)
+
+
+def _smoothed(matrix, window):
+    """Centred moving average along nights, over the nights that exist."""
+    if window <= 1 or not matrix.size:
+        return matrix
+    half = window // 2
+    padded = np.zeros((matrix.shape[0], matrix.shape[1] + 1))
+    np.cumsum(matrix, axis=1, out=padded[:, 1:])
+    nights = np.arange(matrix.shape[1])
+    lo = np.maximum(nights - half, 0)
+    hi = np.minimum(nights + half + 1, matrix.shape[1])
+    return (padded[:, hi] - padded[:, lo]) / (hi - lo)
+
+
+def load(start, config):
+    """Listing ids, booked-night and recent-pace matrices, and comparable indices."""
+    nights = config["horizon_days"]
+    end = start + timedelta(days=nights)
+    ids = list(Listing.objects.order_by("pk").values_list("pk", flat=True))
+    index = {pk: i for i, pk in enumerate(ids)}
+
+    bookings = list(
+        Booking.objects.filter(
+            Q(status=Booking.STATUS_CONFIRMED)
+            | Q(status=Booking.STATUS_PENDING, hold_expires_at__gt=timezone.now()),
+            start_date__lt=end, end_date__gt=start,
+        ).order_by().values_list("listing_id", "start_date", "end_date", "created_at")
+    )
+    bookings = [row for row in bookings if row[0] in index]
+    rows = np.array([index[row[0]] for row in bookings], dtype=np.intp)
+    origin = start.toordinal()
+    starts = np.clip([row[1].toordinal() - origin for row in bookings], 0, nights).astype(np.intp)
+    ends = np.clip([row[2].toordinal() - origin for row in bookings], 0, nights).astype(np.intp)
+    recent_since = timezone.now() - timedelta(days=config["pace_days"])
+    recent = np.array([row[3] >= recent_since for row in bookings], dtype=bool)
+
+    booked = _booked(rows, starts, ends, len(ids), nights)
+    pace = _booked(rows[recent], starts[recent], ends[recent], len(ids), nights)
+
+    # comparables: the precomputed similar listings, -1 padded
+    neighbors = {}
+    for listing_id, neighbor_id in (ListingNeighbor.objects.order_by("listing_id", "rank")
+                                    .values_list("listing_id", "neighbor_id")):
+        if listing_id in index and neighbor_id in index:
+            neighbors.setdefault(index[listing_id], []).append(index[neighbor_id])
+    width = max((len(row) for row in neighbors.values()), default=0)
+    comparables = np.full((len(ids), width), -1, dtype=np.intp)
+    for row, found in neighbors.items():
+        comparables[row, :len(found)] = found
+    return ids, booked, pace, comparables
+
+
+def compute(booked, pace, comparables, config):
+    """(listings x nights) multipliers from the arrays load() returns."""
+    window = config["window_nights"]
+    weights = config["weights"]
+    own = _smoothed(booked, window)
+    recent = _smoothed(pace, window)
+
+    market = own.mean(axis=0) if len(own) else np.zeros(booked.shape[1])
+    comparable = np.broadcast_to(market, own.shape).copy()
+    if comparables.shape[1]:
+        block = config["batch_size"]
+        for lo in range(0, len(own), block):
+            rows = comparables[lo:lo + block]
+            valid = rows >= 0
+            counts = valid.sum(axis=1)
+            # each comparable's occupancy row, (block x K x nights) at a time
+            summed = np.where(valid[:, :, None], own[np.maximum(rows, 0)], 0.0).sum(axis=1)
+            has = np.flatnonzero(counts > 0)
+            comparable[lo + has] = summed[has] / counts[has, None]
+
+    total = weights["own"] + weights["comparable"] + weights["pace"]
+    demand = (weights["own"] * own + weights["comparable"] * comparable + weights["pace"] * recent) / total
+    multipliers = 1.0 + config["sensitivity"] * (demand - config["target_occupancy"])
+    return np.round(np.clip(multipliers, config["min_multiplier"], config["max_multiplier"]), 2)
+
+
+def write(ids, start, multipliers, batch_size) -> int:
+    """Upsert one ListingDynamicPrice row per listing; returns rows written."""
+    computed_at = timezone.now()
+    # MySQL upserts on any unique key and rejects an explicit conflict target
+    target = ["listing"] if connection.features.supports_update_conflicts_with_target else None
+    written = 0
+    for offset in range(0, len(ids), batch_size):
+        batch = ids[offset:offset + batch_size]
+        ListingDynamicPrice.objects.bulk_create(
+            [ListingDynamicPrice(listing_id=pk, start_date=start, multipliers=row, computed_at=computed_at)
+             for pk, row in zip(batch, multipliers[offset:offset + batch_size].tolist())],
+            batch_size=batch_size, update_conflicts=True, unique_fields=target,
+            update_fields=["start_date", "multipliers", "computed_at"],
+        )
+        invalidate_profiles(batch)
+        written += len(batch)
+    return written
+
+
+def run(dry_run: bool = False, start=None, timings: Optional[dict] = None, **overrides) -> dict:
+    """
+    Recompute multipliers for every listing over the next horizon (from
+    ``start``, default today) and store them unless ``dry_run``. Returns a
+    summary; ``timings`` collects seconds per phase. ``overrides`` replace
+    settings.DYNAMIC_PRICING entries.
+    """
+    config = {**settings.DYNAMIC_PRICING, **overrides}
+    start = start or timezone.localdate()
+    timings = {} if timings is None else timings
+
+    began = time.perf_counter()
+    ids, booked, pace, comparables = load(start, config)
+    timings["load"] = time.perf_counter() - began
+
+    began = time.perf_counter()
+    multipliers = compute(booked, pace, comparables, config)
+    timings["compute"] = time.perf_counter() - began
+
+    began = time.perf_counter()
+    written = 0 if dry_run else write(ids, start, multipliers, config["batch_size"])
+    timings["write"] = time.perf_counter() - began
+
+    summary = {
+        "listings": len(ids),
+        "nights": int(multipliers.size),
+        "raised": int((multipliers > 1).sum()),
+        "lowered": int((multipliers < 1).sum()),
+        "mean": float(multipliers.mean()) if multipliers.size else 1.0,
+        "min": float(multipliers.min()) if multipliers.size else 1.0,
+        "max": float(multipliers.max()) if multipliers.size else 1.0,
+        "written": written,
+        "dry_run": dry_run,
+    }
+    logger.info("Dynamic pricing from %s: %s", start, summary)
+    return summary
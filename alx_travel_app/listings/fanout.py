@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Batched publishing of many calls of one Celery task.
+
+fan_out() publishes every message over a single producer checked out of
+the app's producer pool (one connection and channel for the whole batch,
+instead of a pool round trip per .delay()). With ``chunk_size`` > 1 the
+calls are grouped with ``task.chunks()``, so each message runs
+``chunk_size`` calls in one worker invocation.
+
+Backpressure: every ``check_every`` messages the depth of the target queue
+is read from the broker. Above ``max_queue_depth`` publishing pauses, with
+growing sleeps, until workers have drained it. After ``max_wait`` seconds
+it raises BrokerBackpressure, which reports how many messages were sent.
+Defaults come from settings.TASK_FANOUT.
+
+Chunked calls run inside celery.starmap, so DedupTask still skips
+duplicate runs but cannot drop duplicate enqueues.
+
+    fan_out(send_booking_confirmation, [(str(pk),) for pk in ids], chunk_size=50)
+"""
+import itertools
+import logging
+import time
+from contextlib import nullcontext
+from typing import Iterable, Optional
+
+from django.conf import settings
+from kombu.exceptions import ChannelError
+
+from alx_travel_app.celery import app
+
+logger = logging.getLogger(__name__)
+
+
+class BrokerBackpressure(RuntimeError):
+    """The queue stayed above max_queue_depth for max_wait seconds."""
+
+    def __init__(self, queue, depth, published):
+        super().__init__(f"queue {queue!r} still holds {depth} messages; published {published}")
+        self.queue = queue
+        self.depth = depth
+        self.published = published
+
+
+def queue_depth(queue: str) -> int:
+    """Messages waiting in ``queue`` (0 if the broker does not know it yet)."""
+    with app.connection_for_write() as connection:
+        try:
+            return connection.default_channel.queue_declare(queue=queue, passive=True).message_count
+        except ChannelError:
+            return 0
+
+
+def _wait_for_room(queue, config, published):
+    delay, waited = 0.05, 0.0
+    while True:
+        depth = queue_depth(queue)
+        if depth <= config["max_queue_depth"]:
+            return
+        if waited >= config["max_wait"]:
+            raise BrokerBackpressure(queue, depth, published)
+        logger.info("Queue %s holds %s messages, pausing fan-out", queue, depth)
+        time.sleep(delay)
+        waited += delay
+        delay = min(delay * 2, 2.0)
+
+
+def _messages(task, calls, chunk_size):
+    if chunk_size <= 1:
+        return (task.s(*args) for args in calls)
+    calls = iter(calls)
+    # the messages task.chunks(calls, chunk_size).group() would send, without
+    # materializing ``calls`` first
+    return (task.starmap(batch)
+            for batch in iter(lambda: list(itertools.islice(calls, chunk_size)), []))
+
+
+def fan_out(task, calls: Iterable[tuple], chunk_size: Optional[int] = None, queue: Optional[str] = None,
+            **options) -> int:
+    """
+    Publish ``task(*args)`` for every ``args`` in ``calls``; returns the
+    number of messages published. Extra ``options`` go to apply_async;
+    ``fanout={...}`` overrides settings.TASK_FANOUT for this call.
+    """
+    config = {**settings.TASK_FANOUT, **options.pop("fanout", {})}
+    chunk_size = chunk_size or config["chunk_size"]
+    # chunked messages are celery.starmap tasks; keep them on the task's own queue
+    queue = queue or app.amqp.router.route({}, task.name)["queue"].name
+    eager = app.conf.task_always_eager
+    check = not eager and config["max_queue_depth"]
+
+    published = 0
+    with nullcontext() if eager else app.producer_pool.acquire(block=True) as producer:
+        for message in _messages(task, calls, chunk_size):
+            if check and published % config["check_every"] == 0:
+                _wait_for_room(queue, config, published)
+            message.apply_async(producer=producer, queue=queue, **options)
+            published += 1
+    return published
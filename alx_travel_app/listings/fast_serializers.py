@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Read-only fast path for ModelSerializers.
+
+compile_serializer() turns a (possibly sparse, see fieldsets.py) serializer
+into a list of (output name, values() column, converter) entries, so a
+page of ``queryset.values(*columns)`` rows becomes plain dicts without
+model instances or per-field to_representation dispatch. Converters
+reproduce DRF's output (UUIDs and Decimals as strings, ISO 8601 dates,
+datetimes in the current time zone with "Z" for UTC). Serializers with
+fields that are not backed by a concrete column (method fields, nested
+serializers, source="*") are not compiled and keep using DRF.
+
+FastReadMixin wires this into list/retrieve of generic views; writes and
+the browsable API are unchanged.
+"""
+from decimal import Decimal
+from typing import Optional
+
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.permissions import BasePermission
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+_compiled = {}
+
+# field classes whose to_representation returns the DB value unchanged
+_IDENTITY = (serializers.CharField, serializers.ChoiceField, serializers.IntegerField,
+             serializers.BooleanField, serializers.FloatField, serializers.JSONField)
+
+
+def _str(value):
+    return None if value is None else str(value)
+
+
+def _nullable(to_representation):
+    return lambda value: None if value is None else to_representation(value)
+
+
+def _decimal(field):
+    if not getattr(field, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING) \
+            or field.decimal_places is None or field.localize or field.normalize_output:
+        return _nullable(field.to_representation)
+    exponent = Decimal(1).scaleb(-field.decimal_places)
+
+    def convert(value):
+        if value is None:
+            return None
+        return "{:f}".format(value.quantize(exponent))
+    return convert
+
+
+def _datetime(field):
+    tz = field.default_timezone()
+    if getattr(field, "format", api_settings.DATETIME_FORMAT) != ISO_8601 \
+            or hasattr(field, "timezone") or tz is None:
+        return _nullable(field.to_representation)
+
+    def convert(value):
+        if value is None:
+            return None
+        if timezone.is_aware(value):
+            value = value.astimezone(tz)
+        value = value.isoformat()
+        return value[:-6] + "Z" if value.endswith("+00:00") else value
+    return convert
+
+
+def _date(field):
+    if getattr(field, "format", api_settings.DATE_FORMAT) != ISO_8601:
+        return _nullable(field.to_representation)
+
+    def convert(value):
+        return None if value is None else value.isoformat()
+    return convert
+
+
+def _converter(field, model_field):
+    """Callable turning a values() cell into the field's output (None = as-is)."""
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        pk = model_field.target_field
+        return _str if pk.get_internal_type() == "UUIDField" else None
+    if isinstance(field, serializers.UUIDField):
+        return _str if field.uuid_format == "hex_verbose" else _nullable(field.to_representation)
+    if isinstance(field, serializers.DecimalField):
+        return _decimal(field)
+    if isinstance(field, serializers.DateTimeField):
+        return _datetime(field)
+    if isinstance(field, serializers.DateField):
+        return _date(field)
+    if isinstance(field, _IDENTITY):
+        return None
+    return _nullable(field.to_representation)
+
+
+class CompiledSerializer:
+    """Precompiled accessors for one serializer field set."""
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.columns = tuple(dict.fromkeys(column for _, column, _ in spec))
+
+    def to_representation(self, row) -> dict:
+        return {name: row[column] if convert is None else convert(row[column])
+                for name, column, convert in self.spec}
+
+    def many(self, rows) -> list:
+        spec = self.spec
+        return [{name: row[column] if convert is None else convert(row[column])
+                 for name, column, convert in spec} for row in rows]
+
+
+def _compile(serializer) -> Optional[CompiledSerializer]:
+    opts = serializer.Meta.model._meta
+    concrete = {field.name: field for field in opts.concrete_fields}
+    spec = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        model_field = concrete.get(field.source)
+        if model_field is None or isinstance(field, serializers.BaseSerializer):
+            return None
+        spec.append((name, model_field.attname, _converter(field, model_field)))
+    return CompiledSerializer(spec)
+
+
+def compile_serializer(serializer) -> Optional[CompiledSerializer]:
+    """CompiledSerializer for ``serializer``'s fields, or None if it needs DRF."""
+    key = (type(serializer), tuple(serializer.fields), timezone.get_current_timezone_name())
+    if key not in _compiled:
+        _compiled[key] = _compile(serializer)
+    return _compiled[key]
+
+
+def _default_object_permissions(view) -> bool:
+    return all(type(permission).has_object_permission is BasePermission.has_object_permission
+               for permission in view.get_permissions())
+
+
+class FastReadMixin:
+    """
+    Generic view mixin serving list()/retrieve() from values() rows through a
+    compiled serializer. Falls back to the regular path when the serializer
+    cannot be compiled or object-level permissions need model instances.
+    """
+
+    def list(self, request, *args, **kwargs):
+        compiled = compile_serializer(self.get_serializer())
+        if compiled is None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset()).values(*compiled.columns)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(compiled.many(page))
+        return Response(compiled.many(queryset))
+
+    def retrieve(self, request, *args, **kwargs):
+        compiled = compile_serializer(self.get_serializer())
+        if compiled is None or not _default_object_permissions(self):
+            return super().retrieve(request, *args, **kwargs)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset())
+        try:
+            row = queryset.filter(**{self.lookup_field: kwargs[lookup_url_kwarg]}) \
+                .values(*compiled.columns).first()
+        except (TypeError, ValueError, ValidationError):
+            row = None  # malformed lookup value, as get_object_or_404 does
+        if row is None:
+            raise Http404
+        return Response(compiled.to_representation(row))
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Sparse fieldsets: ``?fields=id,title`` or ``?exclude=description`` on read
+endpoints.
+
+SparseFieldsetSerializerMixin drops the unwanted fields from a
+ModelSerializer. SparseFieldsetViewMixin pushes the same field set down to
+the queryset with ``.only()`` / ``.defer()``, so unrequested columns
+(descriptions, JSON blobs) are neither read from the database nor rendered.
+Unknown field names are ignored.
+"""
+from typing import List, Optional
+
+FIELDS_PARAM = "fields"
+EXCLUDE_PARAM = "exclude"
+
+
+def _names(value) -> Optional[set]:
+    if not value:
+        return None
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+def requested_fields(request):
+    """
+    (fields, exclude) name sets from the query string (None when absent).
+    Only reads are trimmed; writes always validate the full serializer.
+    """
+    if request is None or request.method not in ("GET", "HEAD"):
+        return None, None
+    params = getattr(request, "query_params", request.GET)
+    return _names(params.get(FIELDS_PARAM)), _names(params.get(EXCLUDE_PARAM))
+
+
+class SparseFieldsetSerializerMixin:
+    """
+    ModelSerializer mixin honouring ``?fields=`` / ``?exclude=`` from the
+    request in the serializer context, or ``fields=`` / ``exclude=`` kwargs.
+    """
+
+    def __init__(self, *args, **kwargs):
+        only = kwargs.pop("fields", None)
+        exclude = kwargs.pop("exclude", None)
+        super().__init__(*args, **kwargs)
+        if only is None and exclude is None:
+            only, exclude = requested_fields(self.context.get("request"))
+        if only:
+            for name in set(self.fields) - set(only):
+                self.fields.pop(name)
+        if exclude:
+            for name in set(self.fields) & set(exclude):
+                self.fields.pop(name)
+
+
+def _model_field_names(serializer, names) -> Optional[List[str]]:
+    """
+    Concrete model fields backing the serializer fields ``names``, or None if
+    any of them is computed (source="*", a property or a method field) and the
+    column set cannot be known.
+    """
+    model = serializer.Meta.model
+    concrete = {field.name for field in model._meta.concrete_fields}
+    columns = []
+    for name in names:
+        field = serializer.fields[name]
+        root = field.source.split(".")[0]
+        if root not in concrete:
+            return None
+        columns.append(root)
+    return columns
+
+
+def sparse_queryset(queryset, serializer):
+    """Restrict ``queryset`` to the columns ``serializer`` will render."""
+    only, exclude = requested_fields(serializer.context.get("request"))
+    if only:
+        columns = _model_field_names(serializer, list(serializer.fields))
+        if columns is not None:
+            return queryset.only(queryset.model._meta.pk.name, *columns)
+    elif exclude:
+        opts = queryset.model._meta
+        concrete = {field.name for field in opts.concrete_fields} - {opts.pk.name}
+        deferred = [name for name in exclude if name in concrete and name not in serializer.fields]
+        if deferred:
+            return queryset.defer(*deferred)
+    return queryset
+
+
+class SparseFieldsetViewMixin:
+    """GenericAPIView mixin applying sparse_queryset to get_queryset()."""
+
+    def get_queryset(self):
+        return sparse_queryset(super().get_queryset(), self.get_serializer())
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Geospatial search over listings without PostGIS.
+
+Listings store a geohash of their coordinates in an indexed column. A
+search covers its area with a handful of geohash cells, fetches the
+candidates in those cells with plain index range scans (portable across
+MySQL and SQLite), then computes exact haversine distances for all
+candidates in one NumPy pass.
+
+Bounding boxes that cross the antimeridian are not supported.
+"""
+import math
+from typing import List, Optional, Set, Tuple
+
+from django.db.models import Q
+
+from .lazy import lazy_import
+from .models import Listing
+
+np = lazy_import("numpy")
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISION = 8  # ~38m x 19m cells, stored on Listing.geohash
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+# Upper bound on the number of cells (and so index range scans) per search.
+MAX_SEARCH_CELLS = 16
+
+
+def encode(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    """Encode a coordinate as a geohash string of ``precision`` characters."""
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            if longitude >= mid:
+                bits = (bits << 1) | 1
+                lon_lo = mid
+            else:
+                bits <<= 1
+                lon_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if latitude >= mid:
+                bits = (bits << 1) | 1
+                lat_lo = mid
+            else:
+                bits <<= 1
+                lat_hi = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(chars)
+
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """Return the (height, width) in degrees of a cell at ``precision``."""
+    total_bits = 5 * precision
+    lon_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def _cells_at(min_lat, min_lon, max_lat, max_lon, precision) -> Set[str]:
+    height, width = cell_size(precision)
+    cells = set()
+    lat = min_lat
+    while True:
+        lon = min_lon
+        while True:
+            cells.add(encode(lat, lon, precision))
+            if lon >= max_lon:
+                break
+            lon = min(lon + width, max_lon)
+        if lat >= max_lat:
+            break
+        lat = min(lat + height, max_lat)
+    return cells
+
+
+def covering_cells(min_lat, min_lon, max_lat, max_lon) -> Set[str]:
+    """
+    Return the geohash cells covering a bounding box, at the finest precision
+    that needs no more than MAX_SEARCH_CELLS cells.
+    """
+    min_lat, max_lat = max(min_lat, -90.0), min(max_lat, 90.0)
+    min_lon, max_lon = max(min_lon, -180.0), min(max_lon, 180.0)
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        rows = math.floor(max_lat / height) - math.floor(min_lat / height) + 1
+        cols = math.floor(max_lon / width) - math.floor(min_lon / width) + 1
+        if rows * cols <= MAX_SEARCH_CELLS:
+            return _cells_at(min_lat, min_lon, max_lat, max_lon, precision)
+    return set(GEOHASH_ALPHABET)
+
+
+def radius_bbox(latitude, longitude, radius_km) -> Tuple[float, float, float, float]:
+    """Bounding box (min_lat, min_lon, max_lat, max_lon) around a circle."""
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    cos_lat = max(math.cos(math.radians(latitude)), 1e-6)
+    dlon = min(radius_km / (KM_PER_DEGREE_LAT * cos_lat), 180.0)
+    return latitude - dlat, longitude - dlon, latitude + dlat, longitude + dlon
+
+
+def prefix_upper_bound(prefix: str, alphabet: str = GEOHASH_ALPHABET) -> Optional[str]:
+    """
+    The smallest prefix sorting after every string of ``alphabet``
+    characters (listed in sort order) that starts with ``prefix``: its last
+    character bumped to the next one in ``alphabet``, carrying over trailing
+    last characters ("sz" -> "t"). None when there is none ("zz"); raises
+    ValueError if the character to bump is not in ``alphabet``.
+    """
+    prefix = prefix.rstrip(alphabet[-1])
+    if not prefix:
+        return None
+    return prefix[:-1] + alphabet[alphabet.index(prefix[-1]) + 1]
+
+
+def cells_filter(cells) -> Q:
+    """
+    Q object matching listings whose geohash starts with any of ``cells``.
+
+    Prefixes are expressed as ``geohash >= p AND geohash < next(p)`` range
+    predicates (see prefix_upper_bound), which use the index on every
+    backend. Both bounds are built from geohash characters only, whose
+    order (digits, then lowercase letters) is the same under binary, ASCII
+    and MySQL's utf8mb4 collations.
+    """
+    q = Q()
+    for cell in sorted(cells):
+        upper = prefix_upper_bound(cell)
+        q |= Q(geohash__gte=cell, geohash__lt=upper) if upper else Q(geohash__gte=cell)
+    return q
+
+
+def haversine_km(lat1, lon1, lats, lons):
+    """Vectorized great-circle distance from one point to arrays of points."""
+    lat1, lon1 = math.radians(lat1), math.radians(lon1)
+    lats, lons = np.radians(lats), np.radians(lons)
+    a = (
+        np.sin((lats - lat1) / 2) ** 2
+        + math.cos(lat1) * np.cos(lats) * np.sin((lons - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _candidates(cells, queryset=None):
+    queryset = Listing.objects.all() if queryset is None else queryset
+    rows = list(
+        queryset.filter(cells_filter(cells)).values_list("pk", "latitude", "longitude")
+    )
+    if not rows:
+        return [], np.empty(0), np.empty(0)
+    ids = [row[0] for row in rows]
+    coords = np.array([(float(row[1]), float(row[2])) for row in rows])
+    return ids, coords[:, 0], coords[:, 1]
+
+
+def _ordered(ids, distances, limit) -> List[Tuple[Listing, float]]:
+    order = np.argsort(distances, kind="stable")[:limit]
+    chosen = [ids[i] for i in order]
+    listings = Listing.objects.in_bulk(chosen)
+    return [(listings[ids[i]], float(distances[i])) for i in order if ids[i] in listings]
+
+
+def search_radius(latitude, longitude, radius_km, limit: int = 50,
+                  queryset=None) -> List[Tuple[Listing, float]]:
+    """Listings within ``radius_km`` of a point, nearest first, with distances."""
+    cells = covering_cells(*radius_bbox(latitude, longitude, radius_km))
+    ids, lats, lons = _candidates(cells, queryset)
+    if not ids:
+        return []
+    distances = haversine_km(latitude, longitude, lats, lons)
+    inside = np.flatnonzero(distances <= radius_km)
+    return _ordered([ids[i] for i in inside], distances[inside], limit)
+
+
+def search_bbox(min_lat, min_lon, max_lat, max_lon, limit: int = 50,
+                origin: Optional[Tuple[float, float]] = None,
+                queryset=None) -> List[Tuple[Listing, float]]:
+    """
+    Listings inside a bounding box, sorted by distance from ``origin``
+    (the box centre by default).
+    """
+    cells = covering_cells(min_lat, min_lon, max_lat, max_lon)
+    ids, lats, lons = _candidates(cells, queryset)
+    if not ids:
+        return []
+    inside = np.flatnonzero(
+        (lats >= min_lat) & (lats <= max_lat) & (lons >= min_lon) & (lons <= max_lon)
+    )
+    if origin is None:
+        origin = ((min_lat + max_lat) / 2, (min_lon + max_lon) / 2)
+    distances = haversine_km(origin[0], origin[1], lats[inside], lons[inside])
+    return _ordered([ids[i] for i in inside], distances, limit)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Hold expiry for pending bookings.
+
+A pending booking holds its dates (availability checks count it) until
+``hold_expires_at``, set on save to now + settings.BOOKING_HOLD_MINUTES.
+expire_holds() cancels expired holds in batches: each batch locks up to
+``batch_size`` expired rows through booking_hold_expiry_idx, cancels them
+with one UPDATE, applies their rollup deltas together (QuerySet.update
+bypasses the model signals) and sends one ``holds_expired`` signal. The
+work per run follows the number of expired rows, not the table size.
+
+Paid bookings are never released: completing a Payment confirms the
+booking it references (confirm_paid(), called by Payment.mark_completed),
+and an expired hold whose booking has a completed payment is confirmed
+instead of cancelled, while one with a payment still pending is extended
+by another hold period.
+"""
+import logging
+import time
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+from . import ical, rollups
+from .models import Booking, Payment
+
+logger = logging.getLogger(__name__)
+
+# Sent once per expired batch, with bookings=[{"id", "listing_id", "guest_id",
+# "start_date", "end_date"}, ...] for the bookings that were cancelled.
+holds_expired = Signal()
+
+EVENT_FIELDS = ("id", "listing_id", "guest_id", "start_date", "end_date")
+
+
+def hold_expiry(now=None):
+    """Expiry timestamp for a hold starting ``now``."""
+    return (now or timezone.now()) + timedelta(minutes=settings.BOOKING_HOLD_MINUTES)
+
+
+def expired_holds(now=None):
+    """Pending bookings whose hold has run out."""
+    return Booking.objects.filter(status=Booking.STATUS_PENDING, hold_expires_at__lte=now or timezone.now())
+
+
+def confirm_paid(booking_reference) -> bool:
+    """Confirm the pending booking a completed payment references; True if one was confirmed."""
+    with transaction.atomic():
+        try:
+            rows = list(
+                Booking.objects.filter(pk=booking_reference, status=Booking.STATUS_PENDING)
+                .select_for_update().values(*dict.fromkeys(EVENT_FIELDS + rollups.BOOKING_FIELDS))
+            )
+        except (ValueError, ValidationError):  # not a booking id
+            return False
+        if not rows:
+            return False
+        _set_status(rows, Booking.STATUS_CONFIRMED)
+        listing_id = rows[0]["listing_id"]
+        transaction.on_commit(lambda: ical.invalidate_feeds([listing_id]))
+    return True
+
+
+def _payment_states(rows) -> dict:
+    """{booking id: "COMPLETED" or "PENDING"} for rows with such a payment; completed wins."""
+    states = {}
+    for reference, status in Payment.objects.filter(
+        booking_reference__in=[str(row["id"]) for row in rows], status__in=("PENDING", "COMPLETED"),
+    ).values_list("booking_reference", "status"):
+        if states.get(reference) != "COMPLETED":
+            states[reference] = status
+    return states
+
+
+def _set_status(rows, status) -> None:
+    Booking.objects.filter(pk__in=[row["id"] for row in rows]).update(status=status, hold_expires_at=None)
+    rollups.apply_booking_changes(
+        ({field: row[field] for field in rollups.BOOKING_FIELDS},
+         {field: row[field] for field in rollups.BOOKING_FIELDS} | {"status": status})
+        for row in rows
+    )
+
+
+def _expire_batch(now, batch_size):
+    """(rows examined, rows cancelled) for one batch of expired holds."""
+    skip_locked = connection.features.has_select_for_update_skip_locked
+    with transaction.atomic():
+        rows = list(
+            expired_holds(now).order_by("hold_expires_at")
+            .select_for_update(skip_locked=skip_locked)
+            .values(*dict.fromkeys(EVENT_FIELDS + rollups.BOOKING_FIELDS))[:batch_size]
+        )
+        if not rows:
+            return [], []
+        payments = _payment_states(rows)
+        paid = [row for row in rows if payments.get(str(row["id"])) == "COMPLETED"]
+        paying = [row for row in rows if payments.get(str(row["id"])) == "PENDING"]
+        cancelled = [row for row in rows if str(row["id"]) not in payments]
+        if paid:
+            _set_status(paid, Booking.STATUS_CONFIRMED)
+        if paying:
+            Booking.objects.filter(pk__in=[row["id"] for row in paying]).update(hold_expires_at=hold_expiry(now))
+        if cancelled:
+            _set_status(cancelled, Booking.STATUS_CANCELED)
+            events = [{field: row[field] for field in EVENT_FIELDS} for row in cancelled]
+            transaction.on_commit(lambda: holds_expired.send(sender=Booking, bookings=events))
+    return rows, cancelled
+
+
+def expire_holds(batch_size=500, max_batches: Optional[int] = None, sleep=0.0, now=None) -> int:
+    """Cancel pending bookings whose hold expired before ``now``; returns how many."""
+    now = now or timezone.now()
+    expired = batches = 0
+    while max_batches is None or batches < max_batches:
+        rows, cancelled = _expire_batch(now, batch_size)
+        expired += len(cancelled)
+        batches += 1
+        if len(rows) < batch_size:
+            break
+        if sleep:
+            time.sleep(sleep)
+    if expired:
+        logger.info("Expired %s booking holds in %s batches", expired, batches)
+    return expired
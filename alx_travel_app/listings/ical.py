@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+iCal (RFC 5545) availability feeds for channel sync.
+
+Export: each listing's feed lists its live bookings (confirmed, or pending
+with an unexpired hold) from ``past_days`` ago onwards as all-day
+"Reserved" events. The rendered feed is cached with its ETag and render
+time under the listing's feed generation, which the booking signals (and
+holds_expired) bump when that listing's bookings change. A render that
+overlaps a change stores its feed under the old generation, where no
+poll looks, so it cannot outlive the invalidation. A poll is served from
+the cache with no queries, usually as a 304. Imported blocks are not exported again, so two
+platforms syncing with each other do not echo each other's events.
+
+Import: parse_events() reads another platform's feed and import_blocks()
+bulk-upserts its events as ExternalBlock rows keyed by (listing, source,
+uid) and deletes the blocks that disappeared from that feed.
+fetch_events() only fetches http(s) URLs whose host resolves to public
+addresses, connects to the address it checked (so a second DNS answer
+cannot point it elsewhere), does not follow redirects and stops reading
+after ``max_bytes``.
+
+Settings live in settings.ICAL_FEEDS.
+"""
+import hashlib
+import ipaddress
+import re
+import socket
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .conditional import make_etag
+from .lazy import lazy_import
+from .models import Booking, ExternalBlock, Listing
+
+# the HTTP client is only loaded when a remote feed is actually fetched
+requests = lazy_import("requests")
+
+CONTENT_TYPE = "text/calendar; charset=utf-8"
+FEED_CACHE_PREFIX = "ical:feed:"
+FEED_GENERATION_PREFIX = "ical:gen:"
+PRODID = "-//ALX Travel App//Availability//EN"
+MAX_LINE_OCTETS = 75
+
+_DATE_RE = re.compile(r"(\d{8})")
+
+
+class UnsafeFeedURL(ValueError):
+    """A feed URL that is not http(s), or whose host is not a public address."""
+
+
+class FeedTooLarge(ValueError):
+    """A remote feed larger than settings.ICAL_FEEDS["max_bytes"]."""
+
+
+def feed_cache_key(listing_id, generation) -> str:
+    return f"{FEED_CACHE_PREFIX}{listing_id}:{generation}"
+
+
+def _generation_key(listing_id) -> str:
+    return f"{FEED_GENERATION_PREFIX}{listing_id}"
+
+
+def _bump_generations(listing_ids) -> None:
+    for pk in listing_ids:
+        key = _generation_key(pk)
+        cache.add(key, 0, None)
+        try:
+            cache.incr(key)
+        except ValueError:  # evicted between add and incr
+            cache.set(key, 1, None)
+
+
+def invalidate_feeds(listing_ids: Iterable) -> None:
+    """
+    Move the listings' feeds to a new generation. Inside a transaction this
+    happens again on commit, so a feed rendered from the pre-commit rows in
+    between is not kept either.
+    """
+    listing_ids = {str(pk) for pk in listing_ids}
+    if not listing_ids:
+        return
+    _bump_generations(listing_ids)
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: _bump_generations(listing_ids))
+
+
+def _escape(text: str) -> str:
+    return (text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\r\n", "\\n").replace("\n", "\\n"))
+
+
+def _fold(line: str) -> str:
+    """Split a content line into CRLF + space continued chunks of at most 75 octets."""
+    encoded = line.encode()
+    if len(encoded) <= MAX_LINE_OCTETS:
+        return line
+    chunks, current, size = [], [], 0
+    for char in line:
+        width = len(char.encode())
+        if size + width > (MAX_LINE_OCTETS if not chunks else MAX_LINE_OCTETS - 1):
+            chunks.append("".join(current))
+            current, size = [], 0
+        current.append(char)
+        size += width
+    chunks.append("".join(current))
+    return "\r\n ".join(chunks)
+
+
+def render_feed(listing_id) -> Optional[bytes]:
+    """The listing's feed as bytes, or None if there is no such listing."""
+    title = Listing.objects.filter(pk=listing_id).values_list("title", flat=True).first()
+    if title is None:
+        return None
+    since = timezone.localdate() - timedelta(days=settings.ICAL_FEEDS["past_days"])
+    bookings = (
+        Booking.objects.filter(
+            Q(status=Booking.STATUS_CONFIRMED)
+            | Q(status=Booking.STATUS_PENDING, hold_expires_at__gt=timezone.now()),
+            listing_id=listing_id, end_date__gte=since,
+        ).order_by("start_date", "id").values_list("id", "start_date", "end_date", "created_at")
+    )
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{_escape(title)}",
+    ]
+    for pk, start, end, created_at in bookings:
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:{pk}@alx-travel-app",
+            # stable per booking so unchanged feeds render byte-identical
+            f"DTSTAMP:{created_at.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')}",
+            f"DTSTART;VALUE=DATE:{start:%Y%m%d}",
+            f"DTEND;VALUE=DATE:{end:%Y%m%d}",
+            "SUMMARY:Reserved",
+            "TRANSP:OPAQUE",
+            "END:VEVENT",
+        ]
+    lines.append("END:VCALENDAR")
+    return ("\r\n".join(_fold(line) for line in lines) + "\r\n").encode()
+
+
+def cached_feed(listing_id) -> Optional[Dict]:
+    """{"body", "etag", "last_modified"} for the listing's feed, or None if it does not exist."""
+    # read before rendering: a change during the render bumps it past this one
+    key = feed_cache_key(listing_id, cache.get(_generation_key(listing_id), 0))
+    feed = cache.get(key)
+    if feed is None:
+        body = render_feed(listing_id)
+        if body is None:
+            return None
+        feed = {
+            "body": body,
+            "etag": make_etag(listing_id, hashlib.sha1(body).hexdigest()),
+            "last_modified": timezone.now().replace(microsecond=0),
+        }
+        cache.set(key, feed, settings.ICAL_FEEDS["cache_timeout"])
+    return feed
+
+
+def _unfolded(text: str) -> List[str]:
+    lines = []
+    for raw in text.replace("\r\n", "\n").replace("\r", "\n").split("\n"):
+        if raw[:1] in (" ", "\t") and lines:
+            lines[-1] += raw[1:]
+        elif raw:
+            lines.append(raw)
+    return lines
+
+
+def _unescape(text: str) -> str:
+    return re.sub(r"\\([\\;,nN])", lambda m: "\n" if m.group(1) in "nN" else m.group(1), text)
+
+
+def _parse_date(value: str) -> Optional[date]:
+    # timed events keep their dates: a 11:00 checkout frees the night it falls on
+    match = _DATE_RE.match(value.strip())
+    return datetime.strptime(match.group(1), "%Y%m%d").date() if match else None
+
+
+def parse_events(text: str) -> List[Dict]:
+    """
+    VEVENTs of an iCal document as {"uid", "start_date", "end_date", "summary"}
+    dicts. Cancelled events and events without a UID or start are skipped; an
+    event without DTEND blocks one night.
+    """
+    events, current = [], None
+    for line in _unfolded(text):
+        name, _, value = line.partition(":")
+        name = name.partition(";")[0].upper()
+        if name == "BEGIN" and value.strip().upper() == "VEVENT":
+            current = {}
+        elif name == "END" and value.strip().upper() == "VEVENT" and current is not None:
+            start, end = current.get("start_date"), current.get("end_date")
+            if current.get("uid") and start and current.get("status") != "CANCELLED":
+                end = end if end and end > start else start + timedelta(days=1)
+                events.append({"uid": current["uid"][:255], "start_date": start, "end_date": end,
+                               "summary": current.get("summary", "")[:255]})
+            current = None
+        elif current is not None:
+            if name == "UID":
+                current["uid"] = value.strip()
+            elif name in ("DTSTART", "DTEND"):
+                current["start_date" if name == "DTSTART" else "end_date"] = _parse_date(value)
+            elif name == "SUMMARY":
+                current["summary"] = _unescape(value)
+            elif name == "STATUS":
+                current["status"] = value.strip().upper()
+    return events
+
+
+def import_blocks(listing_id, source: str, events: List[Dict], batch_size: int = 500) -> Dict[str, int]:
+    """
+    Make the listing's blocks from ``source`` match ``events``: upsert them
+    in bulk and delete the ones no longer in the feed.
+    """
+    # MySQL upserts on any unique key and rejects an explicit conflict target
+    target = ["listing", "source", "uid"] if connection.features.supports_update_conflicts_with_target else None
+    events = list({event["uid"]: event for event in events}.values())
+    with transaction.atomic():
+        ExternalBlock.objects.bulk_create(
+            [ExternalBlock(listing_id=listing_id, source=source, **event) for event in events],
+            batch_size=batch_size, update_conflicts=True, unique_fields=target,
+            update_fields=["start_date", "end_date", "summary", "updated_at"],
+        )
+        removed, _ = (ExternalBlock.objects.filter(listing_id=listing_id, source=source)
+                      .exclude(uid__in=[event["uid"] for event in events]).delete())
+    return {"upserted": len(events), "removed": removed}
+
+
+def check_feed_url(url: str) -> str:
+    """
+    The address to fetch ``url`` from: one its host resolves to. Raises
+    UnsafeFeedURL unless the scheme is http(s) and every address is public.
+    """
+    parts = urlsplit(url)
+    try:
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+    except ValueError:
+        raise UnsafeFeedURL(f"invalid port in {url!r}")
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise UnsafeFeedURL("only http(s) URLs with a host can be imported")
+    try:
+        addresses = [info[4][0] for info in socket.getaddrinfo(parts.hostname, port, type=socket.SOCK_STREAM)]
+    except (socket.gaierror, UnicodeError):
+        raise UnsafeFeedURL(f"cannot resolve {parts.hostname!r}")
+    for address in addresses:
+        ip = ipaddress.ip_address(address.partition("%")[0])
+        # covers private, loopback, link-local, reserved and unspecified ranges
+        if not ip.is_global or ip.is_multicast:
+            raise UnsafeFeedURL(f"{parts.hostname!r} resolves to a non-public address")
+    if not addresses:
+        raise UnsafeFeedURL(f"cannot resolve {parts.hostname!r}")
+    return addresses[0]
+
+
+def _pinned_session(hostname: str):
+    """A session whose TLS handshake and certificate check use ``hostname`` while it connects by address."""
+
+    class PinnedAdapter(requests.adapters.HTTPAdapter):
+        def init_poolmanager(self, *args, **kwargs):
+            kwargs.update(server_hostname=hostname, assert_hostname=hostname)
+            super().init_poolmanager(*args, **kwargs)
+
+    session = requests.Session()
+    session.trust_env = False  # a proxy would resolve the host again
+    session.mount("https://", PinnedAdapter())
+    return session
+
+
+def fetch_events(url: str) -> List[Dict]:
+    """Download and parse a remote iCal feed (see the module docstring for the limits)."""
+    address = check_feed_url(url)
+    parts = urlsplit(url)
+    host = f"[{address}]" if ":" in address else address
+    netloc = f"{host}:{parts.port}" if parts.port else host
+    max_bytes = settings.ICAL_FEEDS["max_bytes"]
+    with _pinned_session(parts.hostname) as session:
+        response = session.get(
+            urlunsplit((parts.scheme, netloc, parts.path or "/", parts.query, "")),
+            headers={"Host": parts.netloc.rpartition("@")[2]},
+            timeout=settings.ICAL_FEEDS["fetch_timeout"], allow_redirects=False, stream=True,
+        )
+        with response:
+            if response.is_redirect:
+                raise UnsafeFeedURL(f"{url} redirects to {response.headers.get('Location')!r}; not followed")
+            response.raise_for_status()
+            body = bytearray()
+            for chunk in response.iter_content(64 * 1024):
+                body += chunk
+                if len(body) > max_bytes:
+                    raise FeedTooLarge(f"{url} is larger than {max_bytes} bytes")
+    return parse_events(body.decode(response.encoding or "utf-8", errors="replace"))
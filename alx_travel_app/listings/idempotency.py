@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Idempotency-Key support for create endpoints.
+
+A client that sends the same ``Idempotency-Key`` header twice gets the
+first response replayed instead of a second Payment/Booking (and a second
+upstream call). State lives in the default cache (Redis in production):
+
+  idem:<scope>:<user>:<key>:lock    held while the first request runs
+  idem:<scope>:<user>:<key>:result  stored response, kept for IDEMPOTENCY_TTL
+
+A duplicate that arrives while the first request is still running waits for
+its result rather than redoing the work. Responses with a 5xx status are not
+stored, so a retry after an upstream failure is processed again.
+
+Keys are scoped to the authenticated user. Anonymous callers have nothing
+that tells them apart, so two of them picking the same key would get each
+other's responses; a key on an anonymous request is rejected with 400.
+"""
+import hashlib
+import json
+import logging
+import time
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "HTTP_IDEMPOTENCY_KEY"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+POLL_INITIAL = 0.05
+POLL_MAX = 0.5
+
+
+def _fingerprint(request) -> str:
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(f"{request.method}:{request.path}:{body}".encode()).hexdigest()
+
+
+def _base_key(scope, request, key) -> str:
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return f"idem:{scope}:{request.user.pk}:{digest}"
+
+
+def _replay(stored, fingerprint):
+    if stored["fingerprint"] != fingerprint:
+        return Response(
+            {"detail": "Idempotency-Key was already used with a different request body"},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    return Response(stored["data"], status=stored["status"], headers={REPLAYED_HEADER: "true"})
+
+
+def idempotent(scope: str):
+    """
+    Decorator for APIView/ViewSet handler methods that honours the
+    Idempotency-Key request header. Requests without the header are
+    handled normally.
+    """
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(self, request, *args, **kwargs):
+            key = request.META.get(IDEMPOTENCY_HEADER)
+            if not key:
+                return handler(self, request, *args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return Response({"detail": "Idempotency-Key is too long"}, status=status.HTTP_400_BAD_REQUEST)
+            if not (request.user and request.user.is_authenticated):
+                return Response({"detail": "Idempotency-Key needs an authenticated request"},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            base = _base_key(scope, request, key)
+            lock_key, result_key = f"{base}:lock", f"{base}:result"
+            fingerprint = _fingerprint(request)
+            token = uuid.uuid4().hex
+            deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_TIMEOUT
+            delay = POLL_INITIAL
+
+            while True:
+                stored = cache.get(result_key)
+                if stored is not None:
+                    return _replay(stored, fingerprint)
+                if cache.add(lock_key, token, settings.IDEMPOTENCY_LOCK_TTL):
+                    break
+                # Another request with this key is in flight: wait for its result.
+                if time.monotonic() >= deadline:
+                    return Response(
+                        {"detail": "A request with this Idempotency-Key is still in progress"},
+                        status=status.HTTP_409_CONFLICT,
+                        headers={"Retry-After": "1"},
+                    )
+                time.sleep(delay)
+                delay = min(delay * 2, POLL_MAX)
+
+            try:
+                # Re-check: the holder may have stored its result between our
+                # last read and acquiring the lock.
+                stored = cache.get(result_key)
+                if stored is not None:
+                    return _replay(stored, fingerprint)
+                response = handler(self, request, *args, **kwargs)
+                if response.status_code < 500:
+                    cache.set(
+                        result_key,
+                        {"fingerprint": fingerprint, "status": response.status_code, "data": response.data},
+                        settings.IDEMPOTENCY_TTL,
+                    )
+                return response
+            finally:
+                if cache.get(lock_key) == token:
+                    cache.delete(lock_key)
+
+        return wrapper
+    return decorator
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Deferred imports for heavy optional modules.
+
+``np = lazy_import("numpy")`` binds a module object whose code only runs on
+first attribute access, so importing a module that uses NumPy does not slow
+down process startup for code paths that never touch it.
+
+The first access imports the real module under a lock and copies its
+namespace into the stand-in, so threads that touch it at the same time
+(gthread workers, thread pools) all see a fully loaded module. The stand-in
+is not put in sys.modules; ``import numpy`` elsewhere gets the real module.
+"""
+import importlib
+import importlib.util
+import sys
+import threading
+import types
+
+_load_lock = threading.RLock()
+
+
+class _LazyModule(types.ModuleType):
+    """Stand-in for a module that is imported on first attribute access."""
+
+    def __getattr__(self, attr):
+        # only reached for names not (yet) copied from the real module
+        with _load_lock:
+            module = importlib.import_module(self.__name__)
+            if not self.__dict__.get("_lazy_loaded"):
+                self.__dict__.update(module.__dict__)
+                self.__dict__["_lazy_loaded"] = True
+        return getattr(module, attr)
+
+
+def lazy_import(name):
+    """Return ``name`` from sys.modules, or a module that loads on first use."""
+    if name in sys.modules:
+        return sys.modules[name]
+    if importlib.util.find_spec(name) is None:
+        raise ImportError(f"No module named {name!r}")
+    return _LazyModule(name)
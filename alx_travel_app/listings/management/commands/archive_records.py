@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Django management command to archive old payments and bookings.
+
+Moves finished payments and past bookings older than the retention window
+(settings.ARCHIVE_RETENTION_DAYS) to the archive tables in small batches,
+and prints table/index sizes before and after.
+
+Usage:
+    python manage.py archive_records --dry-run
+    python manage.py archive_records --batch-size 500 --sleep 0.1 --optimize
+"""
+from django.core.management.base import BaseCommand
+
+from listings import archive
+from listings.models import ArchivedBooking, ArchivedPayment
+
+
+def _mb(value):
+    return "-" if value is None else f"{value / (1024 * 1024):.2f}"
+
+
+class Command(BaseCommand):
+    """Move old rows to ArchivedPayment / ArchivedBooking and report sizes."""
+
+    help = "Archive finished payments and past bookings older than the retention window"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--only", choices=["payments", "bookings"])
+        parser.add_argument("--payments-days", type=int, help="Override payment retention (days)")
+        parser.add_argument("--bookings-days", type=int, help="Override booking retention (days)")
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--sleep", type=float, default=0.0, help="Pause between batches (seconds)")
+        parser.add_argument("--dry-run", action="store_true", help="Only count what would be moved")
+        parser.add_argument("--optimize", action="store_true",
+                            help="Reclaim freed space afterwards (OPTIMIZE TABLE / VACUUM)")
+
+    def _report(self, title):
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        self.stdout.write(f"  {'table':<28}{'rows':>12}{'data MB':>12}{'index MB':>12}")
+        for row in archive.table_sizes():
+            rows = "-" if row["rows"] is None else row["rows"]
+            self.stdout.write(
+                f"  {row['table']:<28}{rows:>12}{_mb(row['data_bytes']):>12}{_mb(row['index_bytes']):>12}"
+            )
+
+    def handle(self, *args, **options) -> None:
+        jobs = [
+            ("payments", archive.payments_to_archive(options["payments_days"]), ArchivedPayment),
+            ("bookings", archive.bookings_to_archive(options["bookings_days"]), ArchivedBooking),
+        ]
+        jobs = [job for job in jobs if options["only"] in (None, job[0])]
+
+        if options["dry_run"]:
+            for name, queryset, _ in jobs:
+                self.stdout.write(f"{name}: {queryset.count()} rows would be archived")
+            return
+
+        self._report("Before")
+        for name, queryset, archive_model in jobs:
+            moved = archive.move_batches(queryset, archive_model, batch_size=options["batch_size"],
+                                         sleep=options["sleep"])
+            self.stdout.write(self.style.SUCCESS(f"Archived {moved} {name}."))
+        if options["optimize"]:
+            archive.reclaim_space()
+        self._report("After")
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Django management command to backfill the daily booking/payment rollups.
+
+By default the whole history (first booking or payment up to the last
+booked night) is rebuilt by the chunked backfill_rollups Celery task;
+``--sync`` runs the same chunks in this process instead.
+
+Usage:
+    python manage.py backfill_rollups
+    python manage.py backfill_rollups --start 2025-01-01 --end 2025-07-01 --sync
+"""
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from listings.models import Booking, Payment
+from listings.rollups import rebuild
+from listings.tasks import backfill_rollups
+
+
+def _history_range():
+    bookings = Booking.objects.aggregate(first=Min("created_at"), first_stay=Min("start_date"),
+                                         last_stay=Max("end_date"))
+    first_payment = Payment.objects.aggregate(first=Min("created_at"))["first"]
+    starts = [timezone.localdate(value) for value in (bookings["first"], first_payment) if value]
+    if bookings["first_stay"]:
+        starts.append(bookings["first_stay"])
+    ends = [timezone.localdate() + timedelta(days=1)]
+    if bookings["last_stay"]:
+        ends.append(bookings["last_stay"])
+    return (min(starts) if starts else None), max(ends)
+
+
+class Command(BaseCommand):
+    """Rebuild ListingDailyStats and PaymentDailyStats from the raw tables."""
+
+    help = "Backfill daily booking and payment rollups (chunked Celery job, or --sync)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", type=date.fromisoformat, help="First day (default: start of history)")
+        parser.add_argument("--end", type=date.fromisoformat, help="Day after the last day (default: end of history)")
+        parser.add_argument("--chunk-days", type=int, default=settings.ROLLUP_BACKFILL_CHUNK_DAYS)
+        parser.add_argument("--sync", action="store_true", help="Run in this process instead of Celery")
+
+    def handle(self, *args, **options) -> None:
+        first, last = _history_range()
+        start = options["start"] or first
+        end = options["end"] or last
+        if start is None:
+            self.stdout.write(self.style.NOTICE("No bookings or payments to roll up."))
+            return
+        if end <= start:
+            raise CommandError("--end must be after --start")
+
+        chunk = max(1, options["chunk_days"])
+        if not options["sync"]:
+            backfill_rollups.delay(start.isoformat(), end.isoformat(), chunk)
+            self.stdout.write(self.style.SUCCESS(f"Queued rollup backfill for {start}..{end} in {chunk}-day chunks."))
+            return
+
+        day = start
+        while day < end:
+            chunk_end = min(day + timedelta(days=chunk), end)
+            written = rebuild(day, chunk_end)
+            self.stdout.write(f"{day}..{chunk_end}: {written['listing_days']} listing-days, "
+                              f"{written['payment_days']} payment-days")
+            day = chunk_end
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt rollups for {start}..{end}."))
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark task publishing against the configured broker: an apply_async
+loop (what .delay() does per call) versus listings.fanout.fan_out() over one
+pooled producer, with and without chunking. Messages go to a scratch queue
+that no worker consumes and that is purged after each run.
+
+Usage:
+    python manage.py bench_fanout --calls 5000 --chunk-size 50
+    CELERY_BROKER_URL=memory:// python manage.py bench_fanout
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from alx_travel_app.celery import app, debug_task
+from listings.fanout import fan_out, queue_depth
+
+
+class Command(BaseCommand):
+    """Compare messages/sec of .delay-style loops and fan_out()."""
+
+    help = "Benchmark batched task publishing against per-call apply_async"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--calls", type=int, default=5000)
+        parser.add_argument("--chunk-size", type=int, default=50)
+        parser.add_argument("--queue", default="fanout-bench")
+
+    def _purge(self, queue):
+        with app.connection_for_write() as connection:
+            connection.default_channel.queue_purge(queue)
+
+    def _run(self, label, publish, calls, queue):
+        start = time.perf_counter()
+        messages = publish()
+        elapsed = time.perf_counter() - start
+        depth = queue_depth(queue)
+        self._purge(queue)
+        self.stdout.write(f"{label:<32}{messages:>9}{depth:>9}{elapsed:>9.2f}"
+                          f"{messages / elapsed:>12.0f}{calls / elapsed:>12.0f}")
+
+    def handle(self, *args, **options) -> None:
+        if app.conf.task_always_eager:
+            raise CommandError("CELERY_TASK_ALWAYS_EAGER is set; nothing would be published")
+        calls, queue, chunk_size = options["calls"], options["queue"], options["chunk_size"]
+        arguments = [()] * calls
+        no_backpressure = {"max_queue_depth": 0}
+
+        def naive():
+            for _ in range(calls):
+                debug_task.apply_async(queue=queue)
+            return calls
+
+        self.stdout.write(f"broker: {app.connection_for_write().as_uri()}")
+        self.stdout.write(f"{'mode':<32}{'messages':>9}{'queued':>9}{'seconds':>9}"
+                          f"{'msgs/s':>12}{'calls/s':>12}")
+        with app.connection_for_write() as connection:
+            connection.default_channel.queue_declare(queue=queue, durable=True, auto_delete=False)
+        self._run(".delay() loop", naive, calls, queue)
+        self._run("fan_out, pooled producer",
+                  lambda: fan_out(debug_task, arguments, chunk_size=1, queue=queue, fanout=no_backpressure),
+                  calls, queue)
+        self._run(f"fan_out, chunks of {chunk_size}",
+                  lambda: fan_out(debug_task, arguments, chunk_size=chunk_size, queue=queue,
+                                  fanout=no_backpressure),
+                  calls, queue)
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark indexed listing search against an icontains scan on a synthetic
+dataset. The dataset is created inside a transaction that is rolled back
+unless --keep is given.
+
+Usage:
+    python manage.py bench_search --listings 20000
+"""
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from listings.search import naive_search, rebuild_index, search
+from listings.synthetic import create_listings, landmark_names
+
+# Common words (every feature appears in a large share of listings), rare
+# words (one made-up landmark out of thousands) and a query with no hits.
+QUERIES = [
+    "pool",
+    "cozy villa",
+    "beach bung",
+    "quiet cabin fireplace",
+    "loft downtown wifi",
+    landmark_names(seed=42)[7],
+    f"villa {landmark_names(seed=42)[99][:5]}",
+    "zzyzx",
+]
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    """Compare indexed search with a naive icontains scan."""
+
+    help = "Benchmark listing keyword search on a synthetic dataset"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--listings", type=int, default=20000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--keep", action="store_true", help="Keep the synthetic listings")
+
+    def handle(self, *args, **options) -> None:
+        try:
+            with transaction.atomic():
+                self._run(options)
+                if not options["keep"]:
+                    raise Rollback
+        except Rollback:
+            self.stdout.write(self.style.NOTICE("Synthetic data rolled back."))
+
+    def _time(self, fn, repeat):
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - start) * 1000)
+        return statistics.median(samples)
+
+    def _run(self, options):
+        count = options["listings"]
+        start = time.perf_counter()
+        create_listings(count, seed=42)
+        self.stdout.write(f"Created {count} listings in {time.perf_counter() - start:.1f}s")
+
+        start = time.perf_counter()
+        rebuild_index()
+        self.stdout.write(f"Built search index in {time.perf_counter() - start:.1f}s")
+
+        # The icontains baseline is unranked and stops at the first 20 hits,
+        # so it is a lower bound for what a ranked scan would cost.
+        self.stdout.write(f"{'query':<28}{'icontains ms':>14}{'indexed ms':>12}{'speedup':>9}")
+        for query in QUERIES:
+            naive_ms = self._time(lambda: naive_search(query, limit=20), options["repeat"])
+            indexed_ms = self._time(lambda: search(query, limit=20), options["repeat"])
+            self.stdout.write(
+                f"{query:<28}{naive_ms:>14.2f}{indexed_ms:>12.2f}{naive_ms / max(indexed_ms, 1e-6):>8.1f}x"
+            )
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark the read serialization paths on a synthetic dataset:
+ModelSerializer + JSONRenderer (model instances) against the compiled
+serializer + FastJSONRenderer (values() rows). Both outputs are decoded
+and compared before timing. The dataset is created inside a transaction
+that is rolled back unless --keep is given.
+
+Usage:
+    python manage.py bench_serializers --rows 5000
+"""
+import json
+import random
+import statistics
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from listings.fast_serializers import compile_serializer
+from listings.models import Booking, Listing, Payment
+from listings.renderers import FastJSONRenderer
+from listings.serializers import BookingSerializer, ListingSerializer, PaymentSerializer
+from listings.synthetic import create_listings, get_or_create_host
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    """Compare DRF and compiled serialization of listings, bookings and payments."""
+
+    help = "Benchmark ModelSerializer/JSONRenderer against the compiled fast path"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=5000, help="Rows per model")
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--keep", action="store_true", help="Keep the synthetic rows")
+
+    def handle(self, *args, **options) -> None:
+        try:
+            with transaction.atomic():
+                self._run(options)
+                if not options["keep"]:
+                    raise Rollback
+        except Rollback:
+            self.stdout.write(self.style.NOTICE("Synthetic data rolled back."))
+
+    def _time(self, fn, repeat):
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - start) * 1000)
+        return statistics.median(samples)
+
+    def _create(self, count):
+        rng = random.Random(42)
+        host = get_or_create_host()
+        listings = create_listings(count, host=host, seed=42)
+        today = date.today()
+        bookings = []
+        for listing in listings:
+            start = today + timedelta(days=rng.randint(-90, 90))
+            bookings.append(Booking(
+                listing=listing, guest=host, start_date=start,
+                end_date=start + timedelta(days=rng.randint(1, 14)),
+                total_price=Decimal(rng.randint(5000, 90000)) / 100,
+                status=rng.choice([Booking.STATUS_PENDING, Booking.STATUS_CONFIRMED]),
+            ))
+        Booking.objects.bulk_create(bookings, batch_size=1000)
+        Payment.objects.bulk_create([
+            Payment(user=host, booking_reference=str(booking.id), amount=booking.total_price,
+                    tx_ref=f"bench-{booking.id}", status=rng.choice(["PENDING", "COMPLETED"]),
+                    metadata={"checkout_url": "https://checkout.example/" + str(booking.id)})
+            for booking in bookings
+        ], batch_size=1000)
+
+    def _run(self, options):
+        count, repeat = options["rows"], options["repeat"]
+        start = time.perf_counter()
+        self._create(count)
+        self.stdout.write(f"Created {count} listings, bookings and payments in "
+                          f"{time.perf_counter() - start:.1f}s")
+
+        cases = [
+            ("listings", Listing.objects.order_by("-created_at"), ListingSerializer),
+            ("bookings", Booking.objects.order_by("-created_at"), BookingSerializer),
+            ("payments", Payment.objects.order_by("-created_at"), PaymentSerializer),
+        ]
+        drf_renderer, fast_renderer = JSONRenderer(), FastJSONRenderer()
+        self.stdout.write(f"{'model':<10}{'rows':>7}{'drf ms':>10}{'fast ms':>10}"
+                          f"{'speedup':>9}{'render drf':>12}{'render fast':>13}")
+        for name, queryset, serializer_class in cases:
+            compiled = compile_serializer(serializer_class())
+            if compiled is None:
+                raise CommandError(f"{serializer_class.__name__} cannot be compiled")
+
+            def drf():
+                return drf_renderer.render(serializer_class(list(queryset), many=True).data)
+
+            def fast():
+                return fast_renderer.render(compiled.many(queryset.values(*compiled.columns)))
+
+            expected, actual = drf(), fast()
+            if json.loads(expected) != json.loads(actual):
+                raise CommandError(f"{name}: fast path output differs from DRF")
+
+            data = serializer_class(list(queryset), many=True).data
+            rows = compiled.many(queryset.values(*compiled.columns))
+            drf_ms, fast_ms = self._time(drf, repeat), self._time(fast, repeat)
+            render_drf = self._time(lambda: drf_renderer.render(data), repeat)
+            render_fast = self._time(lambda: fast_renderer.render(rows), repeat)
+            self.stdout.write(
+                f"{name:<10}{len(rows):>7}{drf_ms:>10.1f}{fast_ms:>10.1f}"
+                f"{drf_ms / max(fast_ms, 1e-6):>8.1f}x{render_drf:>12.1f}{render_fast:>13.1f}"
+            )
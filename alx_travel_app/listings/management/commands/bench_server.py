@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Compare gunicorn server profiles: memory per worker and requests/sec.
+
+Each profile starts gunicorn with deploy/gunicorn.conf.py on a local port,
+sends --requests GETs to --path from --concurrency client threads (after a
+warm-up pass), then reads every worker's memory from /proc/<pid>/smaps_rollup
+(Linux only):
+
+  rss   resident pages, shared ones included
+  pss   resident pages, shared ones split between the processes sharing them
+  uss   pages only this worker has (private), what one more worker costs
+
+Profiles:
+  classic   sync workers, each loading the app itself (the old supervisord line)
+  preload   sync workers forked from a preloaded, warmed-up, gc.freeze()d master
+  threaded  the preload profile with gthread workers (--threads each)
+
+Usage:
+    python manage.py bench_server
+    python manage.py bench_server --workers 4 --threads 8 --concurrency 32 --requests 5000
+    python manage.py bench_server --profiles preload,threaded --path "/api/listings/api/listings/?limit=50"
+"""
+import http.client
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+CONFIG = Path(settings.BASE_DIR) / "deploy" / "gunicorn.conf.py"
+
+PROFILES = {
+    "classic": {"GUNICORN_PRELOAD": "0", "GUNICORN_WORKER_CLASS": "sync"},
+    "preload": {"GUNICORN_PRELOAD": "1", "GUNICORN_WORKER_CLASS": "sync"},
+    "threaded": {"GUNICORN_PRELOAD": "1", "GUNICORN_WORKER_CLASS": "gthread"},
+}
+
+
+def _children(pid):
+    found = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as stat:
+                # the command name may contain spaces; ppid follows its closing parenthesis
+                ppid = int(stat.read().rpartition(")")[2].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            found.append(int(entry))
+    return found
+
+
+def _memory_kb(pid):
+    """{"rss", "pss", "uss"} in kB for a process."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as rollup:
+        for line in rollup:
+            name, _, rest = line.partition(":")
+            if rest.strip().endswith("kB"):
+                values[name] = int(rest.split()[0])
+    return {"rss": values.get("Rss", 0), "pss": values.get("Pss", 0),
+            "uss": values.get("Private_Clean", 0) + values.get("Private_Dirty", 0)}
+
+
+class Command(BaseCommand):
+    """Start each gunicorn profile, load it, and print memory and throughput."""
+
+    help = "Compare memory per worker and requests/sec of gunicorn profiles"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--profiles", default="classic,preload,threaded")
+        parser.add_argument("--workers", type=int, default=2)
+        parser.add_argument("--threads", type=int, default=4)
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument("--path", default="/api/listings/api/listings/?limit=20")
+        parser.add_argument("--port", type=int, default=8011)
+        parser.add_argument("--startup-timeout", type=float, default=60.0)
+
+    def _get(self, port, path):
+        start = time.perf_counter()
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        try:
+            connection.request("GET", path, headers={"Accept": "application/json"})
+            response = connection.getresponse()
+            response.read()
+            return response.status, time.perf_counter() - start
+        finally:
+            connection.close()
+
+    def _wait_until_up(self, process, port, path, timeout):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(f"gunicorn exited with status {process.returncode}")
+            try:
+                self._get(port, path)
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f"gunicorn did not answer on port {port} within {timeout:.0f}s")
+
+    def _load(self, port, path, requests, concurrency):
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            start = time.perf_counter()
+            results = list(pool.map(lambda _: self._get(port, path), range(requests)))
+            elapsed = time.perf_counter() - start
+        latencies = sorted(latency for _, latency in results)
+        errors = sum(1 for status, _ in results if status >= 400)
+        return {
+            "rps": requests / elapsed,
+            "p50": statistics.median(latencies) * 1000,
+            "p95": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+            "errors": errors,
+        }
+
+    def _run(self, name, options):
+        env = {**os.environ, **PROFILES[name], "WEB_CONCURRENCY": str(options["workers"]),
+               "GUNICORN_THREADS": str(options["threads"]), "GUNICORN_MAX_REQUESTS": "0"}
+        command = [sys.executable, "-m", "gunicorn", "alx_travel_app.wsgi:application", "-c", str(CONFIG),
+                   "-b", f"127.0.0.1:{options['port']}", "--log-level", "warning"]
+        process = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env)
+        try:
+            started = time.perf_counter()
+            self._wait_until_up(process, options["port"], options["path"], options["startup_timeout"])
+            startup = time.perf_counter() - started
+            # touch every worker's code paths before measuring
+            self._load(options["port"], options["path"], max(options["requests"] // 10, options["workers"] * 4),
+                       options["concurrency"])
+            result = self._load(options["port"], options["path"], options["requests"], options["concurrency"])
+            workers = [_memory_kb(pid) for pid in _children(process.pid)]
+            master = _memory_kb(process.pid)
+        finally:
+            process.send_signal(signal.SIGTERM)
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        count = max(len(workers), 1)
+        result.update(
+            startup=startup,
+            workers=len(workers),
+            rss=sum(w["rss"] for w in workers) / count / 1024,
+            pss=sum(w["pss"] for w in workers) / count / 1024,
+            uss=sum(w["uss"] for w in workers) / count / 1024,
+            total_pss=(master["pss"] + sum(w["pss"] for w in workers)) / 1024,
+        )
+        return result
+
+    def handle(self, *args, **options) -> None:
+        if not Path("/proc/self/smaps_rollup").exists():
+            raise CommandError("Memory is read from /proc/<pid>/smaps_rollup, which needs Linux 4.14+")
+        names = [name.strip() for name in options["profiles"].split(",") if name.strip()]
+        unknown = set(names) - set(PROFILES)
+        if unknown:
+            raise CommandError(f"Unknown profiles: {', '.join(sorted(unknown))} (choose from {', '.join(PROFILES)})")
+
+        self.stdout.write(f"{options['workers']} workers, {options['threads']} threads per gthread worker, "
+                          f"{options['requests']} x GET {options['path']} from {options['concurrency']} clients")
+        self.stdout.write(f"{'profile':<10}{'start s':>8}{'rss MB':>9}{'pss MB':>9}{'uss MB':>9}"
+                          f"{'total MB':>10}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'errors':>8}")
+        for name in names:
+            r = self._run(name, options)
+            self.stdout.write(f"{name:<10}{r['startup']:>8.1f}{r['rss']:>9.1f}{r['pss']:>9.1f}{r['uss']:>9.1f}"
+                              f"{r['total_pss']:>10.1f}{r['rps']:>9.0f}{r['p50']:>9.1f}{r['p95']:>9.1f}"
+                              f"{r['errors']:>8}")
+        self.stdout.write("rss/pss/uss are per worker; total is the pss of the master and all workers")
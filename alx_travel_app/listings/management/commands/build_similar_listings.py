@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Django management command to (re)build the "similar listings" table.
+
+Runs listings.similar.refresh() in the foreground and prints the time spent
+loading features, selecting rows, computing distances and writing results.
+
+Usage:
+    python manage.py build_similar_listings --full
+    python manage.py build_similar_listings --k 20 --block-size 512
+"""
+from django.core.management.base import BaseCommand
+
+from listings import similar
+from listings.models import ListingNeighbor
+
+
+class Command(BaseCommand):
+    """Recompute nearest-neighbour listings and report phase timings."""
+
+    help = "Recompute precomputed similar listings (changed listings only unless --full)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Recompute every listing")
+        parser.add_argument("--k", type=int, help="Neighbours per listing (default: settings)")
+        parser.add_argument("--block-size", type=int, help="Rows per distance block (default: settings)")
+
+    def handle(self, *args, **options) -> None:
+        timings = {}
+        refreshed = similar.refresh(full=options["full"], k=options["k"], block_size=options["block_size"],
+                                    timings=timings)
+        for phase, seconds in timings.items():
+            self.stdout.write(f"  {phase:<10}{seconds:>9.3f}s")
+        self.stdout.write(self.style.SUCCESS(
+            f"Recomputed {refreshed} listings in {sum(timings.values()):.3f}s; "
+            f"{ListingNeighbor.objects.count()} neighbour rows."
+        ))
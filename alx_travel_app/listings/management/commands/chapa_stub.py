@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Django management command to run a fault-injecting Chapa stub server.
+
+Usage:
+    python manage.py chapa_stub --port 8765 --error-rate 0.3 --latency 1.5
+    CHAPA_BASE_URL=http://127.0.0.1:8765 python manage.py runserver
+"""
+from django.core.management.base import BaseCommand
+
+from listings.chapa_stub import make_stub_server
+
+
+class Command(BaseCommand):
+    """Serve a local Chapa stand-in with configurable errors and latency."""
+
+    help = "Run a local Chapa API stub with fault injection"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--error-rate", type=float, default=0.0)
+        parser.add_argument("--latency", type=float, default=0.0)
+        parser.add_argument("--status", type=int, default=503, help="HTTP status for injected errors")
+
+    def handle(self, *args, **options) -> None:
+        server = make_stub_server(
+            host=options["host"], port=options["port"],
+            error_rate=options["error_rate"], latency=options["latency"], status=options["status"],
+        )
+        host, port = server.server_address[:2]
+        self.stdout.write(self.style.SUCCESS(f"Chapa stub listening on http://{host}:{port} (Ctrl+C to stop)"))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
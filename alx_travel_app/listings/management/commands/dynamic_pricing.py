@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Django management command to run the dynamic pricing job in the foreground.
+
+Computes nightly price multipliers for every listing (listings/dynamic_pricing.py),
+stores them unless --dry-run, and prints a summary and per-phase timings.
+
+Usage:
+    python manage.py dynamic_pricing --dry-run
+    python manage.py dynamic_pricing --horizon-days 90 --batch-size 500
+"""
+from django.core.management.base import BaseCommand
+
+from listings import dynamic_pricing
+
+
+class Command(BaseCommand):
+    """Recompute nightly price multipliers and report timings."""
+
+    help = "Recompute occupancy-driven nightly price multipliers for all listings"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Compute and report, write nothing")
+        parser.add_argument("--horizon-days", type=int, help="Nights ahead (default: settings)")
+        parser.add_argument("--batch-size", type=int, help="Listings per upsert (default: settings)")
+
+    def handle(self, *args, **options) -> None:
+        overrides = {key: options[key] for key in ("horizon_days", "batch_size") if options[key]}
+        timings = {}
+        summary = dynamic_pricing.run(dry_run=options["dry_run"], timings=timings, **overrides)
+
+        self.stdout.write(
+            f"{summary['listings']} listings, {summary['nights']} listing-nights: "
+            f"{summary['raised']} raised, {summary['lowered']} lowered; multiplier "
+            f"min {summary['min']:.2f} / mean {summary['mean']:.3f} / max {summary['max']:.2f}"
+        )
+        for phase, seconds in timings.items():
+            self.stdout.write(f"  {phase:<10}{seconds:>9.3f}s")
+        if summary["dry_run"]:
+            self.stdout.write(self.style.WARNING("Dry run: nothing written."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Wrote multipliers for {summary['written']} listings."))
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Django management command to import an external iCal feed as blocked dates.
+
+Usage:
+    python manage.py import_ical <listing-id> https://example.com/calendar.ics
+    python manage.py import_ical <listing-id> ./export.ics --source other-platform
+"""
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from listings import ical
+from listings.models import Listing
+
+
+class Command(BaseCommand):
+    """Sync a listing's ExternalBlock rows with an iCal feed (URL or file)."""
+
+    help = "Import an iCal feed (URL or file) as a listing's blocked dates"
+
+    def add_arguments(self, parser):
+        parser.add_argument("listing")
+        parser.add_argument("feed", help="http(s) URL or path of an .ics file")
+        parser.add_argument("--source", help="Name of the feed (default: the URL or path)")
+
+    def handle(self, *args, **options) -> None:
+        if not Listing.objects.filter(pk=options["listing"]).exists():
+            raise CommandError(f"No listing {options['listing']}")
+        feed = options["feed"]
+        if feed.startswith(("http://", "https://")):
+            try:
+                events = ical.fetch_events(feed)
+            except (ical.UnsafeFeedURL, ical.FeedTooLarge) as exc:
+                raise CommandError(str(exc))
+        else:
+            events = ical.parse_events(Path(feed).read_text())
+        result = ical.import_blocks(options["listing"], options["source"] or feed, events)
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['upserted']} blocks imported, {result['removed']} removed."
+        ))
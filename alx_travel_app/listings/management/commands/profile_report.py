@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Django management command to aggregate stored profiles.
+
+Merges the profiles written by listings/profiling.py into one collapsed
+stack file (input for flamegraph.pl or speedscope) and prints the top-N
+hotspots. Sampled profiles are ranked by self and total samples, and
+cProfile profiles by tottime.
+
+Usage:
+    python manage.py profile_report --token
+    python manage.py profile_report --label 'view.*search' --top 20 --output search.collapsed
+"""
+import fnmatch
+import io
+import os
+import pstats
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from listings.profiling import COLLAPSED_EXT, PSTATS_EXT, get_config, make_token
+
+
+def read_collapsed(path, into):
+    with open(path) as fh:
+        for line in fh:
+            stack, _, count = line.rstrip("\n").rpartition(" ")
+            if stack and count.isdigit():
+                into[stack] += int(count)
+
+
+class Command(BaseCommand):
+    """Aggregate stored profiles into collapsed stacks and hotspots."""
+
+    help = "Aggregate stored profiles into flame-graph-ready collapsed stacks and top-N hotspots"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dir", help="Profile directory (default: settings.PROFILING['dir'])")
+        parser.add_argument("--label", default="*",
+                            help="Glob on the profile label, e.g. 'view.*' or 'task.listings.tasks.*'")
+        parser.add_argument("--top", type=int, default=20)
+        parser.add_argument("--output", help="Write merged collapsed stacks to this file")
+        parser.add_argument("--token", action="store_true",
+                            help="Print a signed X-Profile header value and exit")
+
+    def handle(self, *args, **options) -> None:
+        if options["token"]:
+            self.stdout.write(make_token())
+            return
+
+        directory = options["dir"] or get_config().get("dir")
+        if not directory or not os.path.isdir(directory):
+            raise CommandError(f"No profile directory at {directory!r}")
+
+        collapsed, pstat_files = [], []
+        for name in sorted(os.listdir(directory)):
+            # <label>.<timestamp>.<pid>-<n>.<ext>; labels may contain dots
+            label = name.rsplit(".", 3)[0]
+            if not fnmatch.fnmatch(label, options["label"]):
+                continue
+            path = os.path.join(directory, name)
+            if name.endswith(COLLAPSED_EXT):
+                collapsed.append(path)
+            elif name.endswith(PSTATS_EXT):
+                pstat_files.append(path)
+        if not collapsed and not pstat_files:
+            raise CommandError("No profiles matched.")
+
+        if collapsed:
+            self._report_collapsed(collapsed, options["top"], options["output"])
+        if pstat_files:
+            self._report_pstats(pstat_files, options["top"])
+
+    def _report_collapsed(self, paths, top, output):
+        stacks = Counter()
+        for path in paths:
+            read_collapsed(path, stacks)
+        total = sum(stacks.values())
+
+        self_samples, total_samples = Counter(), Counter()
+        for stack, count in stacks.items():
+            frames = stack.split(";")
+            self_samples[frames[-1]] += count
+            for frame in set(frames):
+                total_samples[frame] += count
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"{len(paths)} sampled profiles, {total} samples"
+        ))
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Top {top} by self samples"))
+        for frame, count in self_samples.most_common(top):
+            self.stdout.write(f"  {count:>8} {100 * count / total:>6.1f}%  {frame}")
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Top {top} by total samples"))
+        for frame, count in total_samples.most_common(top):
+            self.stdout.write(f"  {count:>8} {100 * count / total:>6.1f}%  {frame}")
+
+        if output:
+            with open(output, "w") as fh:
+                for stack, count in sorted(stacks.items()):
+                    fh.write(f"{stack} {count}\n")
+            self.stdout.write(self.style.SUCCESS(f"Collapsed stacks written to {output}"))
+
+    def _report_pstats(self, paths, top):
+        buffer = io.StringIO()
+        stats = pstats.Stats(*paths, stream=buffer)
+        stats.sort_stats("tottime").print_stats(top)
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"{len(paths)} cProfile profiles, top {top} by tottime"
+        ))
+        self.stdout.write(buffer.getvalue())
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Django management command to profile process startup.
+
+Starts a fresh interpreter with ``-X importtime`` that boots the app the way
+gunicorn (``--target web``) or a Celery worker (``--target worker``) does,
+then reports time per phase, time to first request (web) and the slowest
+imports. With ``--check`` it fails when the STARTUP_BUDGETS setting is
+exceeded, so it can gate CI as a startup regression test.
+
+Usage:
+    python manage.py profile_startup --target web --top 20
+    python manage.py profile_startup --target worker --check
+"""
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Run in the child interpreter; each prints one JSON line of phase timings.
+# Modules bound by lazy_import() that were never touched are not counted.
+WEB_SCRIPT = """
+import json, os, sys, time
+start = time.perf_counter()
+phases = {}
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+phases["wsgi_app_ms"] = (time.perf_counter() - start) * 1000
+from django.urls import get_resolver
+get_resolver().url_patterns
+phases["urlconf_ms"] = (time.perf_counter() - start) * 1000
+from io import BytesIO
+from django.conf import settings
+host = next((h for h in settings.ALLOWED_HOSTS if h != "*" and not h.startswith(".")), "localhost")
+path, _, query = sys.argv[1].partition("?")
+environ = {
+    "REQUEST_METHOD": "GET", "PATH_INFO": path, "QUERY_STRING": query,
+    "SERVER_NAME": host, "SERVER_PORT": "80", "HTTP_HOST": host,
+    "wsgi.input": BytesIO(), "wsgi.errors": sys.stderr, "wsgi.url_scheme": "http",
+    "wsgi.version": (1, 0), "wsgi.multithread": False, "wsgi.multiprocess": True,
+    "wsgi.run_once": False,
+}
+statuses = []
+body = application(environ, lambda status, headers, exc_info=None: statuses.append(status))
+b"".join(body)
+phases["first_request_ms"] = (time.perf_counter() - start) * 1000
+phases["status"] = statuses[0] if statuses else None
+phases["modules"] = sorted(name for name, module in list(sys.modules.items())
+                           if type(module).__name__ != "_LazyModule")
+print(json.dumps(phases))
+"""
+
+WORKER_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+phases = {}
+from alx_travel_app.celery import app
+import django
+django.setup()
+phases["django_setup_ms"] = (time.perf_counter() - start) * 1000
+app.loader.import_default_modules()
+phases["tasks_loaded_ms"] = (time.perf_counter() - start) * 1000
+phases["task_count"] = len([name for name in app.tasks if not name.startswith("celery.")])
+phases["modules"] = sorted(name for name, module in list(sys.modules.items())
+                           if type(module).__name__ != "_LazyModule")
+print(json.dumps(phases))
+"""
+
+TOTAL_PHASE = {"web": "first_request_ms", "worker": "tasks_loaded_ms"}
+
+
+def parse_importtime(stderr):
+    """Return [(module, self_us, cumulative_us, depth)] from -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        # "import time:       123 |        456 |   package.module"
+        self_us, cumulative_us, name = line.split(":", 1)[1].split("|", 2)
+        stripped = name.lstrip()
+        depth = (len(name) - len(stripped) - 1) // 2
+        rows.append((stripped, int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+class Command(BaseCommand):
+    """Report import time per module and time to first request."""
+
+    help = "Profile web/worker process startup (import time, time to first request)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target", choices=["web", "worker"], default="web")
+        parser.add_argument("--path", default="/api/listings/nearby/",
+                            help="URL requested as the first request (web target)")
+        parser.add_argument("--top", type=int, default=20)
+        parser.add_argument("--runs", type=int, default=3, help="Take the median of this many runs")
+        parser.add_argument("--check", action="store_true",
+                            help="Fail if settings.STARTUP_BUDGETS is exceeded")
+
+    def _run_once(self, target, path):
+        script = WEB_SCRIPT if target == "web" else WORKER_SCRIPT
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get(
+            "DJANGO_SETTINGS_MODULE", "alx_travel_app.settings"))
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", script, path],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            raise CommandError(f"startup probe failed:\n{proc.stderr[-4000:]}")
+        phases = json.loads(proc.stdout.strip().splitlines()[-1])
+        return phases, parse_importtime(proc.stderr)
+
+    def handle(self, *args, **options) -> None:
+        target = options["target"]
+        runs = [self._run_once(target, options["path"]) for _ in range(max(1, options["runs"]))]
+        total_key = TOTAL_PHASE[target]
+        runs.sort(key=lambda run: run[0][total_key])
+        phases, imports = runs[len(runs) // 2]
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Startup profile ({target}, median of {len(runs)} runs)"))
+        for key, value in phases.items():
+            if key.endswith("_ms"):
+                self.stdout.write(f"  {key:<22}{value:>10.1f}")
+            elif key != "modules":
+                self.stdout.write(f"  {key:<22}{value!s:>10}")
+        self.stdout.write(f"  {'modules_loaded':<22}{len(phases['modules']):>10}")
+
+        top = options["top"]
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Top {top} top-level imports by cumulative time"))
+        top_level = sorted((r for r in imports if r[3] == 0), key=lambda r: -r[2])[:top]
+        for name, _, cumulative, _ in top_level:
+            self.stdout.write(f"  {cumulative / 1000:>9.1f} ms  {name}")
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Top {top} packages by self time"))
+        by_package = defaultdict(int)
+        for name, self_us, _, _ in imports:
+            by_package[name.split(".")[0]] += self_us
+        for name, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:top]:
+            self.stdout.write(f"  {self_us / 1000:>9.1f} ms  {name}")
+
+        if options["check"]:
+            self._check_budget(target, phases, total_key)
+
+    def _check_budget(self, target, phases, total_key):
+        budget = settings.STARTUP_BUDGETS.get(target, {})
+        problems = []
+        limit = budget.get("max_ms")
+        if limit is not None and phases[total_key] > limit:
+            problems.append(f"{total_key} {phases[total_key]:.0f} ms exceeds budget of {limit} ms")
+        loaded = set(phases["modules"])
+        for module in budget.get("forbidden_modules", ()):
+            if module in loaded:
+                problems.append(f"{module} is imported at startup but should load lazily")
+        if problems:
+            raise CommandError("Startup budget exceeded:\n  " + "\n  ".join(problems))
+        self.stdout.write(self.style.SUCCESS("Startup within budget."))
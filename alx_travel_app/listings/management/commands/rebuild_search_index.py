@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+Django management command to rebuild the listings keyword search index.
+
+Usage:
+    python manage.py rebuild_search_index
+"""
+from django.core.management.base import BaseCommand
+
+from listings.search import rebuild_index, uses_fulltext
+
+
+class Command(BaseCommand):
+    """Rebuild the inverted index used for listing search."""
+
+    help = "Rebuild the listing search index (no-op on MySQL, which uses FULLTEXT)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options) -> None:
+        if uses_fulltext():
+            self.stdout.write(self.style.NOTICE("MySQL FULLTEXT index is maintained by the database."))
+            return
+        count = rebuild_index(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} listings."))
@@ -17,18 +17,24 @@ SAMPLE_LISTINGS: List[Dict] = [
         "title": "Cozy Downtown Flat",
         "description": "A comfortable one-bedroom flat in the heart of the city.",
         "location": "Lagos, Nigeria",
+        "latitude": "6.524400",
+        "longitude": "3.379200",
         "price_per_night": "40.00",
     },
     {
         "title": "Beachside Bungalow",
         "description": "Relax by the sea with private beach access.",
         "location": "Accra, Ghana",
+        "latitude": "5.603700",
+        "longitude": "-0.187000",
         "price_per_night": "75.00",
     },
     {
         "title": "Mountain Cabin Retreat",
         "description": "Quiet cabin with great hiking nearby.",
         "location": "Kano, Nigeria",
+        "latitude": "12.002200",
+        "longitude": "8.592000",
         "price_per_night": "55.00",
     },
 ]
@@ -71,6 +77,8 @@ class Command(BaseCommand):
                     defaults={
                         "description": item["description"],
                         "location": item["location"],
+                        "latitude": item["latitude"],
+                        "longitude": item["longitude"],
                         "price_per_night": item["price_per_night"],
                     },
                 )
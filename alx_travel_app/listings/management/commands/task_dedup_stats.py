@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Django management command to show how many duplicate task enqueues and runs
+were absorbed by listings/dedup.py.
+
+Usage:
+    python manage.py task_dedup_stats
+    python manage.py task_dedup_stats --reset
+"""
+from django.core.management.base import BaseCommand
+
+from alx_travel_app.celery import app
+from listings.dedup import DedupTask, reset_stats, stats
+
+
+class Command(BaseCommand):
+    """Print enqueued/dropped/skipped counters per deduplicated task."""
+
+    help = "Show duplicate task enqueues absorbed per deduplicated Celery task"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="Reset the counters after printing")
+
+    def handle(self, *args, **options) -> None:
+        app.loader.import_default_modules()
+        names = sorted(name for name, task in app.tasks.items() if isinstance(task, DedupTask))
+        self.stdout.write(f"{'task':<52}{'enqueued':>10}{'dropped':>10}{'skipped':>10}{'absorbed':>10}")
+        for name, counts in stats(names).items():
+            absorbed = counts["dropped"] + counts["skipped"]
+            total = counts["enqueued"] + counts["dropped"]
+            share = f"{100 * absorbed / total:.1f}%" if total else "-"
+            self.stdout.write(
+                f"{name:<52}{counts['enqueued']:>10}{counts['dropped']:>10}{counts['skipped']:>10}{share:>10}"
+            )
+        if options["reset"]:
+            reset_stats(names)
+            self.stdout.write(self.style.SUCCESS("Counters reset."))
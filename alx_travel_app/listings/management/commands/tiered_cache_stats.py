@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Django management command to show per-tier hit ratios of the caches in
+listings/tiered_cache.py.
+
+Usage:
+    python manage.py tiered_cache_stats
+    python manage.py tiered_cache_stats --reset
+"""
+from django.core.management.base import BaseCommand
+
+from listings import pricing, rollups, tasks, views  # noqa: F401 (register their caches)
+from listings.tiered_cache import flush_stats, reset_stats, stats
+
+
+class Command(BaseCommand):
+    """Print local (LRU) and remote (Redis) hits and misses per tiered cache."""
+
+    help = "Show hit ratios per tier for each two-tier cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="Reset the counters after printing")
+
+    def handle(self, *args, **options) -> None:
+        flush_stats()
+        self.stdout.write(
+            f"{'cache':<20}{'local hit':>11}{'local miss':>11}{'local %':>9}"
+            f"{'redis hit':>11}{'redis miss':>11}{'redis %':>9}"
+        )
+        for name, counts in stats().items():
+            local = f"{100 * counts['local_ratio']:.1f}%" if counts["local_ratio"] is not None else "-"
+            remote = f"{100 * counts['remote_ratio']:.1f}%" if counts["remote_ratio"] is not None else "-"
+            self.stdout.write(
+                f"{name:<20}{counts['local_hits']:>11}{counts['local_misses']:>11}{local:>9}"
+                f"{counts['remote_hits']:>11}{counts['remote_misses']:>11}{remote:>9}"
+            )
+        if options["reset"]:
+            reset_stats()
+            self.stdout.write(self.style.SUCCESS("Counters reset."))
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-19 09:55
+
+import django.core.validators
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0003_payment_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PricingRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rule_type', models.CharField(choices=[('weekend', 'Weekend rate'), ('seasonal', 'Seasonal rate'), ('length_of_stay', 'Length-of-stay discount'), ('cleaning_fee', 'Cleaning fee')], max_length=20)),
+                ('adjustment', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))])),
+                ('start_date', models.DateField(blank=True, null=True)),
+                ('end_date', models.DateField(blank=True, null=True)),
+                ('min_nights', models.PositiveIntegerField(blank=True, null=True)),
+                ('active', models.BooleanField(default=True)),
+                ('listing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pricing_rules', to='listings.listing')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['listing', 'active'], name='listings_pr_listing_81c765_idx')],
+            },
+        ),
+    ]
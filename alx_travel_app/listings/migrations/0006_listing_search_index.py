@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-19 09:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def add_fulltext_index(apps, schema_editor):
+    # MySQL answers keyword search from a native FULLTEXT index; other
+    # backends use the ListingSearchToken inverted index instead.
+    if schema_editor.connection.vendor == "mysql":
+        schema_editor.execute(
+            "ALTER TABLE listings_listing ADD FULLTEXT INDEX listing_fulltext_idx (title, description)"
+        )
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "mysql":
+        schema_editor.execute("ALTER TABLE listings_listing DROP INDEX listing_fulltext_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0005_listing_coordinates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListingSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.PositiveIntegerField()),
+                ('listing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='listings.listing')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term', 'listing'], name='listings_li_term_7b70ea_idx')],
+            },
+        ),
+        migrations.RunPython(add_fulltext_index, drop_fulltext_index),
+    ]
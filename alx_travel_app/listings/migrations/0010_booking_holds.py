@@ -0,0 +1,40 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:25
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def hold_pending_bookings(apps, schema_editor):
+    """Give bookings already pending a full hold from now instead of expiring them at once."""
+    Booking = apps.get_model("listings", "Booking")
+    expires = timezone.now() + timedelta(minutes=settings.BOOKING_HOLD_MINUTES)
+    Booking.objects.filter(status="pending", hold_expires_at__isnull=True).update(hold_expires_at=expires)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0009_updated_at_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedbooking',
+            name='hold_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='hold_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['status', 'hold_expires_at'], name='booking_hold_expiry_idx'),
+        ),
+        migrations.RunPython(hold_pending_bookings, migrations.RunPython.noop),
+    ]
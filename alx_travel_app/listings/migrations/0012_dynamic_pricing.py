@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0011_similar_listings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListingDynamicPrice',
+            fields=[
+                ('listing', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='dynamic_price', serialize=False, to='listings.listing')),
+                ('start_date', models.DateField()),
+                ('multipliers', models.JSONField()),
+                ('computed_at', models.DateTimeField()),
+            ],
+        ),
+    ]
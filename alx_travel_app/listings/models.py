@@ -27,6 +27,14 @@ class Listing(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField()
     location = models.CharField(max_length=255)
+    latitude = models.DecimalField(
+        max_digits=9, decimal_places=6, null=True, blank=True, validators=[
+            MinValueValidator(Decimal("-90")), MaxValueValidator(Decimal("90"))])
+    longitude = models.DecimalField(
+        max_digits=9, decimal_places=6, null=True, blank=True, validators=[
+            MinValueValidator(Decimal("-180")), MaxValueValidator(Decimal("180"))])
+    # Derived from latitude/longitude on save; indexed for cell-pruned geo search.
+    geohash = models.CharField(max_length=12, blank=True, default="", db_index=True, editable=False)
     price_per_night = models.DecimalField(
         max_digits=10, decimal_places=2, validators=[
             MinValueValidator(
@@ -36,10 +44,27 @@ class Listing(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Max(updated_at) for conditional GET on the listings endpoint
+            models.Index(fields=["updated_at"], name="listing_updated_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.title} — {self.location}"
 
+    def save(self, *args, **kwargs) -> None:
+        """Keep geohash in sync with the coordinates."""
+        from .geo import encode
+
+        if self.latitude is not None and self.longitude is not None:
+            self.geohash = encode(float(self.latitude), float(self.longitude))
+        else:
+            self.geohash = ""
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"latitude", "longitude"} & set(update_fields):
+            kwargs["update_fields"] = set(update_fields) | {"geohash"}
+        super().save(*args, **kwargs)
+
 
 class Booking(models.Model):
     """A booking for a Listing made by a user (guest)."""
@@ -72,10 +97,18 @@ class Booking(models.Model):
         max_length=20,
         choices=STATUS_CHOICES,
         default=STATUS_PENDING)
+    # Pending bookings hold the dates until then; see holds.py
+    hold_expires_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # archival scans (archive.py) and upcoming/past booking queries
+            models.Index(fields=["end_date"], name="booking_end_date_idx"),
+            # expired holds: status = pending AND hold_expires_at <= now
+            models.Index(fields=["status", "hold_expires_at"], name="booking_hold_expiry_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"Booking {self.id} for {self.listing.title}"
@@ -89,15 +122,159 @@ class Booking(models.Model):
 
     def save(self, *args, **kwargs) -> None:
         """
-        Optionally compute total_price if not set (assuming price_per_night available).
-        This simple computation will override only when total_price is None or 0.
+        Optionally compute total_price if not set, using the listing's pricing rules.
+        This computation will override only when total_price is None or 0.
         """
         if not self.total_price or self.total_price == Decimal("0.00"):
             nights = (self.end_date - self.start_date).days
             if nights > 0:
-                self.total_price = self.listing.price_per_night * nights
+                from .pricing import quote
+
+                self.total_price = quote(self.listing_id, self.start_date, self.end_date).total
+        self._set_hold(kwargs)
         super().save(*args, **kwargs)
 
+    def _set_hold(self, kwargs) -> None:
+        """Pending bookings get a hold expiry; other statuses hold nothing."""
+        if self.status == self.STATUS_PENDING:
+            if self.hold_expires_at is None:
+                from .holds import hold_expiry
+
+                self.hold_expires_at = hold_expiry()
+        else:
+            self.hold_expires_at = None
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "status" in update_fields:
+            kwargs["update_fields"] = set(update_fields) | {"hold_expires_at"}
+
+
+class ExternalBlock(models.Model):
+    """
+    Dates blocked on another booking platform, imported from the host's
+    iCal feed (ical.py). ``source`` names the feed and ``uid`` is the
+    event's UID in it; blocks make the listing unavailable in search.
+    """
+    listing = models.ForeignKey(
+        Listing, on_delete=models.CASCADE, related_name="external_blocks"
+    )
+    source = models.CharField(max_length=255)
+    uid = models.CharField(max_length=255)
+    start_date = models.DateField()
+    end_date = models.DateField()
+    summary = models.CharField(max_length=255, blank=True, default="")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["listing", "source", "uid"], name="external_block_uid_uniq"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.listing_id} blocked {self.start_date}..{self.end_date} ({self.source})"
+
+
+class PricingRule(models.Model):
+    """
+    A pricing adjustment attached to a Listing.
+
+    The meaning of ``adjustment`` depends on ``rule_type``:
+      - weekend: multiplier for Friday and Saturday nights (e.g. 1.20)
+      - seasonal: multiplier for nights between start_date and end_date (inclusive)
+      - length_of_stay: percent off the nightly subtotal for stays of min_nights or more
+      - cleaning_fee: flat amount added once per stay
+    """
+    TYPE_WEEKEND = "weekend"
+    TYPE_SEASONAL = "seasonal"
+    TYPE_LENGTH_OF_STAY = "length_of_stay"
+    TYPE_CLEANING_FEE = "cleaning_fee"
+
+    TYPE_CHOICES = [
+        (TYPE_WEEKEND, "Weekend rate"),
+        (TYPE_SEASONAL, "Seasonal rate"),
+        (TYPE_LENGTH_OF_STAY, "Length-of-stay discount"),
+        (TYPE_CLEANING_FEE, "Cleaning fee"),
+    ]
+
+    listing = models.ForeignKey(
+        Listing, on_delete=models.CASCADE, related_name="pricing_rules"
+    )
+    rule_type = models.CharField(max_length=20, choices=TYPE_CHOICES)
+    adjustment = models.DecimalField(
+        max_digits=10, decimal_places=2, validators=[
+            MinValueValidator(
+                Decimal("0.00"))])
+    start_date = models.DateField(null=True, blank=True)
+    end_date = models.DateField(null=True, blank=True)
+    min_nights = models.PositiveIntegerField(null=True, blank=True)
+    active = models.BooleanField(default=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["listing", "active"])]
+
+    def __str__(self) -> str:
+        return f"{self.get_rule_type_display()} {self.adjustment} on {self.listing_id}"
+
+
+class ListingDynamicPrice(models.Model):
+    """
+    Per-night price multipliers for a listing, written in bulk by
+    dynamic_pricing.py: ``multipliers[i]`` applies to the night
+    ``start_date + i`` on top of the listing's PricingRules.
+    """
+    listing = models.OneToOneField(
+        Listing, on_delete=models.CASCADE, primary_key=True, related_name="dynamic_price"
+    )
+    start_date = models.DateField()
+    multipliers = models.JSONField()
+    computed_at = models.DateTimeField()
+
+    def __str__(self) -> str:
+        return f"{self.listing_id} from {self.start_date} ({len(self.multipliers)} nights)"
+
+
+class ListingSearchToken(models.Model):
+    """
+    One posting of the listings inverted index: a term and its
+    field-weighted frequency in a listing's title and description.
+    Only used on databases without a native full-text index (see search.py).
+    """
+    term = models.CharField(max_length=64)
+    listing = models.ForeignKey(
+        Listing, on_delete=models.CASCADE, related_name="search_tokens"
+    )
+    weight = models.PositiveIntegerField()
+
+    class Meta:
+        indexes = [models.Index(fields=["term", "listing"])]
+
+    def __str__(self) -> str:
+        return f"{self.term} -> {self.listing_id} ({self.weight})"
+
+
+class ListingNeighbor(models.Model):
+    """
+    One precomputed "similar listing": ``neighbor`` is the ``rank``-th
+    nearest listing to ``listing`` by the feature distance in similar.py.
+    """
+    listing = models.ForeignKey(
+        Listing, on_delete=models.CASCADE, related_name="neighbors"
+    )
+    neighbor = models.ForeignKey(
+        Listing, on_delete=models.CASCADE, related_name="+"
+    )
+    rank = models.PositiveSmallIntegerField()
+    distance = models.FloatField()
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            # also the lookup index: listing_id = ? ORDER BY rank
+            models.UniqueConstraint(fields=["listing", "rank"], name="listing_neighbor_rank_uniq"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.listing_id} #{self.rank}: {self.neighbor_id}"
+
 
 class Review(models.Model):
     """A review (rating + comment) left by a user about a Listing."""
@@ -131,7 +308,7 @@ class Payment(models.Model):
     ]
 
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
-    booking_reference = models.CharField(max_length=128)   # link to booking (or booking FK)
+    booking_reference = models.CharField(max_length=128, db_index=True)   # link to booking (or booking FK)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     currency = models.CharField(max_length=10, default="ETB")
     tx_ref = models.CharField(max_length=128, unique=True)  # your unique reference you pass to Chapa
@@ -141,6 +318,15 @@ class Payment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # backs the admin date hierarchy and newest-first listings
+            models.Index(fields=["created_at"], name="payment_created_idx"),
+            models.Index(fields=["status", "created_at"], name="payment_status_created_idx"),
+            # Max(updated_at) per user for conditional GET on the payments list
+            models.Index(fields=["user", "updated_at"], name="payment_user_updated_idx"),
+        ]
+
     def mark_completed(self, chapa_tx_id=None, extra=None):
         self.status = "COMPLETED"
         if chapa_tx_id:
@@ -148,6 +334,10 @@ class Payment(models.Model):
         if extra:
             self.metadata = {**(self.metadata or {}), **extra}
         self.save(update_fields=["status", "chapa_tx_id", "metadata", "updated_at"])
+        from .holds import confirm_paid
+
+        # a paid booking no longer depends on its hold
+        confirm_paid(self.booking_reference)
 
     def mark_failed(self, reason=None):
         self.status = "FAILED"
@@ -157,3 +347,117 @@ class Payment(models.Model):
 
     def __str__(self):
         return f"{self.booking_reference} - {self.tx_ref} - {self.status}"
+
+
+class ListingDailyStats(models.Model):
+    """
+    Per listing, per day booking counters, kept up to date by rollups.py.
+
+    ``booked_nights`` counts confirmed nights on ``day`` (stay date);
+    ``bookings`` and ``cancellations`` count bookings created on ``day``
+    and, of those, the ones currently canceled.
+    """
+    listing = models.ForeignKey(
+        Listing, on_delete=models.CASCADE, related_name="daily_stats"
+    )
+    host = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+"
+    )
+    day = models.DateField()
+    booked_nights = models.IntegerField(default=0)
+    bookings = models.IntegerField(default=0)
+    cancellations = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["listing", "day"], name="listing_daily_stats_uniq"),
+        ]
+        indexes = [models.Index(fields=["host", "day"], name="listing_stats_host_day_idx")]
+
+    def __str__(self) -> str:
+        return f"{self.listing_id} {self.day}: {self.booked_nights} nights"
+
+
+class PaymentDailyStats(models.Model):
+    """
+    Payment counters per listing, day (payment creation date) and currency,
+    kept up to date by rollups.py. ``listing`` is null for payments whose
+    booking_reference is not a Booking id.
+    """
+    listing = models.ForeignKey(
+        Listing, on_delete=models.CASCADE, null=True, blank=True, related_name="payment_daily_stats"
+    )
+    host = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True, related_name="+"
+    )
+    day = models.DateField()
+    currency = models.CharField(max_length=10)
+    attempts = models.IntegerField(default=0)
+    succeeded = models.IntegerField(default=0)
+    failed = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["listing", "day", "currency"], name="payment_daily_stats_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["host", "day"], name="payment_stats_host_day_idx"),
+            models.Index(fields=["day"], name="payment_stats_day_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.listing_id} {self.day} {self.currency}: {self.revenue}"
+
+
+class ArchivedBooking(models.Model):
+    """
+    A past Booking moved out of the hot table by archive.py. Same columns
+    and ids as Booking; relations are kept without FK constraints so the
+    history survives deleted listings and users.
+    """
+    id = models.UUIDField(primary_key=True, editable=False)
+    listing = models.ForeignKey(
+        Listing, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+"
+    )
+    guest = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+"
+    )
+    start_date = models.DateField()
+    end_date = models.DateField()
+    total_price = models.DecimalField(max_digits=10, decimal_places=2)
+    status = models.CharField(max_length=20, choices=Booking.STATUS_CHOICES)
+    hold_expires_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["end_date"], name="archived_booking_end_idx")]
+
+    def __str__(self) -> str:
+        return f"Archived booking {self.id}"
+
+
+class ArchivedPayment(models.Model):
+    """A finished Payment moved out of the hot table by archive.py (same columns and ids)."""
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(
+        User, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True, related_name="+"
+    )
+    booking_reference = models.CharField(max_length=128, db_index=True)
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    currency = models.CharField(max_length=10)
+    tx_ref = models.CharField(max_length=128, unique=True)
+    chapa_tx_id = models.CharField(max_length=256, blank=True, null=True)
+    status = models.CharField(max_length=20, choices=Payment.STATUS_CHOICES)
+    metadata = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["created_at"], name="archived_payment_created_idx")]
+
+    def __str__(self) -> str:
+        return f"{self.booking_reference} - {self.tx_ref} - {self.status} (archived)"
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Batched price quotes for listings.
+
+Each listing's base price and active PricingRules are compiled into a small
+"pricing profile" that is cached per listing, in-process and in Redis
+(tiered_cache.py). Quotes for many
+(listing, start_date, end_date) requests are then computed in one NumPy
+pass: a nightly price matrix over the shared calendar, a cumulative sum per
+listing, and a difference per request. Money is handled in integer cents so
+the totals are exact.
+
+Nightly multipliers written by the dynamic pricing job
+(ListingDynamicPrice) are joined into the listing query and applied on top
+of the rules.
+
+Weekend nights are Friday and Saturday nights.
+"""
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from .lazy import lazy_import
+from .models import Listing, PricingRule
+from .tiered_cache import TieredCache
+
+np = lazy_import("numpy")
+
+PROFILE_CACHE_PREFIX = "pricing:profile:"
+PROFILE_CACHE_TIMEOUT = 60 * 60
+
+WEEKEND_WEEKDAYS = (4, 5)  # Friday, Saturday nights
+
+CENTS = Decimal("0.01")
+
+
+@dataclass(frozen=True)
+class Quote:
+    listing_id: str
+    start_date: date
+    end_date: date
+    nights: int
+    subtotal: Decimal
+    discount: Decimal
+    cleaning_fee: Decimal
+    total: Decimal
+
+
+def _cents(value) -> int:
+    return int((Decimal(value) * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+
+def _money(cents) -> Decimal:
+    return (Decimal(int(cents)) / 100).quantize(CENTS)
+
+
+profile_cache = TieredCache("pricing", prefix=PROFILE_CACHE_PREFIX, remote_ttl=PROFILE_CACHE_TIMEOUT)
+
+
+def profile_cache_key(listing_id) -> str:
+    return f"{PROFILE_CACHE_PREFIX}{listing_id}"
+
+
+def invalidate_profile(listing_id) -> None:
+    profile_cache.invalidate(listing_id)
+
+
+def invalidate_profiles(listing_ids: Iterable) -> None:
+    profile_cache.invalidate(*listing_ids)
+
+
+def _build_profiles(listing_ids: Sequence[str]) -> Dict[str, dict]:
+    """Compile pricing profiles for listings with two queries in total."""
+    profiles = {
+        str(pk): {
+            "base_cents": _cents(price),
+            "weekend": 1.0,
+            "seasons": [],
+            "los": [],
+            "cleaning_cents": 0,
+            "dynamic": (dynamic_start.toordinal(), dynamic) if dynamic_start else None,
+        }
+        for pk, price, dynamic_start, dynamic in Listing.objects.filter(pk__in=listing_ids).values_list(
+            "pk", "price_per_night", "dynamic_price__start_date", "dynamic_price__multipliers"
+        )
+    }
+    rules = PricingRule.objects.filter(listing_id__in=list(profiles), active=True).values_list(
+        "listing_id", "rule_type", "adjustment", "start_date", "end_date", "min_nights"
+    )
+    for listing_id, rule_type, adjustment, start, end, min_nights in rules:
+        profile = profiles[str(listing_id)]
+        if rule_type == PricingRule.TYPE_WEEKEND:
+            profile["weekend"] *= float(adjustment)
+        elif rule_type == PricingRule.TYPE_SEASONAL and start and end:
+            profile["seasons"].append((start.toordinal(), end.toordinal(), float(adjustment)))
+        elif rule_type == PricingRule.TYPE_LENGTH_OF_STAY and min_nights:
+            profile["los"].append((int(min_nights), float(adjustment)))
+        elif rule_type == PricingRule.TYPE_CLEANING_FEE:
+            profile["cleaning_cents"] += _cents(adjustment)
+    return profiles
+
+
+def get_profiles(listing_ids: Iterable) -> Dict[str, dict]:
+    """
+    Return pricing profiles keyed by listing id, from cache where possible.
+    Profiles are shared with the in-process cache: read them, never mutate.
+    """
+    return profile_cache.get_many((str(pk) for pk in listing_ids), loader=_build_profiles)
+
+
+def quote_many(requests: Sequence[Tuple[object, date, date]]) -> List[Quote]:
+    """
+    Quote a batch of (listing_id, start_date, end_date) requests.
+
+    Requests for unknown listings raise Listing.DoesNotExist. Ranges with no
+    nights (including an end_date before the start_date) are quoted at zero.
+    """
+    if not requests:
+        return []
+
+    profiles = get_profiles(pk for pk, _, _ in requests)
+    unknown = {str(pk) for pk, _, _ in requests} - set(profiles)
+    if unknown:
+        raise Listing.DoesNotExist(f"Unknown listing(s): {', '.join(sorted(unknown))}")
+
+    order = list(profiles)
+    row_of = {pk: i for i, pk in enumerate(order)}
+
+    # Shared calendar covering every requested night (and every start, so
+    # that backwards ranges still index inside it).
+    origin = min(start for _, start, _ in requests).toordinal()
+    horizon = max(max(start, end) for _, start, end in requests).toordinal()
+    days = max(horizon - origin, 1)
+    ordinals = np.arange(origin, origin + days)
+    # date.fromordinal(1) is a Monday, so (ordinal - 1) % 7 is the weekday.
+    weekend = np.isin((ordinals - 1) % 7, WEEKEND_WEEKDAYS)
+
+    base = np.array([profiles[pk]["base_cents"] for pk in order], dtype=np.float64)
+    weekend_mult = np.array([profiles[pk]["weekend"] for pk in order])
+    multipliers = np.where(weekend[None, :], weekend_mult[:, None], 1.0)
+    for row, pk in enumerate(order):
+        for start, end, mult in profiles[pk]["seasons"]:
+            lo = max(start - origin, 0)
+            hi = min(end - origin + 1, days)
+            if lo < hi:
+                multipliers[row, lo:hi] *= mult
+        # profiles cached before dynamic pricing existed have no "dynamic" key
+        if profiles[pk].get("dynamic"):
+            start, nightly = profiles[pk]["dynamic"]
+            lo, hi = max(start, origin), min(start + len(nightly), origin + days)
+            if lo < hi:
+                multipliers[row, lo - origin:hi - origin] *= np.asarray(nightly[lo - start:hi - start])
+
+    nightly = np.rint(base[:, None] * multipliers).astype(np.int64)
+    cumulative = np.zeros((len(order), days + 1), dtype=np.int64)
+    np.cumsum(nightly, axis=1, out=cumulative[:, 1:])
+
+    rows = np.array([row_of[str(pk)] for pk, _, _ in requests])
+    starts = np.array([start.toordinal() - origin for _, start, _ in requests])
+    ends = np.array([end.toordinal() - origin for _, _, end in requests])
+    nights = np.maximum(ends - starts, 0)
+    ends = starts + nights
+    subtotal = cumulative[rows, ends] - cumulative[rows, starts]
+
+    # Length-of-stay tiers padded to a (listings x tiers) matrix; the best
+    # tier whose min_nights is reached applies.
+    width = max((len(profiles[pk]["los"]) for pk in order), default=0)
+    discount_pct = np.zeros(len(requests))
+    if width:
+        tier_nights = np.full((len(order), width), np.iinfo(np.int64).max, dtype=np.int64)
+        tier_pct = np.zeros((len(order), width))
+        for row, pk in enumerate(order):
+            for col, (min_nights, pct) in enumerate(profiles[pk]["los"]):
+                tier_nights[row, col] = min_nights
+                tier_pct[row, col] = pct
+        reached = tier_nights[rows] <= nights[:, None]
+        discount_pct = np.where(reached, tier_pct[rows], 0.0).max(axis=1)
+    discount = np.rint(subtotal * discount_pct / 100).astype(np.int64)
+
+    cleaning = np.array([profiles[pk]["cleaning_cents"] for pk in order], dtype=np.int64)[rows]
+    cleaning = np.where(nights > 0, cleaning, 0)
+    total = subtotal - discount + cleaning
+
+    return [
+        Quote(
+            listing_id=str(pk),
+            start_date=start,
+            end_date=end,
+            nights=int(nights[i]),
+            subtotal=_money(subtotal[i]),
+            discount=_money(discount[i]),
+            cleaning_fee=_money(cleaning[i]),
+            total=_money(total[i]),
+        )
+        for i, (pk, start, end) in enumerate(requests)
+    ]
+
+
+def quote(listing_id, start_date: date, end_date: date) -> Quote:
+    """Quote a single stay."""
+    return quote_many([(listing_id, start_date, end_date)])[0]
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Opt-in profiling of production requests and Celery tasks.
+
+Nothing is installed unless settings.PROFILING["enabled"] is true. When it
+is, a request to a ``listings`` view is profiled if it carries a valid signed
+``X-Profile`` header (see make_token) or is picked by ``sample_rate``. A task
+is profiled according to its entry in ``tasks`` or ``task_sample_rate``.
+
+Two capture modes:
+
+* ``sample`` (default): a background thread samples the stack of the
+  profiled thread every ``interval`` seconds. This is cheap enough for
+  production and is written as collapsed stacks (``a;b;c 12``).
+* ``cprofile``: deterministic cProfile. This is exact but slows the profiled
+  code down several times. It is written as a pstats ``.prof`` file.
+
+Profiles are written to ``<dir>/<label>.<timestamp>.<pid>-<n>.<ext>``. Use
+``manage.py profile_report`` to aggregate them. After each write, profiles
+older than ``max_age_days`` and all but the newest ``max_files`` are
+deleted (prune()), so sampling left on does not fill the disk.
+"""
+import cProfile
+import itertools
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import MiddlewareNotUsed
+
+logger = logging.getLogger(__name__)
+
+TOKEN_SALT = "listings.profiling"
+COLLAPSED_EXT = ".collapsed"
+PSTATS_EXT = ".prof"
+
+_task_profiles = {}
+_sequence = itertools.count()
+
+
+def get_config():
+    return getattr(settings, "PROFILING", {})
+
+
+def make_token():
+    """Value for the X-Profile header; valid for ``token_max_age`` seconds."""
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign("profile")
+
+
+def token_is_valid(token):
+    try:
+        signing.TimestampSigner(salt=TOKEN_SALT).unsign(
+            token, max_age=get_config().get("token_max_age", 3600)
+        )
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}:{code.co_name}:{code.co_firstlineno}"
+
+
+class StackSampler:
+    """Samples one thread's call stack from a background thread."""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            if stack:
+                self.counts[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+class Profile:
+    """One profiling session of the calling thread."""
+
+    def __init__(self, label, mode=None):
+        config = get_config()
+        self.label = re.sub(r"[^A-Za-z0-9_.-]+", "_", label).strip("_") or "unnamed"
+        self.mode = mode or config.get("mode", "sample")
+        self.interval = config.get("interval", 0.005)
+        self.directory = config.get("dir") or os.path.join(settings.BASE_DIR, "profiles")
+        self._profiler = None
+        self._started = None
+        self.duration = None
+
+    def start(self):
+        if self.mode == "cprofile":
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            self._profiler = StackSampler(threading.get_ident(), self.interval)
+            self._profiler.start()
+        self._started = time.perf_counter()
+        return self
+
+    def stop(self):
+        self.duration = time.perf_counter() - self._started
+        if self.mode == "cprofile":
+            self._profiler.disable()
+        else:
+            self._profiler.stop()
+
+    def save(self):
+        """Write the profile to disk and return its path (None on failure)."""
+        stamp = time.strftime("%Y%m%dT%H%M%S")
+        ext = PSTATS_EXT if self.mode == "cprofile" else COLLAPSED_EXT
+        name = f"{self.label}.{stamp}.{os.getpid()}-{next(_sequence)}{ext}"
+        path = os.path.join(self.directory, name)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            if self.mode == "cprofile":
+                self._profiler.dump_stats(path)
+            else:
+                with open(path, "w") as fh:
+                    for stack, count in self._profiler.counts.items():
+                        fh.write(f"{stack} {count}\n")
+        except OSError:
+            logger.warning("Could not write profile %s", path, exc_info=True)
+            return None
+        logger.info("Profile of %s (%.1f ms) written to %s", self.label, self.duration * 1000, path)
+        prune(self.directory)
+        return path
+
+
+def prune(directory=None, max_files=None, max_age_days=None) -> int:
+    """Delete expired and surplus profiles (oldest first); returns how many were deleted."""
+    config = get_config()
+    directory = directory or config.get("dir") or os.path.join(settings.BASE_DIR, "profiles")
+    max_files = config.get("max_files", 1000) if max_files is None else max_files
+    max_age_days = config.get("max_age_days", 7) if max_age_days is None else max_age_days
+    try:
+        with os.scandir(directory) as entries:
+            profiles = sorted(
+                ((entry.stat().st_mtime, entry.path) for entry in entries
+                 if entry.is_file() and entry.name.endswith((COLLAPSED_EXT, PSTATS_EXT))),
+                reverse=True,
+            )
+    except OSError:
+        return 0
+    cutoff = time.time() - max_age_days * 24 * 60 * 60
+    deleted = 0
+    for position, (mtime, path) in enumerate(profiles):
+        if position < max_files and mtime >= cutoff:
+            continue
+        try:
+            os.remove(path)
+            deleted += 1
+        except FileNotFoundError:  # pruned by another process
+            pass
+        except OSError:
+            logger.warning("Could not delete profile %s", path, exc_info=True)
+    return deleted
+
+
+class ProfilingMiddleware:
+    """
+    Profiles ``listings`` views on a signed X-Profile header or at
+    ``sample_rate``. Removed from the stack entirely when profiling is disabled.
+    """
+
+    def __init__(self, get_response):
+        config = get_config()
+        if not config.get("enabled"):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = config.get("sample_rate", 0.0)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        profile = getattr(request, "_profile", None)
+        if profile is not None:
+            profile.stop()
+            path = profile.save()
+            if path and request._profile_requested:
+                response["X-Profile-File"] = os.path.basename(path)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not getattr(view_func, "__module__", "").startswith("listings."):
+            return None
+        token = request.headers.get("X-Profile")
+        requested = bool(token) and token_is_valid(token)
+        if requested or (self.sample_rate and random.random() < self.sample_rate):
+            match = request.resolver_match
+            label = "view." + (match.view_name if match else request.path)
+            request._profile_requested = requested
+            request._profile = Profile(label).start()
+        return None
+
+
+def _task_rate(task):
+    config = get_config()
+    return config.get("tasks", {}).get(task.name, config.get("task_sample_rate", 0.0))
+
+
+def _task_prerun(sender=None, task_id=None, task=None, **kwargs):
+    if task is None or not task.name.startswith("listings."):
+        return
+    rate = _task_rate(task)
+    if rate and random.random() < rate:
+        _task_profiles[task_id] = Profile("task." + task.name).start()
+
+
+def _task_postrun(sender=None, task_id=None, **kwargs):
+    profile = _task_profiles.pop(task_id, None)
+    if profile is not None:
+        profile.stop()
+        profile.save()
+
+
+def install_task_hooks():
+    """Connect the Celery task hooks when profiling is enabled."""
+    if not get_config().get("enabled"):
+        return
+    from celery.signals import task_postrun, task_prerun
+
+    task_prerun.connect(_task_prerun, weak=False, dispatch_uid="listings.profiling.prerun")
+    task_postrun.connect(_task_postrun, weak=False, dispatch_uid="listings.profiling.postrun")
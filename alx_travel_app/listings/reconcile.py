@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Payment verification, one at a time or in batches for partner reconciliation.
+
+apply_verification() records a Chapa verify response on a Payment (shared
+by the single verify endpoint and verify_many()).
+
+verify_many() answers a list of tx_refs with one ``IN`` query on Payment
+(and one on ArchivedPayment for the refs not found there). Settled and
+archived payments are answered from the database; only still-pending ones
+go to Chapa through the shared circuit breaker, on a thread pool no larger
+than settings.BATCH_VERIFY["max_workers"] or the bulkhead's free slots. A
+call the bulkhead turns away (another request holds the slot) is retried.
+
+One request sends at most BATCH_VERIFY["max_upstream"] refs to Chapa and
+starts no call after BATCH_VERIFY["time_budget_seconds"]; refs left over
+either way are reported "unavailable" with a retry_after. HTTP calls run
+in the pool; database writes stay on the calling thread. Confirmation
+emails for newly completed payments are published with one fan_out().
+"""
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List
+
+from django.conf import settings
+
+from . import chapa
+from .models import ArchivedPayment, Payment
+
+logger = logging.getLogger(__name__)
+
+SUCCESS_STATUSES = ("successful", "success", "completed", "paid")
+SETTLED_STATUSES = ("COMPLETED", "FAILED", "CANCELLED")
+
+
+def apply_verification(payment: Payment, body: dict) -> bool:
+    """Mark ``payment`` completed or failed from a verify response; True if completed."""
+    status_data = body.get("data", {}).get("status") or body.get("message")
+    chapa_reference = body.get("data", {}).get("reference") or body.get("data", {}).get("tx_ref")
+
+    payment.metadata = {**(payment.metadata or {}), "verify_response": body}
+
+    if status_data and str(status_data).lower() in SUCCESS_STATUSES:
+        payment.mark_completed(chapa_tx_id=chapa_reference, extra={"verify_response": body})
+        return True
+    payment.mark_failed(reason=body.get("message") or "not successful")
+    return False
+
+
+def _out_of_budget(retry_after=1):
+    return chapa.ChapaUnavailable(chapa.breaker.name, retry_after, "batch verify budget used")
+
+
+def _verify_one(tx_ref, deadline):
+    while True:
+        if time.monotonic() >= deadline:
+            return _out_of_budget()
+        try:
+            return chapa.verify(tx_ref)
+        except chapa.ChapaBusy as exc:
+            if time.monotonic() >= deadline:
+                return exc
+            # jittered, so pool threads do not all retry at the same instant
+            time.sleep(settings.BATCH_VERIFY["busy_retry_seconds"] * random.uniform(0.5, 1.5))
+        except (chapa.ChapaUnavailable, chapa.ChapaError) as exc:
+            return exc
+
+
+def _verify_concurrently(tx_refs: List[str]) -> Dict[str, object]:
+    """tx_ref -> verify response body, or the ChapaError/ChapaUnavailable raised."""
+    if not tx_refs:
+        return {}
+    deadline = time.monotonic() + settings.BATCH_VERIFY["time_budget_seconds"]
+    workers = min(settings.BATCH_VERIFY["max_workers"], len(tx_refs))
+    free = chapa.breaker.free_slots()
+    if free is not None:
+        # more threads than the bulkhead admits would only be turned away
+        workers = min(workers, max(free, 1))
+    if workers == 1:
+        return {tx_ref: _verify_one(tx_ref, deadline) for tx_ref in tx_refs}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="chapa-verify") as pool:
+        return dict(zip(tx_refs, pool.map(lambda tx_ref: _verify_one(tx_ref, deadline), tx_refs)))
+
+
+def verify_many(tx_refs: Iterable[str], user=None) -> List[dict]:
+    """
+    One result per distinct tx_ref, in request order:
+    {"tx_ref", "payment_status", "source"} where source is "database",
+    "archive", "chapa", "not_found", "unavailable" (with retry_after) or
+    "error". With a non-staff ``user``, other users' payments are not found.
+    """
+    refs = list(dict.fromkeys(tx_refs))
+    live, old = Payment.objects.all(), ArchivedPayment.objects.all()
+    if user is not None and not user.is_staff:
+        live, old = live.filter(user=user), old.filter(user=user)
+    payments = {payment.tx_ref: payment for payment in live.filter(tx_ref__in=refs)}
+    missing = [ref for ref in refs if ref not in payments]
+    archived = dict(old.filter(tx_ref__in=missing).values_list("tx_ref", "status")) if missing else {}
+
+    results = {}
+    for ref in refs:
+        payment = payments.get(ref)
+        if payment is not None and payment.status in SETTLED_STATUSES:
+            results[ref] = {"tx_ref": ref, "payment_status": payment.status, "source": "database"}
+        elif payment is None and ref in archived:
+            results[ref] = {"tx_ref": ref, "payment_status": archived[ref], "source": "archive"}
+        elif payment is None:
+            results[ref] = {"tx_ref": ref, "payment_status": None, "source": "not_found"}
+
+    pending = [payments[ref] for ref in refs if ref not in results]
+    limit = settings.BATCH_VERIFY["max_upstream"]
+    responses = _verify_concurrently([payment.tx_ref for payment in pending[:limit]])
+    responses.update((payment.tx_ref, _out_of_budget()) for payment in pending[limit:])
+    completed = []
+    for payment in pending:
+        outcome = responses[payment.tx_ref]
+        result = {"tx_ref": payment.tx_ref, "payment_status": payment.status}
+        if isinstance(outcome, chapa.ChapaUnavailable):
+            result.update(source="unavailable", retry_after=outcome.retry_after)
+        elif isinstance(outcome, chapa.ChapaError):
+            logger.warning("Chapa verify failed for %s: %s", payment.tx_ref, outcome)
+            result.update(source="error", error=str(outcome))
+        else:
+            if apply_verification(payment, outcome):
+                completed.append(payment.id)
+            result.update(source="chapa", payment_status=payment.status)
+        results[payment.tx_ref] = result
+
+    if completed:
+        try:
+            from .fanout import fan_out
+            from .tasks import send_payment_confirmation_email
+
+            fan_out(send_payment_confirmation_email, [(pk,) for pk in completed])
+        except Exception:
+            logger.exception("Could not enqueue confirmation emails")
+    return [results[ref] for ref in refs]
@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+"""
+Access to the raw Redis client behind the default cache.
+"""
+from django.conf import settings
+
+
+def get_redis():
+    """
+    Return the redis-py client used by the default cache, or None when the
+    cache is not Redis-backed (development without REDIS_URL).
+    """
+    if "django_redis" not in settings.CACHES["default"]["BACKEND"]:
+        return None
+    from django_redis import get_redis_connection
+
+    return get_redis_connection("default")
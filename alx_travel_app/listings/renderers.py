@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+FastJSONRenderer: DRF renderer that encodes straight to bytes with orjson.
+
+Output matches rest_framework.renderers.JSONRenderer (compact, UTF-8):
+values orjson does not handle the way DRF does (datetimes, Decimals, lazy
+strings, querysets, ...) go through DRF's own JSONEncoder.default. Indented
+output (``Accept: application/json; indent=4``) and installs without orjson
+fall back to JSONRenderer.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # optional speed-up, see requirements.txt
+    orjson = None
+
+_default = JSONEncoder().default
+_OPTIONS = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+            | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+
+def dumps(data) -> bytes:
+    """Encode ``data`` the way JSONRenderer would, as bytes."""
+    if orjson is None:
+        return JSONRenderer().render(data)
+    return orjson.dumps(data, default=_default, option=_OPTIONS)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer with an orjson fast path."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return orjson.dumps(data, default=_default, option=_OPTIONS)
@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+"""
+Daily booking and payment rollups for host dashboards and finance reports.
+
+ListingDailyStats and PaymentDailyStats are a pure function of the current
+Booking and Payment rows: every row contributes fixed increments to a few
+(listing, day[, currency]) keys. When a row is saved or deleted, the signal
+handlers apply contributions(new) - contributions(old) as a couple of
+``UPDATE ... SET n = n + delta`` statements, so reports never read the raw
+tables. rebuild() recomputes a range of days from the raw tables; the
+backfill_rollups task runs it one chunk at a time.
+
+Rows moved to the archive tables (archive.py) keep counting: the move runs
+inside suspended(), and rebuild() reads the live and archived tables.
+Writes that bypass model signals (QuerySet.update, bulk_create) must apply
+the deltas themselves (see apply_booking_change) or be followed by a
+rebuild of the affected days.
+"""
+import threading
+import uuid
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import (
+    ArchivedBooking, ArchivedPayment, Booking, Listing, ListingDailyStats, Payment,
+    PaymentDailyStats,
+)
+from .tiered_cache import TieredCache
+
+ONE_DAY = timedelta(days=1)
+CENTS = Decimal("0.01")
+
+BOOKING_FIELDS = ("listing_id", "start_date", "end_date", "status", "created_at")
+PAYMENT_FIELDS = ("booking_reference", "amount", "currency", "status", "created_at")
+
+LISTING_KEY = ("listing_id", "day")
+PAYMENT_KEY = ("listing_id", "day", "currency")
+
+_UNCHANGED = object()
+_local = threading.local()
+
+
+@contextmanager
+def suspended():
+    """Skip rollup updates for saves/deletes in this block (this thread only)."""
+    previous = getattr(_local, "suspended", False)
+    _local.suspended = True
+    try:
+        yield
+    finally:
+        _local.suspended = previous
+
+
+def _suspended() -> bool:
+    return getattr(_local, "suspended", False)
+
+
+def _money(amount) -> str:
+    # same representation as DRF DecimalFields elsewhere in the API
+    return str(Decimal(amount).quantize(CENTS))
+
+
+def _day(value) -> date:
+    return timezone.localdate(value) if isinstance(value, datetime) else value
+
+
+def _booking_contributions(state) -> Dict[tuple, Counter]:
+    rows = defaultdict(Counter)
+    if not state:
+        return rows
+    created = (state["listing_id"], _day(state["created_at"]))
+    rows[created]["bookings"] += 1
+    if state["status"] == Booking.STATUS_CANCELED:
+        rows[created]["cancellations"] += 1
+    elif state["status"] == Booking.STATUS_CONFIRMED:
+        day = state["start_date"]
+        while day < state["end_date"]:
+            rows[(state["listing_id"], day)]["booked_nights"] += 1
+            day += ONE_DAY
+    return rows
+
+
+def _payment_contributions(state) -> Dict[tuple, Counter]:
+    rows = defaultdict(Counter)
+    if not state:
+        return rows
+    counters = rows[(state["listing_id"], _day(state["created_at"]), state["currency"])]
+    counters["attempts"] += 1
+    if state["status"] == "COMPLETED":
+        counters["succeeded"] += 1
+        counters["revenue"] += Decimal(state["amount"])
+    elif state["status"] == "FAILED":
+        counters["failed"] += 1
+    return rows
+
+
+def _diff(old, new) -> Dict[tuple, dict]:
+    deltas = {}
+    for key in set(old) | set(new):
+        before, after = old.get(key, {}), new.get(key, {})
+        delta = {f: after.get(f, 0) - before.get(f, 0) for f in set(before) | set(after)}
+        delta = {f: value for f, value in delta.items() if value}
+        if delta:
+            deltas[key] = delta
+    return deltas
+
+
+def _keys_q(keys, key_fields) -> Q:
+    """One ``day__in`` predicate per distinct (listing[, currency])."""
+    days_by_rest = defaultdict(list)
+    for key in keys:
+        values = dict(zip(key_fields, key))
+        day = values.pop("day")
+        days_by_rest[tuple(sorted(values.items()))].append(day)
+    q = Q()
+    for rest, days in days_by_rest.items():
+        q |= Q(day__in=days, **dict(rest))
+    return q
+
+
+# listing -> host, read on every rollup row creation; dropped by listing_changed
+listing_hosts = TieredCache("listing-hosts")
+
+
+def _load_owners(listing_ids) -> Dict[object, int]:
+    return dict(Listing.objects.filter(pk__in=listing_ids).values_list("pk", "host_id"))
+
+
+def _owners(listing_ids) -> Dict[object, int]:
+    ids = {pk for pk in listing_ids if pk is not None}
+    if not ids:
+        return {}
+    return listing_hosts.get_many(ids, loader=_load_owners)
+
+
+def _create_rows(model, keys, key_fields):
+    keyed = [dict(zip(key_fields, key)) for key in keys]
+    owners = _owners(values["listing_id"] for values in keyed)
+    model.objects.bulk_create(
+        [model(host_id=owners.get(values["listing_id"]), **values) for values in keyed],
+        ignore_conflicts=True,
+    )
+
+
+def _apply(model, deltas, key_fields):
+    groups = defaultdict(list)
+    for key, delta in deltas.items():
+        groups[tuple(sorted(delta.items()))].append(key)
+    for delta, keys in groups.items():
+        updates = {field: F(field) + value for field, value in delta}
+        # Pure decrements never create rows (e.g. while a listing is being
+        # deleted, its bookings' rollups are going away with it).
+        grows = any(value > 0 for _, value in delta)
+
+        # Rows a positive delta needs are created (zeroed, ignoring ones a
+        # concurrent writer created first) before the one UPDATE over all
+        # keys, so every key is incremented exactly once. Updating first and
+        # then creating what seemed missing would skip a row that another
+        # writer created in between.
+        keyed = [key for key in keys if key[0] is not None]
+        if keyed:
+            q = _keys_q(keyed, key_fields)
+            if grows:
+                existing = set(model.objects.filter(q).values_list(*key_fields))
+                missing = [key for key in keyed if key not in existing]
+                if missing:
+                    _create_rows(model, missing, key_fields)
+            model.objects.filter(q).update(**updates)
+
+        # Unattributed payments: NULL keys are not covered by the unique
+        # constraint, so always update exactly one row (reports sum rows,
+        # so a duplicate created by a race is harmless).
+        for key in keys:
+            if key[0] is not None:
+                continue
+            values = dict(zip(key_fields, key))
+            pk = model.objects.filter(**values).order_by("pk").values_list("pk", flat=True).first()
+            if pk is None:
+                if not grows:
+                    continue
+                pk = model.objects.create(**values).pk
+            model.objects.filter(pk=pk).update(**updates)
+
+
+def apply_booking_change(old: Optional[dict], new: Optional[dict]) -> None:
+    """Apply the rollup delta of a booking going from state ``old`` to ``new``."""
+    if _suspended():
+        return
+    _apply(ListingDailyStats, _diff(_booking_contributions(old), _booking_contributions(new)),
+           LISTING_KEY)
+
+
+def apply_booking_changes(changes: Iterable[Tuple[Optional[dict], Optional[dict]]]) -> None:
+    """apply_booking_change for many (old, new) pairs, with one set of writes."""
+    if _suspended():
+        return
+    deltas = defaultdict(Counter)
+    for old, new in changes:
+        for key, delta in _diff(_booking_contributions(old), _booking_contributions(new)).items():
+            deltas[key].update(delta)
+    _apply(ListingDailyStats, {key: {f: v for f, v in delta.items() if v}
+                               for key, delta in deltas.items() if any(delta.values())}, LISTING_KEY)
+
+
+def apply_payment_change(old: Optional[dict], new: Optional[dict]) -> None:
+    """Same as apply_booking_change for payments (states carry listing_id)."""
+    if _suspended():
+        return
+    _apply(PaymentDailyStats, _diff(_payment_contributions(old), _payment_contributions(new)),
+           PAYMENT_KEY)
+
+
+def resolve_references(references: Iterable[str]) -> Dict[str, object]:
+    """Map payment booking references that are (archived) Booking ids to listing ids."""
+    ids = {}
+    for reference in set(references):
+        try:
+            ids[uuid.UUID(str(reference))] = reference
+        except ValueError:
+            continue
+    resolved = {}
+    for model in (Booking, ArchivedBooking):
+        pks = [pk for pk, reference in ids.items() if reference not in resolved]
+        for i in range(0, len(pks), 1000):
+            for pk, listing_id in model.objects.filter(pk__in=pks[i:i + 1000]).values_list(
+                "pk", "listing_id"
+            ):
+                resolved[ids[pk]] = listing_id
+    return resolved
+
+
+def _state(instance, fields) -> dict:
+    return {field: getattr(instance, field) for field in fields}
+
+
+def _previous(model, instance, fields, update_fields):
+    if instance._state.adding or _suspended():
+        return None
+    if update_fields is not None and not {f.removesuffix("_id") for f in fields} & set(update_fields):
+        return _UNCHANGED
+    return model.objects.filter(pk=instance.pk).values(*fields).first()
+
+
+def capture_booking(instance, update_fields=None) -> None:
+    """pre_save: remember the stored state so post_save can compute the delta."""
+    instance._rollup_previous = _previous(Booking, instance, BOOKING_FIELDS, update_fields)
+
+
+def capture_payment(instance, update_fields=None) -> None:
+    instance._rollup_previous = _previous(Payment, instance, PAYMENT_FIELDS, update_fields)
+
+
+def booking_saved(instance) -> None:
+    old = getattr(instance, "_rollup_previous", None)
+    if old is not _UNCHANGED:
+        apply_booking_change(old, _state(instance, BOOKING_FIELDS))
+
+
+def booking_deleted(instance) -> None:
+    apply_booking_change(_state(instance, BOOKING_FIELDS), None)
+
+
+def _with_listing(state, known=None):
+    if state is not None:
+        if known and known["booking_reference"] == state["booking_reference"]:
+            state["listing_id"] = known["listing_id"]
+        else:
+            state["listing_id"] = resolve_references([state["booking_reference"]]).get(
+                state["booking_reference"]
+            )
+    return state
+
+
+def payment_saved(instance) -> None:
+    old = getattr(instance, "_rollup_previous", None)
+    if old is _UNCHANGED or _suspended():
+        return
+    old = _with_listing(old)
+    apply_payment_change(old, _with_listing(_state(instance, PAYMENT_FIELDS), old))
+
+
+def payment_deleted(instance) -> None:
+    if _suspended():  # skip the booking reference lookup as well
+        return
+    apply_payment_change(_with_listing(_state(instance, PAYMENT_FIELDS)), None)
+
+
+def rebuild(start: date, end: date) -> Dict[str, int]:
+    """
+    Recompute the rollups for days in [start, end) from the live and archived
+    bookings and payments. Returns the number of rollup rows written per table.
+    """
+    listing_rows = defaultdict(Counter)
+    for model in (Booking, ArchivedBooking):
+        created = (
+            model.objects.filter(created_at__date__gte=start, created_at__date__lt=end)
+            .annotate(day=TruncDate("created_at"))
+            .order_by()
+            .values_list("listing_id", "day")
+            .annotate(
+                bookings=Count("pk"),
+                cancellations=Count("pk", filter=Q(status=Booking.STATUS_CANCELED)),
+            )
+        )
+        for listing_id, day, bookings, cancellations in created:
+            listing_rows[(listing_id, day)].update(bookings=bookings, cancellations=cancellations)
+
+        stays = model.objects.filter(
+            status=Booking.STATUS_CONFIRMED, start_date__lt=end, end_date__gt=start
+        ).values_list("listing_id", "start_date", "end_date")
+        for listing_id, stay_start, stay_end in stays.iterator(chunk_size=2000):
+            day = max(stay_start, start)
+            while day < min(stay_end, end):
+                listing_rows[(listing_id, day)]["booked_nights"] += 1
+                day += ONE_DAY
+
+    payments = []
+    for model in (Payment, ArchivedPayment):
+        payments += (
+            model.objects.filter(created_at__date__gte=start, created_at__date__lt=end)
+            .annotate(day=TruncDate("created_at"))
+            .order_by()
+            .values_list("booking_reference", "day", "currency")
+            .annotate(
+                attempts=Count("pk"),
+                succeeded=Count("pk", filter=Q(status="COMPLETED")),
+                failed=Count("pk", filter=Q(status="FAILED")),
+                revenue=Sum("amount", filter=Q(status="COMPLETED")),
+            )
+        )
+    listing_of = resolve_references(row[0] for row in payments)
+    payment_rows = defaultdict(Counter)
+    for reference, day, currency, attempts, succeeded, failed, revenue in payments:
+        payment_rows[(listing_of.get(reference), day, currency)].update(
+            attempts=attempts, succeeded=succeeded, failed=failed, revenue=revenue or Decimal("0")
+        )
+
+    owners = _owners({key[0] for key in listing_rows} | {key[0] for key in payment_rows})
+    with transaction.atomic():
+        ListingDailyStats.objects.filter(day__gte=start, day__lt=end).delete()
+        PaymentDailyStats.objects.filter(day__gte=start, day__lt=end).delete()
+        ListingDailyStats.objects.bulk_create(
+            [
+                ListingDailyStats(listing_id=listing_id, day=day, host_id=owners[listing_id], **counters)
+                for (listing_id, day), counters in listing_rows.items()
+                if listing_id in owners
+            ],
+            batch_size=1000,
+        )
+        PaymentDailyStats.objects.bulk_create(
+            [
+                PaymentDailyStats(listing_id=listing_id, day=day, currency=currency,
+                                  host_id=owners.get(listing_id), **counters)
+                for (listing_id, day, currency), counters in payment_rows.items()
+            ],
+            batch_size=1000,
+        )
+    return {"listing_days": len(listing_rows), "payment_days": len(payment_rows)}
+
+
+def report(start: date, end: date, listing=None, host=None) -> dict:
+    """
+    Daily series and totals for [start, end] (inclusive), read from the
+    rollup tables only. Filter by ``listing`` and/or ``host``.
+    """
+    filters = Q(day__gte=start, day__lte=end)
+    if listing is not None:
+        filters &= Q(listing=listing)
+    if host is not None:
+        filters &= Q(host=host)
+
+    days = {}
+
+    def day_entry(day):
+        if day not in days:
+            days[day] = {"day": day, "booked_nights": 0, "bookings": 0, "cancellations": 0,
+                         "payment_attempts": 0, "payments_succeeded": 0, "payments_failed": 0,
+                         "revenue": {}}
+        return days[day]
+
+    for row in (
+        ListingDailyStats.objects.filter(filters).values("day").order_by()
+        .annotate(n=Sum("booked_nights"), b=Sum("bookings"), c=Sum("cancellations"))
+    ):
+        entry = day_entry(row["day"])
+        entry.update(booked_nights=row["n"], bookings=row["b"], cancellations=row["c"])
+
+    for row in (
+        PaymentDailyStats.objects.filter(filters).values("day", "currency").order_by()
+        .annotate(a=Sum("attempts"), s=Sum("succeeded"), f=Sum("failed"), r=Sum("revenue"))
+    ):
+        entry = day_entry(row["day"])
+        entry["payment_attempts"] += row["a"]
+        entry["payments_succeeded"] += row["s"]
+        entry["payments_failed"] += row["f"]
+        if row["r"]:
+            entry["revenue"][row["currency"]] = row["r"]
+
+    series = [days[day] for day in sorted(days)]
+    totals = {"booked_nights": 0, "bookings": 0, "cancellations": 0,
+              "payment_attempts": 0, "payments_succeeded": 0, "payments_failed": 0}
+    revenue = defaultdict(Decimal)
+    for entry in series:
+        for field in totals:
+            totals[field] += entry[field]
+        for currency, amount in entry["revenue"].items():
+            revenue[currency] += amount
+            entry["revenue"][currency] = _money(amount)
+    settled = totals["payments_succeeded"] + totals["payments_failed"]
+    totals["payment_success_rate"] = (
+        round(totals["payments_succeeded"] / settled, 4) if settled else None
+    )
+    totals["revenue"] = {currency: _money(amount) for currency, amount in revenue.items()}
+
+    # Occupancy needs the number of listings in scope (an indexed count,
+    # independent of booking history).
+    if listing is not None:
+        listing_count = 1
+    elif host is not None:
+        listing_count = Listing.objects.filter(host=host).count()
+    else:
+        listing_count = Listing.objects.count()
+    available = listing_count * ((end - start).days + 1)
+    totals["occupancy_rate"] = round(totals["booked_nights"] / available, 4) if available else None
+
+    return {"start": start, "end": end, "totals": totals, "days": series}
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Keyword search over listing title and description.
+
+Two backends share one interface:
+  - MySQL: a FULLTEXT index on (title, description) queried with
+    MATCH ... AGAINST in boolean mode, which ranks and prefix-matches natively.
+  - everything else (SQLite in development and tests): an inverted index
+    kept in the ListingSearchToken table, maintained incrementally when a
+    Listing is saved and ranked with a TF-IDF score.
+
+In both cases every query term must match; the last term also matches as a
+prefix so results update while the user types. Price, availability and
+rating filters are pushed into the same SQL query as the text match.
+"""
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Avg, Count, Exists, F, FloatField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast, Ln
+from django.utils import timezone
+
+from .geo import prefix_upper_bound
+from .models import Booking, ExternalBlock, Listing, ListingSearchToken, Review
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+MAX_TERM_LENGTH = 64
+TITLE_WEIGHT = 3
+DESCRIPTION_WEIGHT = 1
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in is it of on or the to with".split()
+)
+DOC_COUNT_CACHE_KEY = "search:doc_count"
+DOC_COUNT_CACHE_TIMEOUT = 300
+# Term characters whose order (digits, then lowercase letters) is the same
+# under binary, ASCII and MySQL's utf8mb4 collations; prefix ranges are
+# bounded with these (geo.prefix_upper_bound) rather than a high code point,
+# which such collations do not sort after every term.
+TERM_ALPHABET = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens with stopwords and over-long tokens removed."""
+    return [
+        token[:MAX_TERM_LENGTH]
+        for token in TOKEN_RE.findall((text or "").lower())
+        if token not in STOPWORDS
+    ]
+
+
+def term_weights(title: str, description: str) -> Dict[str, int]:
+    weights = Counter()
+    for token in tokenize(title):
+        weights[token] += TITLE_WEIGHT
+    for token in tokenize(description):
+        weights[token] += DESCRIPTION_WEIGHT
+    return weights
+
+
+def uses_fulltext(conn=connection) -> bool:
+    return conn.vendor == "mysql"
+
+
+def index_listing(listing: Listing) -> None:
+    """Replace the inverted-index postings for one listing."""
+    if uses_fulltext():
+        return
+    with transaction.atomic():
+        ListingSearchToken.objects.filter(listing_id=listing.pk).delete()
+        ListingSearchToken.objects.bulk_create(
+            ListingSearchToken(listing_id=listing.pk, term=term, weight=weight)
+            for term, weight in term_weights(listing.title, listing.description).items()
+        )
+
+
+def rebuild_index(batch_size: int = 1000) -> int:
+    """Rebuild the inverted index for every listing, in batches. Returns the count."""
+    if uses_fulltext():
+        return 0
+    ListingSearchToken.objects.all().delete()
+    indexed = 0
+    last_pk = None
+    while True:
+        qs = Listing.objects.order_by("pk").values_list("pk", "title", "description")
+        if last_pk is not None:
+            qs = qs.filter(pk__gt=last_pk)
+        rows = list(qs[:batch_size])
+        if not rows:
+            return indexed
+        ListingSearchToken.objects.bulk_create(
+            [
+                ListingSearchToken(listing_id=pk, term=term, weight=weight)
+                for pk, title, description in rows
+                for term, weight in term_weights(title, description).items()
+            ],
+            batch_size=5000,
+        )
+        indexed += len(rows)
+        last_pk = rows[-1][0]
+
+
+def filtered_listings(min_price=None, max_price=None, check_in=None, check_out=None,
+                      min_rating=None):
+    """Listings matching the structured (non-text) search filters."""
+    qs = Listing.objects.all()
+    if min_price is not None:
+        qs = qs.filter(price_per_night__gte=min_price)
+    if max_price is not None:
+        qs = qs.filter(price_per_night__lte=max_price)
+    if check_in and check_out:
+        # pending bookings count until their hold expires (holds.py)
+        overlapping = Booking.objects.filter(
+            Q(status=Booking.STATUS_CONFIRMED)
+            | Q(status=Booking.STATUS_PENDING, hold_expires_at__gt=timezone.now()),
+            listing=OuterRef("pk"),
+            start_date__lt=check_out,
+            end_date__gt=check_in,
+        )
+        # dates blocked on other platforms (ical.py)
+        blocked = ExternalBlock.objects.filter(
+            listing=OuterRef("pk"), start_date__lt=check_out, end_date__gt=check_in
+        )
+        qs = qs.filter(~Exists(overlapping), ~Exists(blocked))
+    if min_rating is not None:
+        avg_rating = (
+            Review.objects.filter(listing=OuterRef("pk"))
+            .values("listing")
+            .annotate(avg=Avg("rating"))
+            .values("avg")
+        )
+        qs = qs.annotate(avg_rating=Subquery(avg_rating)).filter(avg_rating__gte=min_rating)
+    return qs
+
+
+def _term_q(token: str, prefix: bool) -> Q:
+    if not prefix:
+        return Q(term=token)
+    # the range lets the index find the candidates; startswith drops the
+    # characters outside TERM_ALPHABET that a collation sorts into it
+    try:
+        upper = prefix_upper_bound(token, TERM_ALPHABET)
+    except ValueError:  # ends in a character outside TERM_ALPHABET
+        return Q(term__startswith=token)
+    bounds = Q(term__gte=token, term__lt=upper) if upper else Q(term__gte=token)
+    return bounds & Q(term__startswith=token)
+
+
+def _search_inverted(tokens, candidates, limit) -> List[Tuple[object, float]]:
+    last = len(tokens) - 1
+    matchers = [_term_q(token, i == last) for i, token in enumerate(tokens)]
+    any_term = Q()
+    for q in matchers:
+        any_term |= q
+
+    postings = ListingSearchToken.objects.filter(any_term)
+    if candidates is not None:
+        postings = postings.filter(listing__in=candidates.values("pk"))
+
+    # Document frequency per query term, in one aggregate query.
+    df = postings.aggregate(**{
+        f"df{i}": Count("listing", distinct=True, filter=q) for i, q in enumerate(matchers)
+    })
+    if not all(df.values()):
+        return []
+
+    # IDF only needs the order of magnitude of the corpus size.
+    total = max(cache.get_or_set(DOC_COUNT_CACHE_KEY, Listing.objects.count, DOC_COUNT_CACHE_TIMEOUT), 1)
+    score = Value(0.0, output_field=FloatField())
+    per_listing = postings.values("listing_id")
+    for i, q in enumerate(matchers):
+        idf = math.log(1 + total / df[f"df{i}"])
+        per_listing = per_listing.annotate(**{f"tf{i}": Sum("weight", filter=q)})
+        score = score + (1 + Ln(Cast(F(f"tf{i}"), FloatField()))) * idf
+    # A listing matches only if every term contributed some weight.
+    per_listing = per_listing.filter(**{f"tf{i}__gt": 0 for i in range(len(matchers))})
+    rows = (
+        per_listing.annotate(score=score)
+        .order_by("-score", "listing_id")
+        .values_list("listing_id", "score")[:limit]
+    )
+    return [(listing_id, float(value)) for listing_id, value in rows]
+
+
+def _search_fulltext(tokens, candidates, limit) -> List[Tuple[object, float]]:
+    last = len(tokens) - 1
+    boolean_query = " ".join(
+        f"+{token}*" if i == last else f"+{token}" for i, token in enumerate(tokens)
+    )
+    match = "MATCH (title, description) AGAINST (%s IN BOOLEAN MODE)"
+    rows = (
+        candidates.annotate(score=RawSQL(match, [boolean_query]))
+        .filter(score__gt=0)
+        .order_by("-score")
+        .values_list("pk", "score")[:limit]
+    )
+    return [(pk, float(score)) for pk, score in rows]
+
+
+def search(query: str, limit: int = 20, **filters) -> List[Tuple[Listing, float]]:
+    """
+    Ranked keyword search. Returns (listing, score) pairs, best match first.
+    ``filters`` are passed to filtered_listings().
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+    active_filters = {key: value for key, value in filters.items() if value is not None}
+    if uses_fulltext():
+        ranked = _search_fulltext(tokens, filtered_listings(**active_filters), limit)
+    else:
+        candidates = filtered_listings(**active_filters) if active_filters else None
+        ranked = _search_inverted(tokens, candidates, limit)
+    listings = Listing.objects.in_bulk([pk for pk, _ in ranked])
+    return [(listings[pk], score) for pk, score in ranked if pk in listings]
+
+
+def naive_search(query: str, limit: int = 20, **filters) -> List[Listing]:
+    """Unranked icontains scan, kept as the benchmark baseline."""
+    qs = filtered_listings(**filters)
+    for token in tokenize(query):
+        qs = qs.filter(Q(title__icontains=token) | Q(description__icontains=token))
+    return list(qs[:limit])
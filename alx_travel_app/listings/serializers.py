@@ -2,12 +2,31 @@
 """
 Serializers for the listings app: ListingSerializer, BookingSerializer.
 """
+from django.conf import settings
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Listing, Booking, Payment
+from .models import Listing, Booking, Payment, ArchivedBooking, ArchivedPayment
+from .fieldsets import SparseFieldsetSerializerMixin
+from .ical import UnsafeFeedURL, check_feed_url
+from .pricing import quote
 
+# Bounds on a stay that gets priced: quote_many() builds listings x nights arrays
+MAX_NIGHTS = 365
+MAX_DAYS_AHEAD = 731
 
-class ListingSerializer(serializers.ModelSerializer):
-    """Serializer for Listing model."""
+
+def validate_stay(start_date, end_date):
+    """Raise ValidationError unless start_date..end_date is a stay the API prices."""
+    if end_date <= start_date:
+        raise serializers.ValidationError("end_date must be after start_date")
+    if (end_date - start_date).days > MAX_NIGHTS:
+        raise serializers.ValidationError(f"Stays are limited to {MAX_NIGHTS} nights")
+    if (start_date - timezone.localdate()).days > MAX_DAYS_AHEAD:
+        raise serializers.ValidationError(f"start_date must be within {MAX_DAYS_AHEAD} days from today")
+
+
+class ListingSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    """Serializer for Listing model (supports ?fields= / ?exclude=)."""
 
     host = serializers.PrimaryKeyRelatedField(read_only=True)
 
@@ -19,6 +38,8 @@ class ListingSerializer(serializers.ModelSerializer):
             "title",
             "description",
             "location",
+            "latitude",
+            "longitude",
             "price_per_night",
             "created_at",
             "updated_at",
@@ -26,8 +47,13 @@ class ListingSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "host", "created_at", "updated_at"]
 
 
-class BookingSerializer(serializers.ModelSerializer):
-    """Serializer for Booking model."""
+class BookingSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    """
+    Serializer for Booking model (supports ?fields= / ?exclude=). The price
+    is quoted server-side on create and again when an update moves the
+    dates, and the status follows the booking and payment workflow, so
+    clients set neither. A booking cannot move to another listing.
+    """
 
     listing = serializers.PrimaryKeyRelatedField(
         queryset=Listing.objects.all())
@@ -43,18 +69,69 @@ class BookingSerializer(serializers.ModelSerializer):
             "end_date",
             "total_price",
             "status",
+            "hold_expires_at",
             "created_at",
         ]
-        read_only_fields = ["id", "guest", "created_at"]
+        read_only_fields = ["id", "guest", "total_price", "status", "hold_expires_at", "created_at"]
+
+    def validate(self, attrs):
+        instance = self.instance
+        if instance is not None and "listing" in attrs and attrs["listing"].pk != instance.listing_id:
+            raise serializers.ValidationError({"listing": "cannot be changed; make a new booking instead"})
+        start = attrs.get("start_date", getattr(instance, "start_date", None))
+        end = attrs.get("end_date", getattr(instance, "end_date", None))
+        if start is not None and end is not None:
+            validate_stay(start, end)
+        return attrs
+
+    def update(self, instance, validated_data):
+        start = validated_data.get("start_date", instance.start_date)
+        end = validated_data.get("end_date", instance.end_date)
+        if (start, end) != (instance.start_date, instance.end_date):
+            validated_data["total_price"] = quote(instance.listing_id, start, end).total
+        return super().update(instance, validated_data)
 
 
-class PaymentSerializer(serializers.ModelSerializer):
+class ArchivedBookingSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    """Read-only BookingSerializer for bookings moved to the archive."""
+
+    class Meta:
+        model = ArchivedBooking
+        fields = BookingSerializer.Meta.fields + ["archived_at"]
+        read_only_fields = fields
+
+
+class PaymentSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    """Serializer for Payment model (supports ?fields= / ?exclude=, e.g. exclude=metadata)."""
     class Meta:
         model = Payment
         fields = "__all__"
         read_only_fields = ("status", "chapa_tx_id", "metadata", "created_at", "updated_at")
 
 
+class ArchivedPaymentSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    """Read-only PaymentSerializer for payments moved to the archive."""
+    class Meta:
+        model = ArchivedPayment
+        fields = "__all__"
+
+
+class PaymentStatusSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    """A payment's status without the payer or the stored Chapa responses, for anyone holding the tx_ref."""
+    class Meta:
+        model = Payment
+        fields = ["tx_ref", "status", "amount", "currency", "updated_at"]
+        read_only_fields = fields
+
+
+class ArchivedPaymentStatusSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    """PaymentStatusSerializer for payments moved to the archive."""
+    class Meta:
+        model = ArchivedPayment
+        fields = PaymentStatusSerializer.Meta.fields
+        read_only_fields = fields
+
+
 class InitiatePaymentSerializer(serializers.Serializer):
     booking_reference = serializers.CharField(required=True)
     amount = serializers.DecimalField(max_digits=10, decimal_places=2, required=True)
@@ -62,6 +139,17 @@ class InitiatePaymentSerializer(serializers.Serializer):
     return_url = serializers.URLField(required=False, allow_blank=True)
 
 
+class BatchVerifySerializer(serializers.Serializer):
+    """tx_refs to verify in one request (duplicates are answered once)."""
+    tx_refs = serializers.ListField(child=serializers.CharField(max_length=128), allow_empty=False)
+
+    def validate_tx_refs(self, value):
+        limit = settings.BATCH_VERIFY["max_refs"]
+        if len(value) > limit:
+            raise serializers.ValidationError(f"at most {limit} tx_refs per request")
+        return value
+
+
 class ChapaWebhookSerializer(serializers.Serializer):
     """
     Accepts Chapa webhook payloads. Chapa sometimes nests fields under `data`.
@@ -74,3 +162,115 @@ class ChapaWebhookSerializer(serializers.Serializer):
     tx_ref = serializers.CharField(required=False, allow_blank=True)
     reference = serializers.CharField(required=False, allow_blank=True)
     status = serializers.CharField(required=False, allow_blank=True)
+
+
+class QuoteRequestSerializer(serializers.Serializer):
+    """Quote every listing in ``listings`` for the same stay."""
+    listings = serializers.ListField(
+        child=serializers.UUIDField(), allow_empty=False, max_length=1000)
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+
+    def validate(self, attrs):
+        validate_stay(attrs["start_date"], attrs["end_date"])
+        return attrs
+
+
+class QuoteSerializer(serializers.Serializer):
+    listing_id = serializers.CharField()
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    nights = serializers.IntegerField()
+    subtotal = serializers.DecimalField(max_digits=12, decimal_places=2)
+    discount = serializers.DecimalField(max_digits=12, decimal_places=2)
+    cleaning_fee = serializers.DecimalField(max_digits=12, decimal_places=2)
+    total = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+
+class NearbySearchSerializer(serializers.Serializer):
+    """
+    Query parameters for geo search: either a point and radius
+    (lat, lon, radius_km) or a bounding box (min_lat, min_lon, max_lat, max_lon).
+    """
+    lat = serializers.FloatField(required=False, min_value=-90, max_value=90)
+    lon = serializers.FloatField(required=False, min_value=-180, max_value=180)
+    radius_km = serializers.FloatField(required=False, min_value=0, max_value=500)
+    min_lat = serializers.FloatField(required=False, min_value=-90, max_value=90)
+    min_lon = serializers.FloatField(required=False, min_value=-180, max_value=180)
+    max_lat = serializers.FloatField(required=False, min_value=-90, max_value=90)
+    max_lon = serializers.FloatField(required=False, min_value=-180, max_value=180)
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=200, default=50)
+
+    BBOX_FIELDS = ("min_lat", "min_lon", "max_lat", "max_lon")
+
+    def validate(self, attrs):
+        if all(attrs.get(f) is not None for f in self.BBOX_FIELDS):
+            if attrs["min_lat"] > attrs["max_lat"] or attrs["min_lon"] > attrs["max_lon"]:
+                raise serializers.ValidationError("min_lat/min_lon must not exceed max_lat/max_lon")
+            attrs["mode"] = "bbox"
+        elif all(attrs.get(f) is not None for f in ("lat", "lon", "radius_km")):
+            attrs["mode"] = "radius"
+        else:
+            raise serializers.ValidationError(
+                "Provide lat, lon and radius_km, or min_lat, min_lon, max_lat and max_lon")
+        return attrs
+
+
+class ListingSearchSerializer(serializers.Serializer):
+    """Query parameters for keyword search over listings."""
+    q = serializers.CharField(max_length=200)
+    min_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    max_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    check_in = serializers.DateField(required=False)
+    check_out = serializers.DateField(required=False)
+    min_rating = serializers.FloatField(required=False, min_value=1, max_value=5)
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=100, default=20)
+
+    def validate(self, attrs):
+        if bool(attrs.get("check_in")) != bool(attrs.get("check_out")):
+            raise serializers.ValidationError("check_in and check_out must be given together")
+        if attrs.get("check_in") and attrs["check_out"] <= attrs["check_in"]:
+            raise serializers.ValidationError("check_out must be after check_in")
+        return attrs
+
+
+class SimilarListingsQuerySerializer(serializers.Serializer):
+    """Query parameters for the precomputed similar-listings lookup."""
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=50, default=10)
+
+
+class CalendarImportSerializer(serializers.Serializer):
+    """An external iCal feed to import as blocked dates: a URL to fetch, or the document itself."""
+    url = serializers.URLField(required=False, max_length=255)
+    ics = serializers.CharField(required=False, trim_whitespace=False)
+    source = serializers.CharField(required=False, max_length=255)
+
+    def validate_url(self, value):
+        try:
+            check_feed_url(value)
+        except UnsafeFeedURL as exc:
+            raise serializers.ValidationError(str(exc))
+        return value
+
+    def validate(self, attrs):
+        if bool(attrs.get("url")) == bool(attrs.get("ics")):
+            raise serializers.ValidationError("give exactly one of url and ics")
+        attrs.setdefault("source", attrs.get("url") or "upload")
+        return attrs
+
+
+class DailyReportQuerySerializer(serializers.Serializer):
+    """Query parameters for the daily rollup report (inclusive date range)."""
+    MAX_DAYS = 731
+
+    start = serializers.DateField()
+    end = serializers.DateField()
+    listing = serializers.UUIDField(required=False)
+    host = serializers.IntegerField(required=False, min_value=1)
+
+    def validate(self, attrs):
+        if attrs["end"] < attrs["start"]:
+            raise serializers.ValidationError("end must not be before start")
+        if (attrs["end"] - attrs["start"]).days >= self.MAX_DAYS:
+            raise serializers.ValidationError(f"Date range is limited to {self.MAX_DAYS} days")
+        return attrs
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Model signal handlers for the listings app.
+"""
+from django.apps import apps
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import ical, rollups
+from .holds import holds_expired
+from .models import Booking, Listing, Payment, PricingRule
+from .pricing import invalidate_profile
+from .search import index_listing
+from .tasks import site_cache
+
+SEARCHABLE_FIELDS = {"title", "description"}
+
+
+@receiver([post_save, post_delete], sender=Listing)
+def listing_changed(sender, instance, **kwargs):
+    invalidate_profile(instance.pk)
+    ical.invalidate_feeds([instance.pk])
+    rollups.listing_hosts.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=Listing)
+def listing_saved_reindex(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or (update_fields is not None and not SEARCHABLE_FIELDS & set(update_fields)):
+        return
+    index_listing(instance)
+
+
+@receiver([post_save, post_delete], sender=PricingRule)
+def pricing_rule_changed(sender, instance, **kwargs):
+    invalidate_profile(instance.listing_id)
+
+
+@receiver(pre_save, sender=Booking)
+def booking_pre_save(sender, instance, update_fields=None, raw=False, **kwargs):
+    if not raw:
+        rollups.capture_booking(instance, update_fields)
+
+
+@receiver(post_save, sender=Booking)
+def booking_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        rollups.booking_saved(instance)
+
+
+@receiver(post_delete, sender=Booking)
+def booking_deleted(sender, instance, **kwargs):
+    rollups.booking_deleted(instance)
+
+
+@receiver([post_save, post_delete], sender=Booking)
+def booking_changed_feed(sender, instance, **kwargs):
+    ical.invalidate_feeds([instance.listing_id])
+
+
+@receiver(holds_expired)
+def holds_expired_feeds(sender, bookings, **kwargs):
+    ical.invalidate_feeds(booking["listing_id"] for booking in bookings)
+
+
+@receiver(pre_save, sender=Payment)
+def payment_pre_save(sender, instance, update_fields=None, raw=False, **kwargs):
+    if not raw:
+        rollups.capture_payment(instance, update_fields)
+
+
+@receiver(post_save, sender=Payment)
+def payment_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        rollups.payment_saved(instance)
+
+
+@receiver(post_delete, sender=Payment)
+def payment_deleted(sender, instance, **kwargs):
+    rollups.payment_deleted(instance)
+
+
+def site_changed(sender, **kwargs):
+    site_cache.invalidate("current")
+
+
+if apps.is_installed("django.contrib.sites"):
+    post_save.connect(site_changed, sender="sites.Site", dispatch_uid="listings.site_changed")
+    post_delete.connect(site_changed, sender="sites.Site", dispatch_uid="listings.site_deleted")
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Precomputed "similar listings".
+
+Every listing gets a feature vector built with NumPy from its nightly price
+(log scale), location (a point on the unit sphere, so euclidean distance
+follows great-circle distance), average rating and review count (log
+scale). Columns are standardized over the catalogue and weighted with
+settings.SIMILAR_LISTINGS["weights"]. The K nearest neighbours of each
+listing are found block by block: a block of rows against the whole
+catalogue is one matrix product, and argpartition picks the K smallest
+distances per row, so memory stays at block_size x catalogue size.
+
+Results go to ListingNeighbor, and similar_listings() serves them with one
+query on the (listing, rank) unique index.
+
+refresh() recomputes only what changed since the last run: listings whose
+row or reviews changed, listings with fewer than K neighbours (new or with
+a deleted neighbour), listings that have a changed listing as a neighbour,
+and listings that a changed listing now beats their current K-th
+neighbour. Review edits and deletions are not tracked; the periodic full
+rebuild picks them up.
+"""
+import logging
+import math
+import time
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count, Max
+from django.utils import timezone
+
+from .lazy import lazy_import
+from .models import Listing, ListingNeighbor, Review
+
+np = lazy_import("numpy")
+
+logger = logging.getLogger(__name__)
+
+
+def _config(k=None, block_size=None) -> Tuple[int, int, Dict[str, float]]:
+    config = settings.SIMILAR_LISTINGS
+    return k or config["k"], block_size or config["block_size"], config["weights"]
+
+
+def _standardized(column):
+    std = column.std()
+    return (column - column.mean()) / (std if std > 0 else 1.0)
+
+
+def build_features(weights: Dict[str, float]):
+    """(listing ids, float32 feature matrix with one row per listing)."""
+    rows = list(Listing.objects.order_by("pk").values_list("pk", "price_per_night", "latitude", "longitude"))
+    if not rows:
+        return [], np.empty((0, 6), dtype=np.float32)
+    ids = [row[0] for row in rows]
+    reviews = {
+        row["listing_id"]: (row["rating"], row["count"])
+        for row in Review.objects.values("listing_id").annotate(rating=Avg("rating"), count=Count("id"))
+    }
+
+    price = np.log1p(np.array([float(row[1]) for row in rows]))
+    coords = np.array([(float(row[2]), float(row[3])) if row[2] is not None and row[3] is not None
+                       else (np.nan, np.nan) for row in rows])
+    rating = np.array([reviews.get(pk, (np.nan, 0))[0] for pk in ids], dtype=float)
+    count = np.log1p(np.array([reviews.get(pk, (np.nan, 0))[1] for pk in ids], dtype=float))
+
+    lat, lon = np.radians(coords[:, 0]), np.radians(coords[:, 1])
+    sphere = np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+    located = ~np.isnan(sphere[:, 0])
+    # listings without coordinates sit at the catalogue centroid
+    sphere[~located] = sphere[located].mean(axis=0) if located.any() else 0.0
+    sphere -= sphere.mean(axis=0)
+    spread = math.sqrt(float((sphere ** 2).sum(axis=1).mean()))
+    sphere /= spread if spread > 0 else 1.0
+
+    # unrated listings count as average
+    rating[np.isnan(rating)] = np.nanmean(rating) if (~np.isnan(rating)).any() else 0.0
+
+    features = np.column_stack([
+        weights["price"] * _standardized(price),
+        weights["location"] * sphere,
+        weights["rating"] * _standardized(rating),
+        weights["reviews"] * _standardized(count),
+    ])
+    return ids, features.astype(np.float32)
+
+
+def _squared_distances(features, norms, block):
+    # |a - b|^2 = |a|^2 + |b|^2 - 2 a.b for the whole block in one product
+    distances = norms[block, None] + norms[None, :] - 2.0 * (features[block] @ features.T)
+    distances[np.arange(len(block)), block] = np.inf
+    return distances
+
+
+def nearest(features, rows, k: int, block_size: int):
+    """
+    Yield (row indices, neighbour indices, distances) per block of ``rows``,
+    each row's K nearest other rows, nearest first.
+    """
+    total = len(features)
+    k = min(k, total - 1)
+    if k <= 0:
+        return
+    norms = np.einsum("ij,ij->i", features, features)
+    for start in range(0, len(rows), block_size):
+        block = rows[start:start + block_size]
+        distances = _squared_distances(features, norms, block)
+        candidates = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        candidate_distances = np.take_along_axis(distances, candidates, axis=1)
+        order = np.argsort(candidate_distances, axis=1, kind="stable")
+        yield (block, np.take_along_axis(candidates, order, axis=1),
+               np.sqrt(np.maximum(np.take_along_axis(candidate_distances, order, axis=1), 0.0)))
+
+
+def _write(ids, block, neighbors, distances, computed_at) -> int:
+    listing_ids = [ids[i] for i in block]
+    with transaction.atomic():
+        ListingNeighbor.objects.filter(listing_id__in=listing_ids).delete()
+        created = ListingNeighbor.objects.bulk_create(
+            ListingNeighbor(listing_id=listing_id, neighbor_id=ids[j], rank=rank,
+                            distance=float(distance), computed_at=computed_at)
+            for listing_id, row, row_distances in zip(listing_ids, neighbors.tolist(), distances.tolist())
+            for rank, (j, distance) in enumerate(zip(row, row_distances), start=1)
+        )
+    return len(created)
+
+
+def _affected(ids, features, k, block_size, since):
+    """Row indices to recompute after changes since ``since``."""
+    index = {pk: i for i, pk in enumerate(ids)}
+    k = min(k, len(ids) - 1)
+    changed = set(Listing.objects.filter(updated_at__gt=since).values_list("pk", flat=True))
+    changed |= set(Review.objects.filter(created_at__gt=since).values_list("listing_id", flat=True))
+    changed |= set(
+        Listing.objects.annotate(kept=Count("neighbors")).filter(kept__lt=k).values_list("pk", flat=True)
+    )
+    changed = sorted(index[pk] for pk in changed if pk in index)
+    if not changed:
+        return []
+
+    affected = set(changed)
+    affected.update(
+        index[pk] for pk in ListingNeighbor.objects.filter(neighbor_id__in=[ids[i] for i in changed])
+        .values_list("listing_id", flat=True).distinct() if pk in index
+    )
+    # listings a changed listing is now closer to than their current K-th neighbour
+    kth = np.full(len(ids), np.inf)
+    for row in ListingNeighbor.objects.values("listing_id").annotate(kth=Max("distance")):
+        if row["listing_id"] in index:
+            kth[index[row["listing_id"]]] = row["kth"]
+    closest = np.full(len(ids), np.inf)
+    norms = np.einsum("ij,ij->i", features, features)
+    changed = np.array(changed, dtype=np.intp)
+    for start in range(0, len(changed), block_size):
+        distances = _squared_distances(features, norms, changed[start:start + block_size])
+        closest = np.minimum(closest, distances.min(axis=0))
+    affected.update(np.flatnonzero(np.sqrt(np.maximum(closest, 0.0)) < kth).tolist())
+    return sorted(affected)
+
+
+def refresh(full: bool = False, k: Optional[int] = None, block_size: Optional[int] = None,
+            timings: Optional[dict] = None) -> int:
+    """
+    Recompute neighbours (all listings with ``full``, else what changed
+    since the last run; the first run is always full). Returns the number
+    of listings recomputed; ``timings`` collects seconds per phase.
+    """
+    k, block_size, weights = _config(k, block_size)
+    timings = {} if timings is None else timings
+    computed_at = timezone.now()
+
+    start = time.perf_counter()
+    ids, features = build_features(weights)
+    timings["load"] = time.perf_counter() - start
+
+    since = None if full else ListingNeighbor.objects.aggregate(last=Max("computed_at"))["last"]
+    start = time.perf_counter()
+    rows = list(range(len(ids))) if since is None else _affected(ids, features, k, block_size, since)
+    timings["select"] = time.perf_counter() - start
+
+    compute = write = 0.0
+    start = time.perf_counter()
+    for block, neighbors, distances in nearest(features, np.array(rows, dtype=np.intp), k, block_size):
+        written_at = time.perf_counter()
+        compute += written_at - start
+        _write(ids, block, neighbors, distances, computed_at)
+        start = time.perf_counter()
+        write += start - written_at
+    timings["compute"], timings["write"] = compute, write
+
+    logger.info("Recomputed similar listings for %s of %s listings (%s)", len(rows), len(ids),
+                "full" if since is None else f"changed since {since:%Y-%m-%d %H:%M:%S}")
+    return len(rows)
+
+
+def similar_listings(listing_id, limit: int = 10) -> List[Tuple[Listing, float]]:
+    """Up to ``limit`` precomputed neighbours of a listing, nearest first, with distances."""
+    rows = (ListingNeighbor.objects.filter(listing_id=listing_id).select_related("neighbor")
+            .order_by("rank")[:limit])
+    return [(row.neighbor, row.distance) for row in rows]
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Synthetic dataset generation for benchmarks and load tests.
+
+Listings are bulk-inserted (bypassing Listing.save and signals), so derived
+data such as the geohash is filled in here and callers rebuild any indexes
+they need afterwards.
+"""
+import random
+from decimal import Decimal
+from typing import List
+
+from django.contrib.auth import get_user_model
+
+from .geo import encode
+from .models import Listing
+
+ADJECTIVES = [
+    "cozy", "spacious", "modern", "rustic", "quiet", "sunny", "charming",
+    "luxury", "budget", "elegant", "bright", "secluded", "family", "stylish",
+]
+KINDS = [
+    "apartment", "studio", "villa", "cabin", "bungalow", "loft", "cottage",
+    "penthouse", "guesthouse", "flat", "townhouse", "chalet",
+]
+FEATURES = [
+    "pool", "wifi", "balcony", "garden", "parking", "kitchen", "beach",
+    "mountain", "lake", "fireplace", "gym", "terrace", "workspace", "sauna",
+    "airport", "market", "downtown", "hiking", "breakfast", "aircon",
+]
+SYLLABLES = ["ba", "ko", "ri", "lu", "me", "sa", "do", "ni", "ta", "wu", "ge", "fo", "ye", "zi"]
+CITIES = [
+    ("Lagos, Nigeria", 6.5244, 3.3792),
+    ("Accra, Ghana", 5.6037, -0.1870),
+    ("Kano, Nigeria", 12.0022, 8.5920),
+    ("Abuja, Nigeria", 9.0765, 7.3986),
+    ("Lome, Togo", 6.1256, 1.2254),
+    ("Cotonou, Benin", 6.3703, 2.3912),
+]
+
+
+def get_or_create_host(username: str = "synthetic-host"):
+    User = get_user_model()
+    host, _ = User.objects.get_or_create(username=username, defaults={"email": f"{username}@example.com"})
+    return host
+
+
+def landmark_names(count: int = 2000, seed: int = 0) -> List[str]:
+    """Made-up place names: a long tail of rare words, as in real descriptions."""
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < count:
+        names.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(3, 4))))
+    return sorted(names)
+
+
+def create_listings(count: int, host=None, seed: int = 0, batch_size: int = 1000) -> List[Listing]:
+    """Bulk-create ``count`` random listings spread around a few cities."""
+    rng = random.Random(seed)
+    landmarks = landmark_names(seed=seed)
+    host = host or get_or_create_host()
+    created = []
+    for offset in range(0, count, batch_size):
+        batch = []
+        for _ in range(min(batch_size, count - offset)):
+            city, lat, lon = rng.choice(CITIES)
+            lat = round(lat + rng.uniform(-0.3, 0.3), 6)
+            lon = round(lon + rng.uniform(-0.3, 0.3), 6)
+            features = rng.sample(FEATURES, 4)
+            kind = rng.choice(KINDS)
+            batch.append(Listing(
+                host=host,
+                title=f"{rng.choice(ADJECTIVES).title()} {kind} with {features[0]}",
+                description=(
+                    f"A {rng.choice(ADJECTIVES)} {kind} in {city}. "
+                    f"Guests love the {features[1]}, the {features[2]} and the {features[3]}. "
+                    f"Walking distance to {rng.choice(landmarks).title()}."
+                ),
+                location=city,
+                latitude=Decimal(str(lat)),
+                longitude=Decimal(str(lon)),
+                geohash=encode(lat, lon),
+                price_per_night=Decimal(rng.randrange(2000, 40000)) / 100,
+            ))
+        created.extend(Listing.objects.bulk_create(batch))
+    return created
@@ -5,7 +5,11 @@ from django.core.mail import send_mail
 from django.conf import settings
 
 from .models import Payment, Booking
+from . import archive, dynamic_pricing, holds, ical, rollups, similar
+from .dedup import DedupTask
+from .tiered_cache import TieredCache
 import logging
+from datetime import date, timedelta
 
 # from __future__ import absolute_import, unicode_literals
 from django.template.loader import render_to_string
@@ -15,7 +19,24 @@ from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 
-@shared_task
+# current site for email links; read for every confirmation
+site_cache = TieredCache("sites")
+
+
+def _load_site():
+    from django.apps import apps
+
+    if apps.is_installed("django.contrib.sites"):
+        from django.contrib.sites.models import Site
+
+        try:
+            site = Site.objects.get_current()
+            return {"domain": site.domain, "name": site.name}
+        except Exception:
+            logger.exception("Could not load the current site")
+    return {"domain": "localhost", "name": "Local"}
+
+@shared_task(base=DedupTask, dedup_key="payment:{payment_id}")
 def send_payment_confirmation_email(payment_id):
     try:
         payment = Payment.objects.get(id=payment_id)
@@ -49,25 +70,70 @@ def send_payment_confirmation_email(payment_id):
     logger.info("Payment confirmation email sent for payment %s", payment_id)
 
 
-@shared_task(bind=True)
-def send_booking_confirmation(self, booking_id):
-    # Import Site here to avoid module-level import errors during startup
-    try:
-        from django.contrib.sites.models import Site
-        site = Site.objects.get_current()
-    except Exception:
-        site = None
+@shared_task
+def backfill_rollups(start, end, chunk_days=None):
+    """
+    Rebuild the daily rollups for [start, end) (ISO dates), one chunk of
+    days per task run; each run enqueues the next chunk until done.
+    """
+    chunk_days = chunk_days or settings.ROLLUP_BACKFILL_CHUNK_DAYS
+    start, end = date.fromisoformat(start), date.fromisoformat(end)
+    chunk_end = min(start + timedelta(days=chunk_days), end)
+    written = rollups.rebuild(start, chunk_end)
+    logger.info("Rebuilt rollups for %s..%s: %s", start, chunk_end, written)
+    if chunk_end < end:
+        backfill_rollups.delay(chunk_end.isoformat(), end.isoformat(), chunk_days)
+    return {"start": start.isoformat(), "end": chunk_end.isoformat(), **written}
+
 
+@shared_task
+def archive_old_records(batch_size=500, max_batches=200):
+    """
+    Move finished payments and past bookings beyond the retention window to
+    the archive tables. Bounded per run; the beat schedule picks up the rest.
+    """
+    moved = {
+        "payments": archive.archive_payments(batch_size=batch_size, max_batches=max_batches),
+        "bookings": archive.archive_bookings(batch_size=batch_size, max_batches=max_batches),
+    }
+    logger.info("Archived %s", moved)
+    return moved
+
+
+@shared_task
+def expire_booking_holds(batch_size=500, max_batches=100):
+    """Cancel pending bookings whose hold expired, releasing their dates."""
+    return holds.expire_holds(batch_size=batch_size, max_batches=max_batches)
+
+
+@shared_task
+def refresh_similar_listings(full=False):
+    """Recompute "similar listings" for what changed since the last run (or everything)."""
+    return similar.refresh(full=full)
+
+
+@shared_task
+def update_dynamic_prices(dry_run=False):
+    """Recompute nightly price multipliers for the whole catalogue."""
+    return dynamic_pricing.run(dry_run=dry_run)
+
+
+@shared_task
+def import_ical_feed(listing_id, url, source=None):
+    """Fetch an external iCal feed and sync it into the listing's blocked dates."""
+    result = ical.import_blocks(listing_id, source or url, ical.fetch_events(url))
+    logger.info("Imported iCal feed %s for listing %s: %s", url, listing_id, result)
+    return result
+
+
+@shared_task(bind=True, base=DedupTask, dedup_key="booking:{booking_id}")
+def send_booking_confirmation(self, booking_id):
     try:
-        booking = Booking.objects.select_related("user", "listing").get(pk=booking_id)
+        booking = Booking.objects.select_related("guest", "listing").get(pk=booking_id)
     except Booking.DoesNotExist:
         return {"status": "error", "message": f"Booking {booking_id} does not exist"}
 
-    # Build message (use site if available)
-    if site:
-        site_info = {"domain": getattr(site, "domain", ""), "name": getattr(site, "name", "")}
-    else:
-        site_info = {"domain": "localhost", "name": "Local"}
+    site_info = site_cache.get("current", loader=_load_site)
 
     # render templates safely
     try:
@@ -78,8 +144,8 @@ def send_booking_confirmation(self, booking_id):
         html_message = None
 
     recipient = None
-    if hasattr(booking, "user") and booking.user and booking.user.email:
-        recipient = booking.user.email
+    if booking.guest and booking.guest.email:
+        recipient = booking.guest.email
     elif hasattr(booking, "guest_email") and booking.guest_email:
         recipient = booking.guest_email
 
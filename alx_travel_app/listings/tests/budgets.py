@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Query and wall-clock budget assertions.
+
+BudgetTestCase.assertWithinBudget() runs a callable once and fails when it
+issues more queries or takes longer than allowed; the failure message lists
+the SQL. assertFlatQueries() repeats that at each of SIZES rows of test
+data and also fails when the query count changes with the data size, which
+is how N+1 patterns show up. Time budgets are multiplied by
+settings.TEST_TIME_BUDGET_SCALE for slow machines.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from listings import tiered_cache
+
+
+def grow(items, factory):
+    """grow(size) callback appending factory() results to ``items`` until it has ``size``."""
+    def to(size):
+        while len(items) < size:
+            items.append(factory())
+    return to
+
+
+class BudgetTestCase(TestCase):
+    SIZES = (1, 10, 40)
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()  # throttles, dedup keys and cached pricing from other tests
+        tiered_cache.clear_local()
+
+    def assertWithinBudget(self, label, fn, queries, seconds, status=None):
+        """Run ``fn``; returns (result, query count)."""
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            result = fn()
+            elapsed = time.perf_counter() - start
+        if status is not None:
+            self.assertEqual(result.status_code, status,
+                             f"{label}: {getattr(result, 'content', b'')[:500]!r}")
+        sql = "\n".join(f"  {query['sql']}" for query in captured.captured_queries)
+        self.assertLessEqual(len(captured), queries,
+                             f"{label}: {len(captured)} queries, budget {queries}:\n{sql}")
+        limit = seconds * getattr(settings, "TEST_TIME_BUDGET_SCALE", 1)
+        self.assertLessEqual(elapsed, limit, f"{label}: took {elapsed:.3f}s, budget {limit:.3f}s")
+        return result, len(captured)
+
+    def assertFlatQueries(self, label, grow_to, fn, queries, seconds, status=None):
+        """Budget ``fn`` at each of SIZES (grow_to(size) adds the data); counts must match."""
+        counts = {}
+        for size in self.SIZES:
+            grow_to(size)
+            cache.clear()
+            tiered_cache.clear_local()
+            _, counts[size] = self.assertWithinBudget(f"{label} [{size} rows]", fn, queries, seconds,
+                                                      status=status)
+        self.assertEqual(len(set(counts.values())), 1,
+                         f"{label}: query count grows with data size {counts}")
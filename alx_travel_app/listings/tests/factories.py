@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Test data factories. Objects go through Model.save() so signal handlers
+(search index, rollups) run as they do in production.
+"""
+import itertools
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+
+from listings.models import Booking, Listing, Payment
+
+_sequence = itertools.count(1)
+
+WORDS = ["cozy", "villa", "pool", "beach", "loft", "garden", "wifi", "quiet"]
+
+
+def make_user(**kwargs):
+    n = next(_sequence)
+    kwargs.setdefault("username", f"user{n}")
+    kwargs.setdefault("email", f"user{n}@example.com")
+    return get_user_model().objects.create_user(password="pw", **kwargs)
+
+
+def make_listing(host=None, **kwargs):
+    n = next(_sequence)
+    kwargs.setdefault("title", f"{WORDS[n % len(WORDS)]} {WORDS[(n + 3) % len(WORDS)]} {n}")
+    kwargs.setdefault("description", f"A {WORDS[(n + 1) % len(WORDS)]} place near the {WORDS[n % 3]}.")
+    kwargs.setdefault("location", "Lagos, Nigeria")
+    kwargs.setdefault("latitude", Decimal("6.524400") + Decimal(n % 50) / 1000)
+    kwargs.setdefault("longitude", Decimal("3.379200") + Decimal(n % 50) / 1000)
+    kwargs.setdefault("price_per_night", Decimal("100.00") + n)
+    return Listing.objects.create(host=host or make_user(), **kwargs)
+
+
+def make_booking(listing=None, guest=None, start_date=None, nights=3, **kwargs):
+    start_date = start_date or date.today() + timedelta(days=next(_sequence) % 60)
+    return Booking.objects.create(
+        listing=listing or make_listing(),
+        guest=guest or make_user(),
+        start_date=start_date,
+        end_date=start_date + timedelta(days=nights),
+        **kwargs,
+    )
+
+
+def make_payment(user=None, booking=None, **kwargs):
+    booking = booking or make_booking(guest=user)
+    kwargs.setdefault("amount", booking.total_price)
+    kwargs.setdefault("tx_ref", f"tx-{next(_sequence)}")
+    return Payment.objects.create(
+        user=user or booking.guest, booking_reference=str(booking.id), **kwargs
+    )
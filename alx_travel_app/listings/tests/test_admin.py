@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""Keyset navigation on the large-table admin changelists."""
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from .factories import make_payment
+
+
+class KeysetChangeListTests(TestCase):
+    def setUp(self):
+        self.admin = get_user_model().objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.force_login(self.admin)
+        self.payments = [make_payment() for _ in range(3)]
+        self.url = reverse("admin:listings_payment_changelist")
+
+    def test_before_pages_below_pk(self):
+        response = self.client.get(self.url, {"before": self.payments[-1].pk})
+        self.assertEqual(response.status_code, 200)
+        shown = {payment.pk for payment in response.context["cl"].result_list}
+        self.assertEqual(shown, {payment.pk for payment in self.payments[:-1]})
+
+    def test_malformed_before_is_ignored(self):
+        for value in ("abc", "1.5", "' OR 1=1"):
+            response = self.client.get(self.url, {"before": value})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.context["cl"].result_list), len(self.payments))
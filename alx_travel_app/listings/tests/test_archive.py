@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""Moving finished payments to the archive and reading them back (listings/archive.py)."""
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from listings import archive, tiered_cache
+from listings.models import ArchivedPayment, Payment, PaymentDailyStats
+from .factories import make_payment
+
+
+class PaymentArchiveTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        tiered_cache.clear_local()
+        self.old = make_payment(status="COMPLETED")
+        self.old_pending = make_payment()
+        self.recent = make_payment(status="COMPLETED")
+        Payment.objects.filter(pk__in=[self.old.pk, self.old_pending.pk]).update(
+            created_at=timezone.now() - timedelta(days=400))
+        self.old.refresh_from_db()
+
+    def test_moves_only_old_finished_payments(self):
+        stats = list(PaymentDailyStats.objects.values())
+        self.assertEqual(archive.archive_payments(days=365, batch_size=1), 1)
+        self.assertEqual(set(Payment.objects.values_list("pk", flat=True)), {self.old_pending.pk, self.recent.pk})
+        archived = ArchivedPayment.objects.get(pk=self.old.pk)
+        for field in ("tx_ref", "status", "amount", "user_id", "booking_reference", "created_at"):
+            self.assertEqual(getattr(archived, field), getattr(self.old, field), field)
+        # archiving is not a change of history
+        self.assertEqual(list(PaymentDailyStats.objects.values()), stats)
+        self.assertEqual(archive.archive_payments(days=365), 0)
+
+    def test_archived_payment_stays_verifiable(self):
+        archive.archive_payments(days=365)
+        response = self.client.get(reverse("listings:payments-verify", args=[self.old.tx_ref]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["payment_status"], "COMPLETED")
+        self.client.force_authenticate(self.old.user)
+        batch = self.client.post(reverse("listings:payments-verify-batch"), {"tx_refs": [self.old.tx_ref]},
+                                 format="json")
+        self.assertEqual(batch.json()["results"][0]["source"], "archive")
+        webhook = self.client.post(reverse("listings:chapa-webhook"),
+                                   {"tx_ref": self.old.tx_ref, "status": "success"}, format="json")
+        self.assertEqual((webhook.status_code, webhook.json().get("archived")), (200, True))
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""The bookings API (BookingViewSet): visibility and the archive fallback."""
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from listings import archive, tiered_cache
+from listings.models import ArchivedBooking, Booking
+from .factories import make_booking, make_listing, make_user
+
+
+class BookingApiTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        tiered_cache.clear_local()
+        self.guest, self.stranger = make_user(), make_user()
+        self.listing = make_listing()
+        self.booking = make_booking(listing=self.listing, guest=self.guest)
+        # ended long ago, moved to the archive below
+        self.old = make_booking(listing=self.listing, guest=self.guest, start_date=date.today() - timedelta(days=800))
+        archive.archive_bookings(days=365)
+
+    def _ids(self, response):
+        self.assertEqual(response.status_code, 200, response.content)
+        return {row["id"] for row in response.json()}
+
+    def test_requires_authentication(self):
+        self.assertEqual(self.client.get(reverse("listings:booking-list")).status_code, 403)
+
+    def test_guest_and_host_see_the_booking(self):
+        for user in (self.guest, self.listing.host):
+            self.client.force_authenticate(user)
+            self.assertEqual(self._ids(self.client.get(reverse("listings:booking-list"))), {str(self.booking.pk)})
+
+    def test_others_do_not(self):
+        self.client.force_authenticate(self.stranger)
+        self.assertEqual(self._ids(self.client.get(reverse("listings:booking-list"))), set())
+        for pk in (self.booking.pk, self.old.pk):
+            self.assertEqual(self.client.get(reverse("listings:booking-detail", args=[pk])).status_code, 404)
+
+    def test_archived_booking_stays_readable(self):
+        self.assertFalse(Booking.objects.filter(pk=self.old.pk).exists())
+        self.assertTrue(ArchivedBooking.objects.filter(pk=self.old.pk).exists())
+        self.client.force_authenticate(self.guest)
+        response = self.client.get(reverse("listings:booking-detail", args=[self.old.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()["id"], response.json()["total_price"]),
+                         (str(self.old.pk), str(self.old.total_price)))
+        archived = self._ids(self.client.get(reverse("listings:booking-list") + "?archived=true"))
+        self.assertEqual(archived, {str(self.old.pk)})
+
+    def test_create_is_priced_server_side(self):
+        self.client.force_authenticate(self.guest)
+        start = date.today() + timedelta(days=40)
+        response = self.client.post(reverse("listings:booking-list"), {
+            "listing": str(self.listing.pk), "start_date": str(start), "end_date": str(start + timedelta(days=2)),
+            "total_price": "1.00", "status": Booking.STATUS_CONFIRMED,
+        }, format="json")
+        self.assertEqual(response.status_code, 201, response.content)
+        booking = Booking.objects.get(pk=response.json()["id"])
+        self.assertEqual((booking.guest, booking.status), (self.guest, Booking.STATUS_PENDING))
+        self.assertGreater(booking.total_price, 100)
+
+    def _detail(self, booking):
+        return reverse("listings:booking-detail", args=[booking.pk])
+
+    def test_create_rejects_empty_stay(self):
+        self.client.force_authenticate(self.guest)
+        start = date.today() + timedelta(days=40)
+        for end in (start, start - timedelta(days=1)):
+            response = self.client.post(reverse("listings:booking-list"), {
+                "listing": str(self.listing.pk), "start_date": str(start), "end_date": str(end),
+            }, format="json")
+            self.assertEqual(response.status_code, 400, response.content)
+
+    def test_changing_dates_requotes(self):
+        self.client.force_authenticate(self.guest)
+        three_nights = self.booking.total_price
+        response = self.client.patch(self._detail(self.booking), {
+            "end_date": str(self.booking.start_date + timedelta(days=30)),
+        }, format="json")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.booking.refresh_from_db()
+        self.assertGreater(self.booking.total_price, three_nights * 5)
+        self.assertEqual(response.json()["total_price"], str(self.booking.total_price))
+
+    def test_update_rejects_empty_stay(self):
+        self.client.force_authenticate(self.guest)
+        response = self.client.patch(self._detail(self.booking), {"end_date": str(self.booking.start_date)},
+                                     format="json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_listing_cannot_change(self):
+        self.client.force_authenticate(self.guest)
+        response = self.client.patch(self._detail(self.booking), {"listing": str(make_listing().pk)},
+                                     format="json")
+        self.assertEqual(response.status_code, 400)
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.listing_id, self.listing.pk)
+
+    def test_host_cannot_change_or_delete(self):
+        self.client.force_authenticate(self.listing.host)
+        response = self.client.patch(self._detail(self.booking), {
+            "end_date": str(self.booking.end_date + timedelta(days=1)),
+        }, format="json")
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.client.delete(self._detail(self.booking)).status_code, 403)
+        self.assertTrue(Booking.objects.filter(pk=self.booking.pk).exists())
+
+    def test_guest_can_delete(self):
+        self.client.force_authenticate(self.guest)
+        self.assertEqual(self.client.delete(self._detail(self.booking)).status_code, 204)
+        self.assertFalse(Booking.objects.filter(pk=self.booking.pk).exists())
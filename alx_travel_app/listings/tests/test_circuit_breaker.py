@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Tripping, half-open probes and the bulkhead (listings/circuit_breaker.py)."""
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from listings.circuit_breaker import BulkheadFullError, CircuitBreaker, CircuitOpenError
+
+
+def _fail():
+    raise RuntimeError("upstream down")
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch("listings.circuit_breaker.logger")  # trips log warnings
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker("test", min_calls=4, failure_rate=0.5, half_open_calls=2,
+                                      max_concurrent=1)
+
+    def _fail_times(self, count):
+        for _ in range(count):
+            with self.assertRaises(RuntimeError):
+                self.breaker.call(_fail)
+
+    def _open_period_elapsed(self):
+        cache.delete(self.breaker._key("open"))
+
+    def test_trips_on_failure_rate(self):
+        self.breaker.call(lambda: "ok")
+        self._fail_times(2)
+        self.assertEqual(self.breaker.state, "closed")  # 3 calls, under min_calls
+        self._fail_times(1)
+        self.assertEqual(self.breaker.state, "open")
+        calls = []
+        with self.assertRaises(CircuitOpenError) as raised:
+            self.breaker.call(calls.append, 1)
+        self.assertEqual(calls, [])
+        self.assertGreaterEqual(raised.exception.retry_after, 1)
+
+    def test_ignored_failures_do_not_trip(self):
+        for _ in range(6):
+            with self.assertRaises(RuntimeError):
+                self.breaker.call(_fail, is_failure=lambda exc: False)
+        self.assertEqual(self.breaker.state, "closed")
+
+    def test_half_open_probes_close(self):
+        self.breaker.trip("test")
+        self._open_period_elapsed()
+        self.assertEqual(self.breaker.state, "half_open")
+        self.breaker.call(lambda: "ok")
+        self.assertEqual(self.breaker.state, "half_open")
+        self.breaker.call(lambda: "ok")
+        self.assertEqual(self.breaker.state, "closed")
+
+    def test_half_open_failure_reopens(self):
+        self.breaker.trip("test")
+        self._open_period_elapsed()
+        self._fail_times(1)
+        self.assertEqual(self.breaker.state, "open")
+
+    def test_half_open_probe_quota(self):
+        self.breaker.trip("test")
+        self._open_period_elapsed()
+        # probes still running: the quota is spent once both were admitted
+        cache.set(self.breaker._key("probes"), 2)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.call(lambda: "ok")
+
+    def test_bulkhead_rejects_concurrent_call(self):
+        def nested():
+            self.assertEqual(self.breaker.free_slots(), 0)
+            with self.assertRaises(BulkheadFullError):
+                self.breaker.call(lambda: "inner")
+            return "outer"
+
+        self.assertEqual(self.breaker.call(nested), "outer")
+        self.assertEqual(self.breaker.free_slots(), 1)
+        self.assertEqual(self.breaker.call(lambda: "again"), "again")
+        self.assertEqual(self.breaker.state, "closed")
+
+    def test_slots_expire_and_are_not_freed_twice(self):
+        # a process killed mid-call leaves its slot behind until slot_seconds pass
+        breaker = CircuitBreaker("slots", max_concurrent=2, slot_seconds=0.05)
+        slot = breaker._acquire_slot()
+        self.assertEqual(breaker.free_slots(), 1)
+        time.sleep(0.1)
+        self.assertEqual(breaker.free_slots(), 2)
+        other = breaker._acquire_slot()
+        other_key = other[0]
+        # the late release of an expired slot leaves whoever holds it now alone
+        breaker._release_slot((other_key, slot[1]))
+        self.assertEqual(breaker.free_slots(), 1)
+        breaker._release_slot(other)
+        self.assertEqual(breaker.free_slots(), 2)
+
+    def test_unlimited_without_max_concurrent(self):
+        breaker = CircuitBreaker("unlimited")
+        self.assertIsNone(breaker.free_slots())
+        self.assertEqual(breaker.call(lambda: breaker.call(lambda: "inner")), "inner")
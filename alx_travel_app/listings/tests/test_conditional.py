@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""Conditional GET on read endpoints (listings/conditional.py)."""
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from listings import tiered_cache
+from .factories import make_listing
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        tiered_cache.clear_local()
+        self.listings = [make_listing() for _ in range(3)]
+        self.list_url = reverse("listings:listing-list")
+
+    def test_list_etag(self):
+        response = self.client.get(self.list_url)
+        self.assertEqual(self.client.get(self.list_url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+        self.listings[0].delete()
+        self.assertEqual(self.client.get(self.list_url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 200)
+
+    def test_list_if_modified_since_after_deletion(self):
+        last_modified = self.client.get(self.list_url)["Last-Modified"]
+        # deleting a row that is not the newest leaves Max(updated_at) as it was
+        self.listings[0].delete()
+        response = self.client.get(self.list_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["results"]), 2)
+
+    def test_detail_if_modified_since(self):
+        url = reverse("listings:listing-detail", args=[self.listings[0].pk])
+        last_modified = self.client.get(url)["Last-Modified"]
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
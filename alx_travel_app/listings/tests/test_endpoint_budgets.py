@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""Query and time budgets for the API endpoints."""
+from datetime import date, timedelta
+from unittest import mock
+
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from listings import tiered_cache
+from listings.models import ExternalBlock
+from listings.similar import refresh as refresh_similar
+from .budgets import BudgetTestCase, grow
+from .factories import make_booking, make_listing, make_payment, make_user
+
+
+class ListingEndpointBudgetTests(BudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.host = make_user()
+        self.listings = []
+        self.grow_listings = grow(self.listings, lambda: make_listing(host=self.host))
+
+    def test_list(self):
+        url = reverse("listings:listing-list") + "?limit=100"
+        # validators (max/count), page count, page rows
+        self.assertFlatQueries("listings list", self.grow_listings, lambda: self.client.get(url),
+                               queries=3, seconds=0.5, status=200)
+
+    def test_list_sparse_fieldset(self):
+        url = reverse("listings:listing-list") + "?limit=100&fields=id,title"
+        self.assertFlatQueries("listings list ?fields=", self.grow_listings, lambda: self.client.get(url),
+                               queries=3, seconds=0.5, status=200)
+
+    def test_list_not_modified(self):
+        self.grow_listings(10)
+        url = reverse("listings:listing-list")
+        etag = self.client.get(url)["ETag"]
+        self.assertWithinBudget("listings list 304", lambda: self.client.get(url, HTTP_IF_NONE_MATCH=etag),
+                                queries=1, seconds=0.2, status=304)
+
+    def test_detail(self):
+        self.grow_listings(1)
+        url = reverse("listings:listing-detail", args=[self.listings[0].pk])
+        self.assertWithinBudget("listing detail", lambda: self.client.get(url),
+                                queries=2, seconds=0.2, status=200)
+
+    def test_detail_warm(self):
+        self.grow_listings(1)
+        url = reverse("listings:listing-detail", args=[self.listings[0].pk])
+        cold = self.client.get(url).json()
+        tiered_cache.reset_stats()
+        # only the validators query; the body comes from the in-process tier
+        response, _ = self.assertWithinBudget("listing detail (warm)", lambda: self.client.get(url),
+                                              queries=1, seconds=0.2, status=200)
+        self.assertEqual(response.json(), cold)
+        tiered_cache.flush_stats()
+        self.assertEqual(tiered_cache.stats(["listing-detail"])["listing-detail"]["local_hits"], 1)
+
+        self.listings[0].title = "Renamed"
+        self.listings[0].save()
+        self.assertEqual(self.client.get(url).json()["title"], "Renamed")
+
+    def test_nearby(self):
+        url = reverse("listings:listings-nearby") + "?lat=6.5244&lon=3.3792&radius_km=50&limit=200"
+        self.assertFlatQueries("nearby", self.grow_listings, lambda: self.client.get(url),
+                               queries=2, seconds=0.5, status=200)
+
+    def test_search(self):
+        url = reverse("listings:listings-search") + "?q=place&limit=100"
+        self.assertFlatQueries("search", self.grow_listings, lambda: self.client.get(url),
+                               queries=4, seconds=0.5, status=200)
+
+    def test_similar(self):
+        self.grow_listings(max(self.SIZES) + 1)
+        refresh_similar(full=True, k=max(self.SIZES))
+        source = self.listings.pop()
+        url = reverse("listings:listings-similar", args=[source.pk])
+        limits = iter(self.SIZES)
+
+        def get():
+            return self.client.get(f"{url}?limit={next(limits)}")
+
+        # one indexed query whatever the number of neighbours served
+        self.assertFlatQueries("similar", lambda size: None, get, queries=1, seconds=0.3, status=200)
+
+    def test_quotes(self):
+        def post():
+            return self.client.post(reverse("listings:quotes"), {
+                "listings": [str(listing.pk) for listing in self.listings],
+                "start_date": str(date.today() + timedelta(days=10)),
+                "end_date": str(date.today() + timedelta(days=14)),
+            }, format="json")
+
+        self.assertFlatQueries("quotes", self.grow_listings, post, queries=2, seconds=0.5, status=200)
+
+
+class BookingEndpointBudgetTests(BudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.guest = make_user()
+        self.client.force_authenticate(self.guest)
+        self.listing = make_listing()
+        self.bookings = []
+        self.grow_bookings = grow(self.bookings, lambda: make_booking(listing=self.listing, guest=self.guest))
+
+    def test_list(self):
+        url = reverse("listings:booking-list")
+        self.assertFlatQueries("bookings list", self.grow_bookings, lambda: self.client.get(url),
+                               queries=1, seconds=0.5, status=200)
+
+    def test_archived_list(self):
+        url = reverse("listings:booking-list") + "?archived=true"
+        self.assertFlatQueries("archived bookings list", self.grow_bookings, lambda: self.client.get(url),
+                               queries=1, seconds=0.5, status=200)
+
+    def test_retrieve(self):
+        self.grow_bookings(1)
+        url = reverse("listings:booking-detail", args=[self.bookings[0].pk])
+        self.assertWithinBudget("booking detail", lambda: self.client.get(url),
+                                queries=1, seconds=0.2, status=200)
+
+    def test_create(self):
+        start = date.today() + timedelta(days=30)
+        payload = {"listing": str(self.listing.pk), "start_date": str(start),
+                   "end_date": str(start + timedelta(days=2))}
+        # listing check, pricing profile, insert with rollups, then the eager confirmation email
+        response, _ = self.assertWithinBudget(
+            "booking create", lambda: self.client.post(reverse("listings:booking-list"), payload, format="json"),
+            queries=9, seconds=0.3, status=201)
+        self.assertEqual(response.json()["guest"], self.guest.pk)
+
+    def test_daily_report(self):
+        client = APIClient()
+        client.force_authenticate(self.listing.host)
+        url = reverse("listings:reports-daily") + "?start={}&end={}".format(
+            date.today(), date.today() + timedelta(days=90))
+        self.assertFlatQueries("daily report", self.grow_bookings, lambda: client.get(url),
+                               queries=3, seconds=0.5, status=200)
+
+
+class CalendarEndpointBudgetTests(BudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.listing = make_listing()
+        self.url = reverse("listings:listings-calendar", args=[self.listing.pk])
+        self.bookings = []
+        self.grow_bookings = grow(self.bookings, lambda: make_booking(listing=self.listing))
+
+    def test_feed(self):
+        # listing title and bookings when the cached feed is cold
+        self.assertFlatQueries("ical feed", self.grow_bookings, lambda: self.client.get(self.url),
+                               queries=2, seconds=0.3, status=200)
+
+    def test_feed_cached_and_not_modified(self):
+        self.grow_bookings(10)
+        first = self.client.get(self.url)
+        self.assertEqual(first.content.count(b"BEGIN:VEVENT"), 10)
+        self.assertWithinBudget("ical feed (cached)", lambda: self.client.get(self.url),
+                                queries=0, seconds=0.1, status=200)
+        self.assertWithinBudget("ical feed 304",
+                                lambda: self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"]),
+                                queries=0, seconds=0.1, status=304)
+
+        self.grow_bookings(11)
+        changed = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.content.count(b"BEGIN:VEVENT"), 11)
+
+    def test_import(self):
+        self.client.force_authenticate(self.listing.host)
+        url = reverse("listings:listings-calendar-import", args=[self.listing.pk])
+        events = []
+
+        def grow_events(size):
+            while len(events) < size:
+                day = date.today() + timedelta(days=len(events) * 2)
+                events.append("BEGIN:VEVENT\r\nUID:ext-{}\r\nDTSTART;VALUE=DATE:{:%Y%m%d}\r\n"
+                              "DTEND;VALUE=DATE:{:%Y%m%d}\r\nEND:VEVENT".format(len(events), day,
+                                                                               day + timedelta(days=1)))
+
+        def post():
+            ics = "BEGIN:VCALENDAR\r\n" + "\r\n".join(events) + "\r\nEND:VCALENDAR\r\n"
+            return self.client.post(url, {"ics": ics, "source": "other"}, format="json")
+
+        # host check, then the upsert and the stale-block delete inside a savepoint
+        self.assertFlatQueries("ical import", grow_events, post, queries=5, seconds=0.5, status=200)
+        self.assertEqual(ExternalBlock.objects.filter(listing=self.listing).count(), len(events))
+
+
+class PaymentEndpointBudgetTests(BudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.user = make_user()
+        self.payments = []
+        self.grow_payments = grow(self.payments, lambda: make_payment(user=self.user))
+
+    def test_list(self):
+        self.client.force_authenticate(self.user)
+        url = reverse("listings:payments-list") + "?limit=100"
+        self.assertFlatQueries("payments list", self.grow_payments, lambda: self.client.get(url),
+                               queries=3, seconds=0.5, status=200)
+
+    def test_detail(self):
+        self.grow_payments(1)
+        url = reverse("listings:payments-detail", args=[self.payments[0].tx_ref])
+        self.assertWithinBudget("payment detail", lambda: self.client.get(url),
+                                queries=2, seconds=0.2, status=200)
+
+    def test_initiate(self):
+        body = {"data": {"checkout_url": "https://checkout.example/x", "reference": "ref"}}
+        with mock.patch("listings.views.chapa.check_available"), \
+                mock.patch("listings.views.chapa.initialize", return_value=body):
+            self.assertWithinBudget("initiate", lambda: self.client.post(
+                reverse("listings:payments-initiate"),
+                {"booking_reference": "b-1", "amount": "120.00", "currency": "ETB", "email": "a@example.com"},
+                format="json",
+            ), queries=5, seconds=0.3, status=200)
+
+    def test_verify_completes_and_emails(self):
+        self.grow_payments(1)
+        url = reverse("listings:payments-verify", args=[self.payments[0].tx_ref])
+        body = {"data": {"status": "success", "reference": "ref"}}
+        with mock.patch("listings.views.chapa.verify", return_value=body):
+            # includes confirming the paid booking and the eager confirmation email task
+            self.assertWithinBudget("verify", lambda: self.client.get(url),
+                                    queries=16, seconds=0.3, status=200)
+
+    def test_verify_not_modified(self):
+        self.grow_payments(1)
+        url = reverse("listings:payments-verify", args=[self.payments[0].tx_ref])
+        body = {"data": {"status": "success", "reference": "ref"}}
+        with mock.patch("listings.views.chapa.verify", return_value=body) as verify:
+            etag = self.client.get(url)["ETag"]
+            self.assertWithinBudget("verify 304", lambda: self.client.get(url, HTTP_IF_NONE_MATCH=etag),
+                                    queries=1, seconds=0.2, status=304)
+        self.assertEqual(verify.call_count, 1)
+
+    def test_batch_verify(self):
+        url = reverse("listings:payments-verify-batch")
+        body = {"data": {"status": "success", "reference": "ref"}}
+
+        def post():
+            refs = [payment.tx_ref for payment in self.payments] + ["missing-ref"]
+            return self.client.post(url, {"tx_refs": refs}, format="json")
+
+        # IN lookups for live and archived rows, then per newly completed
+        # payment its save (with rollups), the booking it confirms (with
+        # rollups) and the eager confirmation email;
+        # payments completed by earlier rounds are answered from the database.
+        # Only the HTTP call is mocked, so every verify goes through the breaker
+        # and its bulkhead (CHAPA_CIRCUIT_BREAKER["max_concurrent"])
+        self.client.force_authenticate(self.user)
+        with mock.patch("listings.chapa._send", return_value=body) as verify:
+            self.grow_payments(1)
+            self.assertWithinBudget("batch verify", post, queries=16, seconds=0.5, status=200)
+            self.grow_payments(11)
+            response, _ = self.assertWithinBudget("batch verify (10 pending)", post, queries=142, seconds=1.0,
+                                                  status=200)
+        self.assertEqual(verify.call_count, 11)
+        self.assertEqual(response.json()["summary"], {"database": 1, "chapa": 10, "not_found": 1})
+
+    def test_webhook(self):
+        self.grow_payments(1)
+        payload = {"tx_ref": self.payments[0].tx_ref, "status": "success"}
+        self.assertWithinBudget("webhook", lambda: self.client.post(
+            reverse("listings:chapa-webhook"), payload, format="json"), queries=15, seconds=0.3, status=201)
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Geohash encoding and prefix range search (listings/geo.py)."""
+from decimal import Decimal
+
+from django.test import SimpleTestCase, TestCase
+
+from listings.geo import (
+    GEOHASH_ALPHABET, cells_filter, covering_cells, encode, prefix_upper_bound, search_bbox,
+    search_radius,
+)
+from listings.models import Listing
+from .factories import make_listing
+
+
+class GeohashTests(SimpleTestCase):
+    def test_encode_known_point(self):
+        self.assertEqual(encode(57.64911, 10.40744, 11), "u4pruydqqvj")
+
+    def test_prefix_upper_bound(self):
+        self.assertEqual(prefix_upper_bound("s1"), "s2")
+        self.assertEqual(prefix_upper_bound("s9"), "sb")  # 'a' is not a geohash character
+        self.assertEqual(prefix_upper_bound("sz"), "t")
+        self.assertEqual(prefix_upper_bound("bzz"), "c")
+        self.assertIsNone(prefix_upper_bound("zz"))
+
+    def test_bounds_use_geohash_characters_only(self):
+        # so the range means the same under any collation that orders digits before letters
+        for cell in ("s1", "sz", "7zz", "0"):
+            for child in GEOHASH_ALPHABET:
+                self.assertTrue(cell <= cell + child < prefix_upper_bound(cell))
+            self.assertTrue(set(prefix_upper_bound(cell)) <= set(GEOHASH_ALPHABET))
+
+    def test_covering_cells_contain_the_box(self):
+        cells = covering_cells(6.50, 3.35, 6.55, 3.40)
+        for lat, lon in ((6.50, 3.35), (6.55, 3.40), (6.52, 3.37)):
+            self.assertTrue(any(encode(lat, lon).startswith(cell) for cell in cells))
+
+
+class GeoSearchTests(TestCase):
+    def test_cells_filter_matches_prefixes(self):
+        inside = make_listing(latitude=Decimal("6.5244"), longitude=Decimal("3.3792"))
+        make_listing(latitude=Decimal("-33.8688"), longitude=Decimal("151.2093"))
+        cell = inside.geohash[:4]
+        self.assertEqual(list(Listing.objects.filter(cells_filter({cell})).values_list("pk", flat=True)),
+                         [inside.pk])
+
+    def test_last_cell_of_alphabet(self):
+        # geohashes starting with 'z' have no upper bound
+        north_east = make_listing(latitude=Decimal("80.0"), longitude=Decimal("170.0"))
+        self.assertTrue(north_east.geohash.startswith("z"))
+        self.assertEqual(Listing.objects.filter(cells_filter({"z"})).get(), north_east)
+
+    def test_radius_and_bbox(self):
+        near = make_listing(latitude=Decimal("6.5244"), longitude=Decimal("3.3792"))
+        close = make_listing(latitude=Decimal("6.5400"), longitude=Decimal("3.3900"))
+        make_listing(latitude=Decimal("9.0765"), longitude=Decimal("7.3986"))  # Abuja
+        found = search_radius(6.5244, 3.3792, 5)
+        self.assertEqual([listing.pk for listing, _ in found], [near.pk, close.pk])
+        self.assertAlmostEqual(found[0][1], 0.0, places=3)
+        boxed = search_bbox(6.50, 3.35, 6.55, 3.40)
+        self.assertEqual({listing.pk for listing, _ in boxed}, {near.pk, close.pk})
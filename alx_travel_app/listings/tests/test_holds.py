@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Hold expiry never releases paid bookings (listings/holds.py)."""
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from listings import holds, tiered_cache
+from listings.models import Booking, Payment
+from .factories import make_booking, make_listing, make_payment, make_user
+
+
+class PaidBookingHoldTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        tiered_cache.clear_local()
+        self.listing = make_listing()
+        self.guest = make_user()
+        self.later = timezone.now() + timedelta(minutes=31)
+
+    def _booking(self):
+        return make_booking(listing=self.listing, guest=self.guest)
+
+    def _status(self, booking):
+        booking.refresh_from_db()
+        return booking.status
+
+    def test_webhook_payment_confirms_booking(self):
+        self.client.force_authenticate(self.guest)
+        start = date.today() + timedelta(days=20)
+        response = self.client.post(reverse("listings:booking-list"), {
+            "listing": str(self.listing.pk), "start_date": str(start), "end_date": str(start + timedelta(days=2)),
+        }, format="json")
+        booking = Booking.objects.get(pk=response.json()["id"])
+        payment = make_payment(booking=booking)
+        self.client.post(reverse("listings:chapa-webhook"), {"tx_ref": payment.tx_ref, "status": "success"},
+                         format="json")
+        booking.refresh_from_db()
+        self.assertEqual((booking.status, booking.hold_expires_at), (Booking.STATUS_CONFIRMED, None))
+        self.assertEqual(holds.expire_holds(now=self.later), 0)
+        self.assertEqual(self._status(booking), Booking.STATUS_CONFIRMED)
+
+    def test_expiry_skips_bookings_with_payments(self):
+        unpaid, paying, paid = self._booking(), self._booking(), self._booking()
+        make_payment(booking=paying)
+        make_payment(booking=paying, status="FAILED")
+        # completed without going through mark_completed (e.g. edited in the admin)
+        Payment.objects.filter(pk=make_payment(booking=paid).pk).update(status="COMPLETED")
+
+        self.assertEqual(holds.expire_holds(now=self.later), 1)
+        self.assertEqual(self._status(unpaid), Booking.STATUS_CANCELED)
+        self.assertEqual(self._status(paid), Booking.STATUS_CONFIRMED)
+        self.assertEqual(self._status(paying), Booking.STATUS_PENDING)
+        self.assertGreater(paying.hold_expires_at, self.later)
+
+    def test_confirm_paid_ignores_other_references(self):
+        self.assertFalse(holds.confirm_paid("order-17"))
+        booking = make_booking(listing=self.listing, guest=self.guest, status=Booking.STATUS_CANCELED)
+        self.assertFalse(holds.confirm_paid(str(booking.pk)))
+        self.assertEqual(self._status(booking), Booking.STATUS_CANCELED)
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""iCal feeds: the cached export and remote fetching (listings/ical.py)."""
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from listings import ical
+from listings.models import Booking
+from listings.serializers import CalendarImportSerializer
+from .factories import make_booking, make_listing
+
+FEED = (b"BEGIN:VCALENDAR\r\nBEGIN:VEVENT\r\nUID:a@example\r\nDTSTART;VALUE=DATE:20300101\r\n"
+        b"DTEND;VALUE=DATE:20300103\r\nEND:VEVENT\r\nEND:VCALENDAR\r\n")
+
+
+def _resolves_to(*addresses):
+    infos = [(socket.AF_INET6 if ":" in a else socket.AF_INET, socket.SOCK_STREAM, 6, "", (a, 80))
+             for a in addresses]
+    return mock.patch("listings.ical.socket.getaddrinfo", return_value=infos)
+
+
+class CheckFeedURLTests(SimpleTestCase):
+    def test_rejects_other_schemes(self):
+        for url in ("file:///etc/passwd", "ftp://example.com/feed.ics", "gopher://example.com/", "http:///x"):
+            with self.subTest(url=url), self.assertRaises(ical.UnsafeFeedURL):
+                ical.check_feed_url(url)
+
+    def test_rejects_non_public_addresses(self):
+        for address in ("127.0.0.1", "10.0.0.5", "192.168.1.1", "169.254.169.254", "0.0.0.0", "::1",
+                        "fe80::1", "fc00::1", "224.0.0.1"):
+            with self.subTest(address=address), _resolves_to(address), self.assertRaises(ical.UnsafeFeedURL):
+                ical.check_feed_url("http://feeds.example.com/calendar.ics")
+
+    def test_rejects_if_any_address_is_private(self):
+        with _resolves_to("93.184.216.34", "10.0.0.5"), self.assertRaises(ical.UnsafeFeedURL):
+            ical.check_feed_url("https://feeds.example.com/calendar.ics")
+
+    def test_unresolvable_host(self):
+        with mock.patch("listings.ical.socket.getaddrinfo", side_effect=socket.gaierror), \
+                self.assertRaises(ical.UnsafeFeedURL):
+            ical.check_feed_url("https://nowhere.invalid/calendar.ics")
+
+    def test_public_address(self):
+        with _resolves_to("93.184.216.34"):
+            self.assertEqual(ical.check_feed_url("https://feeds.example.com/calendar.ics"), "93.184.216.34")
+
+    def test_serializer_rejects_internal_url(self):
+        with _resolves_to("169.254.169.254"):
+            serializer = CalendarImportSerializer(data={"url": "http://metadata.example.com/latest/"})
+            self.assertFalse(serializer.is_valid())
+        self.assertIn("url", serializer.errors)
+
+
+class _FeedHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.hosts.append(self.headers["Host"])
+        if self.path == "/redirect":
+            self.send_response(302)
+            self.send_header("Location", "http://169.254.169.254/latest/")
+            self.end_headers()
+            return
+        body = FEED if self.path == "/feed.ics" else b"X" * 4096
+        self.send_response(200)
+        self.send_header("Content-Type", "text/calendar")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@override_settings(ICAL_FEEDS={"fetch_timeout": 5, "max_bytes": 1024})
+class FetchEventsTests(SimpleTestCase):
+    """A local server stands in for the feed; check_feed_url() is told it is public."""
+
+    def setUp(self):
+        self.server = HTTPServer(("127.0.0.1", 0), _FeedHandler)
+        self.server.hosts = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        patcher = mock.patch("listings.ical.check_feed_url", return_value="127.0.0.1")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _url(self, path):
+        return f"http://feeds.example.com:{self.server.server_port}{path}"
+
+    def test_connects_to_checked_address_with_original_host(self):
+        events = ical.fetch_events(self._url("/feed.ics"))
+        self.assertEqual([event["uid"] for event in events], ["a@example"])
+        self.assertEqual(self.server.hosts, [f"feeds.example.com:{self.server.server_port}"])
+
+    def test_redirects_are_not_followed(self):
+        with self.assertRaises(ical.UnsafeFeedURL):
+            ical.fetch_events(self._url("/redirect"))
+        self.assertEqual(len(self.server.hosts), 1)
+
+    def test_size_cap(self):
+        with self.assertRaises(ical.FeedTooLarge):
+            ical.fetch_events(self._url("/large.ics"))
+
+
+class CachedFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.listing = make_listing()
+
+    def test_render_racing_a_booking_change_is_not_kept(self):
+        render = ical.render_feed
+
+        def render_then_book(listing_id):
+            body = render(listing_id)
+            # a booking saved (and the feed invalidated) after the rows were read
+            make_booking(listing=self.listing, status=Booking.STATUS_CONFIRMED)
+            return body
+
+        with mock.patch("listings.ical.render_feed", render_then_book):
+            stale = ical.cached_feed(self.listing.pk)
+        self.assertNotIn(b"VEVENT", stale["body"])
+        self.assertIn(b"VEVENT", ical.cached_feed(self.listing.pk)["body"])
+
+    def test_cached_until_invalidated(self):
+        first = ical.cached_feed(self.listing.pk)
+        with mock.patch("listings.ical.render_feed") as render:
+            self.assertEqual(ical.cached_feed(self.listing.pk), first)
+        render.assert_not_called()
+        ical.invalidate_feeds([self.listing.pk])
+        with mock.patch("listings.ical.render_feed", return_value=b"new") as render:
+            self.assertEqual(ical.cached_feed(self.listing.pk)["body"], b"new")
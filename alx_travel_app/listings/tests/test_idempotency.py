@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Idempotency-Key replay and conflicts on create endpoints (listings/idempotency.py)."""
+import hashlib
+from datetime import date, timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from listings import idempotency, tiered_cache
+from listings.models import Booking, Payment
+from .factories import make_listing, make_user
+
+
+class IdempotentCreateTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        tiered_cache.clear_local()
+        self.guest = make_user()
+        self.listing = make_listing()
+        self.client.force_authenticate(self.guest)
+        self.url = reverse("listings:booking-list")
+
+    def _post(self, key, nights=2):
+        start = date.today() + timedelta(days=30)
+        return self.client.post(self.url, {
+            "listing": str(self.listing.pk), "start_date": str(start),
+            "end_date": str(start + timedelta(days=nights)),
+        }, format="json", HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_replay_returns_first_response(self):
+        first = self._post("key-1")
+        second = self._post("key-1")
+        self.assertEqual(first.status_code, 201, first.content)
+        self.assertEqual((second.status_code, second.json()), (201, first.json()))
+        self.assertEqual(second[idempotency.REPLAYED_HEADER], "true")
+        self.assertNotIn(idempotency.REPLAYED_HEADER, first)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_different_body_is_a_conflict(self):
+        self.assertEqual(self._post("key-1").status_code, 201)
+        response = self._post("key-1", nights=3)
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_keys_are_per_user(self):
+        self.assertEqual(self._post("key-1").status_code, 201)
+        self.client.force_authenticate(make_user())
+        response = self._post("key-1")
+        self.assertNotIn(idempotency.REPLAYED_HEADER, response)
+        self.assertEqual(Booking.objects.count(), 2)
+
+    @override_settings(IDEMPOTENCY_WAIT_TIMEOUT=0)
+    def test_in_flight_duplicate(self):
+        # another request with this key holds the lock
+        base = f"idem:bookings-create:{self.guest.pk}:{hashlib.sha256(b'key-1').hexdigest()}"
+        cache.set(f"{base}:lock", "other", 60)
+        response = self._post("key-1")
+        self.assertEqual((response.status_code, response["Retry-After"]), (409, "1"))
+        self.assertEqual(Booking.objects.count(), 0)
+
+    def test_anonymous_key_rejected(self):
+        self.client.force_authenticate(None)
+        body = {"booking_reference": "b-1", "amount": "100.00", "currency": "ETB"}
+        with mock.patch("listings.views.chapa.check_available"), \
+                mock.patch("listings.views.chapa.initialize") as initialize:
+            response = self.client.post(reverse("listings:payments-initiate"), body, format="json",
+                                        HTTP_IDEMPOTENCY_KEY="1")
+        self.assertEqual(response.status_code, 400)
+        initialize.assert_not_called()
+        self.assertFalse(Payment.objects.exists())
+
+    def test_key_too_long(self):
+        self.assertEqual(self._post("k" * (idempotency.MAX_KEY_LENGTH + 1)).status_code, 400)
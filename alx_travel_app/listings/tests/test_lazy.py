@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Deferred imports (listings/lazy.py)."""
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+from listings.lazy import lazy_import
+
+SLOW_MODULE = """
+import time
+time.sleep(0.05)  # widen the window in which other threads see a half-loaded module
+VALUE = 42
+"""
+
+
+class LazyImportTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        Path(directory.name, "lazy_slow_module.py").write_text(SLOW_MODULE)
+        sys.path.insert(0, directory.name)
+        self.addCleanup(sys.path.remove, directory.name)
+        self.addCleanup(sys.modules.pop, "lazy_slow_module", None)
+
+    def test_loads_on_first_attribute_access(self):
+        module = lazy_import("lazy_slow_module")
+        self.assertNotIn("lazy_slow_module", sys.modules)
+        self.assertEqual(module.VALUE, 42)
+        self.assertIs(lazy_import("lazy_slow_module"), sys.modules["lazy_slow_module"])
+        with self.assertRaises(AttributeError):
+            module.MISSING
+
+    def test_concurrent_first_access(self):
+        module = lazy_import("lazy_slow_module")
+        barrier = threading.Barrier(8)
+        results = []
+
+        def touch():
+            barrier.wait()
+            try:
+                results.append(module.VALUE)
+            except AttributeError as exc:
+                results.append(exc)
+
+        threads = [threading.Thread(target=touch) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [42] * 8)
+
+    def test_unknown_module(self):
+        with self.assertRaises(ImportError):
+            lazy_import("no_such_module_here")
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""Who sees what of a payment on the status endpoint (PaymentDetailView)."""
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from listings import archive, tiered_cache
+from listings.models import Payment
+from .factories import make_payment, make_user
+
+STATUS_FIELDS = {"tx_ref", "status", "amount", "currency", "updated_at"}
+
+
+class PaymentDetailTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        tiered_cache.clear_local()
+        self.payment = make_payment(metadata={"initialize_response": {"email": "guest@example.com"}})
+        self.url = reverse("listings:payments-detail", args=[self.payment.tx_ref])
+
+    def _fields(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return set(response.json())
+
+    def test_anonymous_sees_status_only(self):
+        self.assertEqual(self._fields(), STATUS_FIELDS)
+
+    def test_other_user_sees_status_only(self):
+        self.client.force_authenticate(make_user())
+        self.assertEqual(self._fields(), STATUS_FIELDS)
+
+    def test_payer_and_staff_see_full_record(self):
+        staff = make_user(is_staff=True)
+        for user in (self.payment.user, staff):
+            with self.subTest(user=user):
+                self.client.force_authenticate(user)
+                self.assertTrue({"user", "metadata"} <= self._fields())
+
+    def test_archived_payment(self):
+        Payment.objects.filter(pk=self.payment.pk).update(
+            status="COMPLETED", created_at=timezone.now() - timedelta(days=400))
+        archive.archive_payments(days=365)
+        self.assertEqual(self._fields(), STATUS_FIELDS)
+        self.client.force_authenticate(self.payment.user)
+        self.assertIn("metadata", self._fields())
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Batched quotes (listings/pricing.py)."""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from listings import serializers, tiered_cache
+from listings.pricing import quote_many
+from .factories import make_listing
+
+
+class QuoteManyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        tiered_cache.clear_local()
+        self.listing = make_listing(price_per_night=Decimal("100.00"))
+
+    def test_nightly_subtotal(self):
+        start = date(2030, 1, 7)  # a Monday, so no weekend nights
+        [quote] = quote_many([(self.listing.pk, start, start + timedelta(days=3))])
+        self.assertEqual((quote.nights, quote.total), (3, Decimal("300.00")))
+
+    def test_backwards_range_is_zero_nights(self):
+        start = date(2030, 1, 7)
+        quotes = quote_many([
+            (self.listing.pk, start, start + timedelta(days=1)),
+            # starts after every end date in the batch
+            (self.listing.pk, start + timedelta(days=20), start + timedelta(days=5)),
+        ])
+        self.assertEqual(quotes[0].total, Decimal("100.00"))
+        self.assertEqual((quotes[1].nights, quotes[1].total), (0, Decimal("0.00")))
+
+
+class QuoteEndpointTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        tiered_cache.clear_local()
+        self.listing = make_listing()
+
+    def _post(self, start, end):
+        return self.client.post(reverse("listings:quotes"), {
+            "listings": [str(self.listing.pk)], "start_date": str(start), "end_date": str(end),
+        }, format="json")
+
+    def test_bounded_stay(self):
+        start = date.today() + timedelta(days=serializers.MAX_DAYS_AHEAD - 1)
+        response = self._post(start, start + timedelta(days=serializers.MAX_NIGHTS))
+        self.assertEqual(response.status_code, 200, response.content)
+
+    def test_rejects_unbounded_ranges(self):
+        today = date.today()
+        for start, end in [
+            (today, today),
+            (today, today + timedelta(days=serializers.MAX_NIGHTS + 1)),
+            (date(2000, 1, 1), date(9999, 12, 31)),
+            (today + timedelta(days=serializers.MAX_DAYS_AHEAD + 1),
+             today + timedelta(days=serializers.MAX_DAYS_AHEAD + 3)),
+        ]:
+            with self.subTest(start=start, end=end):
+                self.assertEqual(self._post(start, end).status_code, 400)
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""Profile file retention (listings/profiling.py)."""
+import os
+import tempfile
+import time
+
+from django.test import SimpleTestCase, override_settings
+
+from listings import profiling
+
+
+class PruneTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+
+    def _touch(self, name, age_seconds):
+        path = os.path.join(self.dir, name)
+        with open(path, "w") as fh:
+            fh.write("a;b 1\n")
+        mtime = time.time() - age_seconds
+        os.utime(path, (mtime, mtime))
+        return name
+
+    def test_keeps_newest_files(self):
+        names = [self._touch(f"view.x.{i}.collapsed", age_seconds=i * 60) for i in range(5)]
+        self.assertEqual(profiling.prune(self.dir, max_files=2, max_age_days=7), 3)
+        self.assertEqual(sorted(os.listdir(self.dir)), sorted(names[:2]))
+
+    def test_deletes_expired_files(self):
+        fresh = self._touch("task.y.1.prof", age_seconds=60)
+        self._touch("task.y.2.prof", age_seconds=8 * 24 * 60 * 60)
+        other = self._touch("notes.txt", age_seconds=30 * 24 * 60 * 60)
+        self.assertEqual(profiling.prune(self.dir, max_files=100, max_age_days=7), 1)
+        self.assertEqual(sorted(os.listdir(self.dir)), sorted([fresh, other]))
+
+    def test_missing_directory(self):
+        self.assertEqual(profiling.prune(os.path.join(self.dir, "missing")), 0)
+
+    def test_save_prunes(self):
+        for i in range(3):
+            self._touch(f"view.old.{i}.collapsed", age_seconds=60 + i)
+        with override_settings(PROFILING={"dir": self.dir, "max_files": 2, "max_age_days": 7}):
+            profile = profiling.Profile("view.new").start()
+            profile.stop()
+            path = profile.save()
+        self.assertEqual(len(os.listdir(self.dir)), 2)
+        self.assertIn(os.path.basename(path), os.listdir(self.dir))
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Batch verify against the Chapa bulkhead (listings/reconcile.py)."""
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from listings import chapa, reconcile
+from listings.models import Payment
+from .factories import make_payment
+
+SUCCESS = {"data": {"status": "success", "reference": "ref"}}
+BATCH_VERIFY = {"max_refs": 200, "max_workers": 8, "max_upstream": 50, "time_budget_seconds": 5.0,
+                "busy_retry_seconds": 0.01}
+
+
+@override_settings(BATCH_VERIFY=BATCH_VERIFY)
+class BatchVerifyBulkheadTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.refs = [make_payment().tx_ref for _ in range(8)]
+
+    def test_pool_shares_a_single_slot(self):
+        with mock.patch.object(chapa.breaker, "max_concurrent", 1), \
+                mock.patch("listings.chapa._send", return_value=SUCCESS) as send:
+            results = reconcile.verify_many(self.refs)
+        self.assertEqual(send.call_count, 8)
+        self.assertEqual({result["source"] for result in results}, {"chapa"})
+
+    def test_pool_sized_to_free_slots(self):
+        with mock.patch.object(chapa.breaker, "max_concurrent", 3), \
+                mock.patch("listings.reconcile.ThreadPoolExecutor", wraps=reconcile.ThreadPoolExecutor) as pool, \
+                mock.patch("listings.chapa._send", return_value=SUCCESS):
+            cache.set(chapa.breaker._key("slot:0"), "other", 60)  # another process holds a slot
+            results = reconcile.verify_many(self.refs)
+        self.assertEqual(pool.call_args.kwargs["max_workers"], 2)
+        self.assertEqual({result["source"] for result in results}, {"chapa"})
+
+    def test_rejected_calls_wait_for_a_slot(self):
+        calls = []
+
+        def send(method, url, **kwargs):
+            calls.append(url)
+            time.sleep(0.01)
+            return SUCCESS
+
+        with mock.patch.object(chapa.breaker, "max_concurrent", 1), mock.patch("listings.chapa._send", send):
+            # the slot is taken when the pool is sized, then freed by the "other process"
+            cache.set(chapa.breaker._key("slot:0"), "other", 60)
+            threading.Timer(0.1, lambda: cache.delete(chapa.breaker._key("slot:0"))).start()
+            results = reconcile.verify_many(self.refs)
+        self.assertEqual(len(calls), 8)
+        self.assertEqual({result["source"] for result in results}, {"chapa"})
+
+    @override_settings(BATCH_VERIFY={**BATCH_VERIFY, "time_budget_seconds": 0.05})
+    def test_unavailable_after_waiting(self):
+        with mock.patch.object(chapa.breaker, "max_concurrent", 1), \
+                mock.patch("listings.chapa._send", return_value=SUCCESS) as send:
+            cache.set(chapa.breaker._key("slot:0"), "other", 60)
+            results = reconcile.verify_many(self.refs[:2])
+        send.assert_not_called()
+        self.assertEqual({result["source"] for result in results}, {"unavailable"})
+
+
+@override_settings(BATCH_VERIFY=BATCH_VERIFY)
+class BatchVerifyBudgetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.refs = [make_payment().tx_ref for _ in range(6)]
+
+    def _sources(self, results):
+        return [result["source"] for result in results]
+
+    @override_settings(BATCH_VERIFY={**BATCH_VERIFY, "max_upstream": 4})
+    def test_upstream_calls_capped(self):
+        with mock.patch("listings.chapa._send", return_value=SUCCESS) as send:
+            results = reconcile.verify_many(self.refs)
+        self.assertEqual(send.call_count, 4)
+        self.assertEqual(self._sources(results), ["chapa"] * 4 + ["unavailable"] * 2)
+        self.assertEqual(results[-1]["retry_after"], 1)
+
+    @override_settings(BATCH_VERIFY={**BATCH_VERIFY, "max_workers": 1, "time_budget_seconds": 0.15})
+    def test_time_budget(self):
+        def send(method, url, **kwargs):
+            time.sleep(0.1)
+            return SUCCESS
+
+        with mock.patch("listings.chapa._send", send):
+            results = reconcile.verify_many(self.refs)
+        self.assertEqual(self._sources(results), ["chapa"] * 2 + ["unavailable"] * 4)
+
+    def test_other_users_payments_not_found(self):
+        owner = Payment.objects.get(tx_ref=self.refs[0]).user
+        with mock.patch("listings.chapa._send", return_value=SUCCESS) as send:
+            results = reconcile.verify_many(self.refs[:2], user=owner)
+        self.assertEqual(self._sources(results), ["chapa", "not_found"])
+        self.assertEqual(send.call_count, 1)
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""Incremental daily rollups (listings/rollups.py)."""
+from collections import Counter
+from datetime import date
+from unittest import mock
+
+from django.test import TestCase
+
+from listings import rollups
+from listings.models import ListingDailyStats
+from .factories import make_listing
+
+
+class ApplyDeltaTests(TestCase):
+    def setUp(self):
+        self.listing = make_listing()
+        ListingDailyStats.objects.all().delete()  # start from no rows
+        self.day = date(2030, 1, 1)
+
+    def _bookings(self, day):
+        return ListingDailyStats.objects.get(listing=self.listing, day=day).bookings
+
+    def test_creates_missing_rows_and_increments_existing(self):
+        other_day = date(2030, 1, 2)
+        rollups._apply(ListingDailyStats, {(self.listing.pk, self.day): Counter(bookings=1)}, rollups.LISTING_KEY)
+        rollups._apply(ListingDailyStats, {
+            (self.listing.pk, self.day): Counter(bookings=1),
+            (self.listing.pk, other_day): Counter(bookings=1),
+        }, rollups.LISTING_KEY)
+        self.assertEqual((self._bookings(self.day), self._bookings(other_day)), (2, 1))
+        self.assertEqual(ListingDailyStats.objects.get(listing=self.listing, day=self.day).host_id,
+                         self.listing.host_id)
+
+    def test_row_created_concurrently_is_still_incremented(self):
+        real_create = rollups._create_rows
+
+        def racing_create(model, keys, key_fields):
+            # another writer creates and increments the row after our existence check
+            ListingDailyStats.objects.create(listing=self.listing, host=self.listing.host, day=self.day,
+                                             bookings=1)
+            real_create(model, keys, key_fields)
+
+        with mock.patch("listings.rollups._create_rows", side_effect=racing_create):
+            rollups._apply(ListingDailyStats, {(self.listing.pk, self.day): Counter(bookings=1)},
+                           rollups.LISTING_KEY)
+        self.assertEqual(self._bookings(self.day), 2)
+
+    def test_pure_decrement_creates_nothing(self):
+        rollups._apply(ListingDailyStats, {(self.listing.pk, self.day): Counter(bookings=-1)},
+                       rollups.LISTING_KEY)
+        self.assertFalse(ListingDailyStats.objects.exists())
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""Prefix matching of the last query term (listings/search.py)."""
+from django.test import TestCase
+
+from listings.search import TERM_ALPHABET, search
+from .factories import make_listing
+
+
+class PrefixSearchTests(TestCase):
+    def setUp(self):
+        self.titles = ["Jazz loft", "Jaguar villa", "Café studio", "Cafeteria flat", "Zzz cabin", "Room 19b",
+                       "Jaé cottage", "Éclair house"]
+        self.listings = {title: make_listing(title=title, description="") for title in self.titles}
+
+    def _titles(self, query):
+        return {listing.title for listing, _ in search(query)}
+
+    def test_prefix_ranges(self):
+        self.assertEqual(self._titles("ja"), {"Jazz loft", "Jaguar villa", "Jaé cottage"})
+        # the bound carries over the trailing 'z'; "jaé" sorts between "jaz" and "jb" in binary order
+        self.assertEqual(self._titles("jaz"), {"Jazz loft"})
+        self.assertEqual(self._titles("zz"), {"Zzz cabin"})  # no upper bound at all
+        self.assertEqual(self._titles("19"), {"Room 19b"})
+        self.assertEqual(self._titles("caf"), {"Café studio", "Cafeteria flat"})
+
+    def test_non_alphabet_prefix(self):
+        self.assertNotIn("é", TERM_ALPHABET)
+        self.assertEqual(self._titles("café"), {"Café studio"})
@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+"""Cache invalidation receivers (listings/signals.py)."""
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from listings import signals, tiered_cache
+from listings.tasks import site_cache
+
+
+class SiteChangedTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        tiered_cache.clear_local()
+
+    def test_drops_current_site(self):
+        site_cache.get("current", loader=lambda: {"domain": "old.example.com", "name": "Old"})
+        signals.site_changed(sender=None)
+        site = site_cache.get("current", loader=lambda: {"domain": "new.example.com", "name": "New"})
+        self.assertEqual(site["domain"], "new.example.com")
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""Query and time budgets for the Celery tasks (run eagerly)."""
+from datetime import date, timedelta
+
+from django.core import mail
+from django.db.models import Sum
+from django.utils import timezone
+
+from listings.fanout import fan_out
+from listings.holds import holds_expired
+from listings.models import Booking, ListingDailyStats, ListingDynamicPrice, ListingNeighbor, Payment
+from listings.pricing import quote
+from listings.tasks import (archive_old_records, backfill_rollups, expire_booking_holds,
+                            refresh_similar_listings, send_booking_confirmation, send_payment_confirmation_email,
+                            update_dynamic_prices)
+from .budgets import BudgetTestCase, grow
+from .factories import make_booking, make_listing, make_payment, make_user
+
+
+class TaskBudgetTests(BudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.guest = make_user()
+        self.listing = make_listing()
+
+    def test_send_payment_confirmation_email(self):
+        payment = make_payment(user=self.guest)
+        self.assertWithinBudget("send_payment_confirmation_email",
+                                lambda: send_payment_confirmation_email.delay(payment.id),
+                                queries=2, seconds=0.2)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_send_booking_confirmation(self):
+        booking = make_booking(listing=self.listing, guest=self.guest)
+        self.assertWithinBudget("send_booking_confirmation",
+                                lambda: send_booking_confirmation.delay(booking.id),
+                                queries=1, seconds=0.3)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_backfill_rollups(self):
+        bookings = []
+        start = date.today()
+        self.assertFlatQueries(
+            "backfill_rollups",
+            grow(bookings, lambda: make_booking(listing=self.listing, guest=self.guest,
+                                                start_date=start + timedelta(days=len(bookings) % 7))),
+            lambda: backfill_rollups.delay(start.isoformat(), (start + timedelta(days=7)).isoformat()),
+            queries=12, seconds=0.5,
+        )
+
+    def test_archive_old_records(self):
+        old = timezone.now() - timedelta(days=800)
+
+        def make_old():
+            booking = make_booking(listing=self.listing, guest=self.guest,
+                                   start_date=date.today() - timedelta(days=800))
+            payment = make_payment(booking=booking, status="COMPLETED")
+            Payment.objects.filter(pk=payment.pk).update(created_at=old)
+            return booking
+
+        created = []
+
+        def grow_archivable(size):
+            # archived rows leave the hot tables, so top up what is still there
+            while Booking.objects.count() < size:
+                created.append(make_old())
+
+        self.assertFlatQueries("archive_old_records", grow_archivable,
+                               lambda: archive_old_records.delay(batch_size=100),
+                               queries=12, seconds=0.5)
+
+    def test_expire_booking_holds(self):
+        live = make_booking(listing=self.listing, guest=self.guest)
+        confirmed = make_booking(listing=self.listing, guest=self.guest, status=Booking.STATUS_CONFIRMED)
+        expired, events = [], []
+
+        def make_expired():
+            booking = make_booking(listing=self.listing, guest=self.guest)
+            Booking.objects.filter(pk=booking.pk).update(hold_expires_at=timezone.now() - timedelta(minutes=1))
+            return booking
+
+        def grow_expired(size):
+            # expired holds are cancelled by each run, so add a fresh set
+            for _ in range(size):
+                expired.append(make_expired())
+
+        def receiver(sender, bookings, **kwargs):
+            events.append(len(bookings))
+
+        holds_expired.connect(receiver)
+        self.addCleanup(holds_expired.disconnect, receiver)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertFlatQueries("expire_booking_holds", grow_expired,
+                                   lambda: expire_booking_holds.delay(batch_size=100),
+                                   queries=7, seconds=0.5)
+
+        self.assertEqual(Booking.objects.filter(status=Booking.STATUS_CANCELED).count(), len(expired))
+        self.assertEqual(Booking.objects.get(pk=live.pk).status, Booking.STATUS_PENDING)
+        self.assertEqual(Booking.objects.get(pk=confirmed.pk).status, Booking.STATUS_CONFIRMED)
+        self.assertEqual(events, list(self.SIZES))
+        cancellations = ListingDailyStats.objects.aggregate(total=Sum("cancellations"))["total"]
+        self.assertEqual(cancellations, len(expired))
+
+    def test_refresh_similar_listings(self):
+        listings = [self.listing]
+        grow(listings, make_listing)(max(self.SIZES))
+        # features (2), then per block a delete and batched inserts
+        self.assertWithinBudget("refresh_similar_listings (full)",
+                                lambda: refresh_similar_listings.delay(full=True), queries=8, seconds=1.0)
+        self.assertEqual(ListingNeighbor.objects.count(), len(listings) * 10)
+
+        changed = listings[0]
+        changed.price_per_night *= 3
+        changed.save()
+        self.assertWithinBudget("refresh_similar_listings (incremental)",
+                                lambda: refresh_similar_listings.delay(), queries=12, seconds=1.0)
+        self.assertTrue(ListingNeighbor.objects.filter(listing=changed, computed_at__gt=changed.created_at)
+                        .exists())
+
+    def test_update_dynamic_prices(self):
+        start = date.today() + timedelta(days=20)
+        make_booking(listing=self.listing, guest=self.guest, status=Booking.STATUS_CONFIRMED,
+                     start_date=start, nights=14)
+        listings = [self.listing]
+
+        self.assertWithinBudget("update_dynamic_prices (dry run)",
+                                lambda: update_dynamic_prices.delay(dry_run=True), queries=3, seconds=0.5)
+        self.assertFalse(ListingDynamicPrice.objects.exists())
+        # listings, bookings, comparables, then one upsert per batch
+        self.assertFlatQueries("update_dynamic_prices", grow(listings, make_listing),
+                               lambda: update_dynamic_prices.delay(), queries=4, seconds=1.0)
+
+        self.assertEqual(ListingDynamicPrice.objects.count(), len(listings))
+        # booked (busy) nights now cost more than quiet ones
+        quiet = start + timedelta(days=100)
+        self.assertGreater(quote(self.listing.pk, start + timedelta(days=5), start + timedelta(days=8)).total,
+                           quote(self.listing.pk, quiet, quiet + timedelta(days=3)).total)
+
+    def test_fan_out_chunks(self):
+        bookings = [make_booking(listing=self.listing, guest=self.guest) for _ in range(10)]
+        published, _ = self.assertWithinBudget(
+            "fan_out send_booking_confirmation",
+            lambda: fan_out(send_booking_confirmation, [(booking.id,) for booking in bookings], chunk_size=4),
+            queries=10, seconds=0.5,
+        )
+        self.assertEqual(published, 3)
+        self.assertEqual(len(mail.outbox), 10)
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""Token-bucket throttling (listings/throttling.py), in-process buckets."""
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from listings.throttling import LocalTokenBuckets, parse_rate
+
+
+class LocalTokenBucketTests(SimpleTestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch("listings.throttling.time.monotonic", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.buckets = LocalTokenBuckets()
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate("10/min"), 10 / 60)
+        self.assertEqual(parse_rate("5/s"), 5)
+
+    def test_burst_then_refill(self):
+        bucket = [("client", 1.0, 3)]  # 1 token/s, burst 3
+        self.assertEqual([self.buckets.consume(bucket)[0] for _ in range(4)], [True, True, True, False])
+        allowed, wait = self.buckets.consume(bucket)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 1.0)
+        self.now += 1.0
+        self.assertTrue(self.buckets.consume(bucket)[0])
+        self.assertFalse(self.buckets.consume(bucket)[0])
+        self.now += 100.0  # refills up to the burst only
+        self.assertEqual([self.buckets.consume(bucket)[0] for _ in range(4)], [True, True, True, False])
+
+    def test_all_or_nothing(self):
+        client, shared = ("client", 1.0, 5), ("global", 1.0, 1)
+        self.assertTrue(self.buckets.consume([client, shared])[0])
+        # the global bucket is empty, so the client bucket is not debited either
+        for _ in range(3):
+            self.assertFalse(self.buckets.consume([client, shared])[0])
+        self.assertEqual([self.buckets.consume([client])[0] for _ in range(5)], [True] * 4 + [False])
+
+    def test_bounded(self):
+        buckets = LocalTokenBuckets(max_buckets=10)
+        for n in range(50):
+            buckets.consume([(f"ip:{n}", 1.0, 5)])
+        self.assertEqual(len(buckets), 10)
+        # once refilled, old buckets make room without evicting the recent ones
+        self.now += 10.0
+        buckets.consume([("ip:new", 1.0, 5)])
+        self.assertEqual(len(buckets), 1)
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Redis token-bucket throttling for DRF views.
+
+Each request draws one token from two buckets at once: the client's bucket
+(user id, or IP for anonymous requests) and the endpoint's global bucket.
+Both are checked and debited by a single Lua script, so a throttle decision
+is one atomic round-trip to Redis (EVALSHA). Buckets refill continuously at
+``rate`` up to ``burst`` tokens.
+
+If Redis is not configured or not reachable, buckets are kept in process
+memory instead (limits then apply per worker, at most LOCAL_MAX_BUCKETS
+buckets per worker, least recently used dropped first) and Redis is
+retried after REDIS_RETRY_SECONDS.
+
+Limits are configured per scope in settings.TOKEN_BUCKET_THROTTLES:
+
+    "payments_initiate": {"rate": "10/min", "burst": 5,
+                          "global_rate": "600/min", "global_burst": 100}
+"""
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+
+from .redis_utils import get_redis
+
+logger = logging.getLogger(__name__)
+
+REDIS_RETRY_SECONDS = 5.0
+LOCAL_MAX_BUCKETS = 10000
+PERIODS = {"s": 1, "sec": 1, "m": 60, "min": 60, "h": 3600, "hour": 3600, "d": 86400, "day": 86400}
+
+# KEYS: bucket keys. ARGV: requested tokens, then (rate per second, capacity)
+# for each key. Returns {allowed (0/1), seconds to wait as a string}.
+TOKEN_BUCKET_LUA = """
+local requested = tonumber(ARGV[1])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local tokens, rates, capacities = {}, {}, {}
+local wait = 0
+for i = 1, #KEYS do
+  local rate = tonumber(ARGV[i * 2])
+  local capacity = tonumber(ARGV[i * 2 + 1])
+  local state = redis.call('HMGET', KEYS[i], 'tokens', 'ts')
+  local level = tonumber(state[1]) or capacity
+  local ts = tonumber(state[2]) or now
+  level = math.min(capacity, level + math.max(0, now - ts) * rate)
+  if level < requested then
+    wait = math.max(wait, (requested - level) / rate)
+  end
+  tokens[i], rates[i], capacities[i] = level, rate, capacity
+end
+local allowed = 0
+if wait == 0 then allowed = 1 end
+for i = 1, #KEYS do
+  local level = tokens[i]
+  if allowed == 1 then level = level - requested end
+  redis.call('HSET', KEYS[i], 'tokens', tostring(level), 'ts', tostring(now))
+  redis.call('PEXPIRE', KEYS[i], math.ceil(capacities[i] / rates[i] * 1000) + 1000)
+end
+return {allowed, tostring(wait)}
+"""
+
+
+def parse_rate(rate):
+    """'10/min' -> 10 / 60 tokens per second."""
+    count, _, period = rate.partition("/")
+    return int(count) / PERIODS[period.strip().lower()]
+
+
+class LocalTokenBuckets:
+    """
+    In-process buckets with the same semantics as the Lua script. At most
+    ``max_buckets`` are kept, least recently used dropped first; buckets
+    that have refilled completely are dropped too (a missing bucket is a
+    full one).
+    """
+
+    def __init__(self, max_buckets=LOCAL_MAX_BUCKETS):
+        self.max_buckets = max_buckets
+        self._buckets = OrderedDict()  # key -> (level, ts, time it is full again)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def _evict(self, now):
+        # oldest first: drop refilled buckets, and any beyond max_buckets
+        while self._buckets:
+            key, (_, _, full_at) = next(iter(self._buckets.items()))
+            if full_at > now and len(self._buckets) <= self.max_buckets:
+                break
+            del self._buckets[key]
+
+    def consume(self, buckets, requested=1):
+        now = time.monotonic()
+        with self._lock:
+            levels = []
+            wait = 0.0
+            for key, rate, capacity in buckets:
+                level, ts, _ = self._buckets.get(key, (capacity, now, now))
+                level = min(capacity, level + max(0.0, now - ts) * rate)
+                if level < requested:
+                    wait = max(wait, (requested - level) / rate)
+                levels.append(level)
+            allowed = wait == 0
+            for (key, rate, capacity), level in zip(buckets, levels):
+                level = level - requested if allowed else level
+                self._buckets[key] = (level, now, now + (capacity - level) / rate)
+                self._buckets.move_to_end(key)
+            self._evict(now)
+            return allowed, wait
+
+
+class TokenBucketLimiter:
+    def __init__(self):
+        self.local = LocalTokenBuckets()
+        self._script = None
+        self._redis_down_until = 0.0
+
+    def _redis_script(self):
+        if time.monotonic() < self._redis_down_until:
+            return None
+        if self._script is None:
+            client = get_redis()
+            if client is None:
+                return None
+            self._script = client.register_script(TOKEN_BUCKET_LUA)
+        return self._script
+
+    def consume(self, buckets, requested=1):
+        """
+        Take ``requested`` tokens from every (key, rate_per_sec, capacity)
+        bucket, or from none. Returns (allowed, seconds_to_wait).
+        """
+        script = self._redis_script()
+        if script is not None:
+            args = [requested]
+            for _, rate, capacity in buckets:
+                args += [rate, capacity]
+            try:
+                allowed, wait = script(keys=[key for key, _, _ in buckets], args=args)
+                return bool(int(allowed)), float(wait)
+            except Exception:
+                logger.warning("Redis throttle unavailable, using in-process buckets", exc_info=True)
+                self._redis_down_until = time.monotonic() + REDIS_RETRY_SECONDS
+        return self.local.consume(buckets, requested)
+
+
+limiter = TokenBucketLimiter()
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    DRF throttle backed by TokenBucketLimiter. Subclasses set ``scope``;
+    otherwise the view's ``throttle_scope`` is used.
+    """
+    scope = None
+    key_prefix = "tb"
+
+    def get_config(self, view):
+        scope = self.scope or getattr(view, "throttle_scope", None)
+        return scope, settings.TOKEN_BUCKET_THROTTLES.get(scope)
+
+    def get_client_ident(self, request):
+        if request.user and request.user.is_authenticated:
+            return f"user:{request.user.pk}"
+        return f"ip:{self.get_ident(request)}"
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        scope, config = self.get_config(view)
+        if not config:
+            return True
+
+        buckets = []
+        if config.get("rate"):
+            rate = parse_rate(config["rate"])
+            buckets.append((
+                f"{self.key_prefix}:{scope}:{self.get_client_ident(request)}",
+                rate, config.get("burst") or max(1, math.ceil(rate)),
+            ))
+        if config.get("global_rate"):
+            rate = parse_rate(config["global_rate"])
+            buckets.append((
+                f"{self.key_prefix}:{scope}:global",
+                rate, config.get("global_burst") or max(1, math.ceil(rate)),
+            ))
+        if not buckets:
+            return True
+
+        allowed, wait = limiter.consume(buckets)
+        if not allowed:
+            self.wait_seconds = wait
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class InitiatePaymentThrottle(TokenBucketThrottle):
+    scope = "payments_initiate"
+
+
+class VerifyPaymentThrottle(TokenBucketThrottle):
+    scope = "payments_verify"
+
+
+class BatchVerifyPaymentThrottle(TokenBucketThrottle):
+    scope = "payments_verify_batch"
+
+
+class ChapaWebhookThrottle(TokenBucketThrottle):
+    scope = "chapa_webhook"
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Two-tier cache for hot, rarely changing reference data.
+
+Tier 1 is a per-process LRU (bounded by ``maxsize`` entries, each kept at
+most ``ttl`` seconds); tier 2 is the default Django cache (Redis in
+production). A lookup tries the LRU, then Redis, then the loader, and fills
+the tiers it missed.
+
+invalidate() drops keys from both tiers and publishes them on a Redis
+pub/sub channel. Every process (gunicorn workers, Celery workers) runs one
+daemon thread subscribed to it, started on first use and again after a
+fork, which drops the keys from its own LRU as soon as the message arrives.
+If the subscription breaks, the thread clears all local tiers before it
+resubscribes, since messages may have been missed; the LRU TTL bounds
+staleness in any case. Loads that race with an invalidation are not kept
+in the LRU (a per-cache generation counter). Without Redis (development)
+there is a single process and no channel.
+
+Hits and misses per tier are counted in-process and added to shared
+counters in the default cache every ``stats_flush_seconds``; stats()
+reads them (``manage.py tiered_cache_stats``). Settings live in
+settings.TIERED_CACHE.
+
+    profiles = TieredCache("pricing", prefix="pricing:profile:")
+    profiles.get_many(ids, loader=build_profiles)
+    profiles.invalidate(listing_id)
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from .redis_utils import get_redis
+
+logger = logging.getLogger(__name__)
+
+STATS_EVENTS = ("local_hits", "local_misses", "remote_hits", "remote_misses")
+
+_MISSING = object()
+_registry: Dict[str, "TieredCache"] = {}
+_listener_lock = threading.Lock()
+_listener_pid = None
+
+
+class LocalLRU:
+    """Thread-safe LRU of at most ``maxsize`` entries, each valid for ``ttl`` seconds."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, generation=None):
+        """Store ``value`` unless the cache was invalidated since ``generation``."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, keys):
+        with self._lock:
+            self.generation += 1
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class TieredCache:
+    """A named LRU + Redis cache; see the module docstring."""
+
+    def __init__(self, name: str, prefix: Optional[str] = None, maxsize: Optional[int] = None,
+                 ttl: Optional[float] = None, remote_ttl: Optional[float] = None):
+        config = settings.TIERED_CACHE
+        self.name = name
+        self.prefix = prefix if prefix is not None else f"tiered:{name}:"
+        self.remote_ttl = remote_ttl if remote_ttl is not None else config["remote_ttl"]
+        self.local = LocalLRU(config["maxsize"] if maxsize is None else maxsize,
+                              config["ttl"] if ttl is None else ttl)
+        self._counts = dict.fromkeys(STATS_EVENTS, 0)
+        self._counts_lock = threading.Lock()
+        self._flushed_at = time.monotonic()
+        _registry[name] = self
+
+    def _remote_key(self, key) -> str:
+        return f"{self.prefix}{key}"
+
+    def _count(self, **events):
+        with self._counts_lock:
+            for event, count in events.items():
+                self._counts[event] += count
+            if time.monotonic() - self._flushed_at < settings.TIERED_CACHE["stats_flush_seconds"]:
+                return
+            counts, self._counts = self._counts, dict.fromkeys(STATS_EVENTS, 0)
+            self._flushed_at = time.monotonic()
+        for event, count in counts.items():
+            if count:
+                _add_to_counter(_stats_key(self.name, event), count)
+
+    def get(self, key, loader: Optional[Callable] = None, default=None):
+        """Value for ``key``; on a miss in both tiers, ``loader()`` (if given) fills them."""
+        if loader is None:
+            return self.get_many([key]).get(key, default)
+        return self.get_many([key], lambda missing: {key: loader()}).get(key, default)
+
+    def get_many(self, keys: Iterable, loader: Optional[Callable] = None) -> dict:
+        """
+        {key: value} for ``keys``. ``loader(missing_keys)`` returns a dict
+        for keys found in neither tier; keys it leaves out stay missing.
+        Keys are stored by str(), so UUIDs and their strings are one entry.
+        """
+        _ensure_listener()
+        keys = {str(key): key for key in keys}
+        found = {}
+        for name in keys:
+            value = self.local.get(name)
+            if value is not _MISSING:
+                found[name] = value
+        missing = [name for name in keys if name not in found]
+        if missing:
+            generation = self.local.generation
+            remote = cache.get_many([self._remote_key(name) for name in missing])
+            remote = {name: remote[self._remote_key(name)] for name in missing if self._remote_key(name) in remote}
+            for name, value in remote.items():
+                self.local.set(name, value, generation)
+            found.update(remote)
+            self._count(remote_hits=len(remote), remote_misses=len(missing) - len(remote))
+
+            unloaded = [keys[name] for name in missing if name not in remote]
+            loaded = loader(unloaded) if unloaded and loader is not None else None
+            if loaded:
+                loaded = {str(key): value for key, value in loaded.items()}
+                cache.set_many({self._remote_key(name): value for name, value in loaded.items()},
+                               self.remote_ttl)
+                for name, value in loaded.items():
+                    self.local.set(name, value, generation)
+                found.update(loaded)
+        self._count(local_hits=len(keys) - len(missing), local_misses=len(missing))
+        return {keys[name]: value for name, value in found.items() if name in keys}
+
+    def set(self, key, value) -> None:
+        cache.set(self._remote_key(key), value, self.remote_ttl)
+        self.local.set(str(key), value)
+
+    def invalidate(self, *keys) -> None:
+        """
+        Drop ``keys`` from both tiers in every process. Inside a transaction
+        this happens again on commit, so a process that reloaded the
+        pre-commit value in between does not keep it.
+        """
+        keys = list(dict.fromkeys(str(key) for key in keys))
+        if not keys:
+            return
+        self._invalidate(keys)
+        if connection.in_atomic_block:
+            transaction.on_commit(lambda: self._invalidate(keys))
+
+    def _invalidate(self, keys):
+        self.local.delete(keys)
+        cache.delete_many([self._remote_key(key) for key in keys])
+        _publish({"cache": self.name, "keys": keys})
+
+
+def _stats_key(name, event):
+    return f"tiered:stats:{name}:{event}"
+
+
+def _add_to_counter(key, count):
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key, count)
+    except ValueError:  # evicted between add and incr
+        cache.set(key, count, None)
+
+
+def stats(names: Optional[Iterable[str]] = None) -> Dict[str, dict]:
+    """{cache name: {event: count, "local_ratio", "remote_ratio"}} from the shared counters."""
+    names = sorted(names or _registry)
+    keys = {_stats_key(name, event): (name, event) for name in names for event in STATS_EVENTS}
+    result = {name: dict.fromkeys(STATS_EVENTS, 0) for name in names}
+    for key, value in cache.get_many(list(keys)).items():
+        name, event = keys[key]
+        result[name][event] = value
+    for counts in result.values():
+        local = counts["local_hits"] + counts["local_misses"]
+        remote = counts["remote_hits"] + counts["remote_misses"]
+        counts["local_ratio"] = counts["local_hits"] / local if local else None
+        counts["remote_ratio"] = counts["remote_hits"] / remote if remote else None
+    return result
+
+
+def reset_stats(names: Optional[Iterable[str]] = None) -> None:
+    cache.delete_many([_stats_key(name, event) for name in (names or _registry) for event in STATS_EVENTS])
+
+
+def flush_stats() -> None:
+    """Add this process's pending hit/miss counts to the shared counters now."""
+    for tiered in _registry.values():
+        with tiered._counts_lock:
+            tiered._flushed_at = 0.0
+        tiered._count()
+
+
+def clear_local() -> None:
+    """Empty every LRU tier in this process."""
+    for tiered in _registry.values():
+        tiered.local.clear()
+
+
+def _handle(data) -> None:
+    try:
+        message = json.loads(data)
+        tiered = _registry.get(message["cache"])
+    except (TypeError, ValueError, KeyError):
+        logger.warning("Ignoring malformed cache invalidation message %r", data)
+        return
+    if tiered is not None:
+        tiered.local.delete(message["keys"])
+
+
+def _publish(message) -> None:
+    redis = get_redis()
+    if redis is None:
+        return
+    try:
+        redis.publish(settings.TIERED_CACHE["channel"], json.dumps(message))
+    except Exception:
+        logger.exception("Could not publish cache invalidation for %s", message["cache"])
+
+
+def _listen(redis) -> None:
+    channel = settings.TIERED_CACHE["channel"]
+    while True:
+        try:
+            pubsub = redis.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(channel)
+            for message in pubsub.listen():
+                _handle(message["data"])
+        except Exception:
+            logger.warning("Cache invalidation subscription lost; clearing local tiers", exc_info=True)
+            clear_local()
+            time.sleep(1.0)
+
+
+def _ensure_listener() -> None:
+    """Start this process's invalidation subscriber (again after a fork)."""
+    global _listener_pid
+    pid = os.getpid()
+    if _listener_pid == pid:
+        return
+    with _listener_lock:
+        if _listener_pid == pid:
+            return
+        _listener_pid = pid
+        redis = get_redis()
+        if redis is None:
+            return
+        # a forked child inherits entries its parent may never hear about
+        clear_local()
+        threading.Thread(target=_listen, args=(redis,), name="tiered-cache-invalidation", daemon=True).start()
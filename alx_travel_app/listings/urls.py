@@ -2,30 +2,26 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
-# from .views import ListingViewSet, BookingViewSet
 from .views import InitiatePaymentView, VerifyPaymentView, chapa_webhook    
+from .views import BatchVerifyPaymentView
+from .views import QuoteView, NearbyListingsView, ListingSearchView, DailyReportView, SimilarListingsView
+from .views import ListingViewSet, BookingViewSet, PaymentListView, PaymentDetailView
+from .views import listing_calendar, ListingCalendarImportView
 
-# Swagger / OpenAPI imports (drf_yasg). If you prefer drf-spectacular, swap accordingly.
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
+# Swagger / OpenAPI views (drf_yasg, built lazily). If you prefer drf-spectacular, swap accordingly.
+from alx_travel_app.api_docs import LazySchemaView
 
 app_name = "listings"
 
 router = DefaultRouter()
-# router.register(r'listings', ListingViewSet, basename='listing')
-# router.register(r'bookings', BookingViewSet, basename='booking')
+router.register(r'listings', ListingViewSet, basename='listing')
+router.register(r'bookings', BookingViewSet, basename='booking')
 
-schema_view = get_schema_view(
-    openapi.Info(
-        title="ALX Travel App API",
-        default_version='v1',
-        description="API for Listings and Bookings (alx_travel_app_0x01)",
-        contact=openapi.Contact(email="dev@example.com"),
-   ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-    authentication_classes=(),
+schema_view = LazySchemaView(
+    title="ALX Travel App API",
+    default_version='v1',
+    description="API for Listings and Bookings (alx_travel_app_0x01)",
+    contact_email="dev@example.com",
 )
 
 urlpatterns = [
@@ -35,7 +31,17 @@ urlpatterns = [
     path('api/docs/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     path('api/redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
     path("payments/initiate/", InitiatePaymentView.as_view(), name="payments-initiate"),
+    path("payments/verify/", BatchVerifyPaymentView.as_view(), name="payments-verify-batch"),
     path("payments/verify/<str:tx_ref>/", VerifyPaymentView.as_view(), name="payments-verify"),
     path("payments/webhook/chapa/", chapa_webhook, name="chapa-webhook"),
+    path("quotes/", QuoteView.as_view(), name="quotes"),
+    path("nearby/", NearbyListingsView.as_view(), name="listings-nearby"),
+    path("search/", ListingSearchView.as_view(), name="listings-search"),
+    path("similar/<uuid:pk>/", SimilarListingsView.as_view(), name="listings-similar"),
+    path("calendar/<uuid:pk>.ics", listing_calendar, name="listings-calendar"),
+    path("calendar/<uuid:pk>/import/", ListingCalendarImportView.as_view(), name="listings-calendar-import"),
+    path("reports/daily/", DailyReportView.as_view(), name="reports-daily"),
+    path("payments/", PaymentListView.as_view(), name="payments-list"),
+    path("payments/<str:tx_ref>/", PaymentDetailView.as_view(), name="payments-detail"),
 ]
 
@@ -1,36 +1,86 @@
-from django.shortcuts import render
+from django.db.models import Q
+from django.http import Http404, HttpResponse
+from django.shortcuts import render, get_object_or_404
 
 # Create your views here.
 import os
-import requests
 import uuid
 import logging
 from django.conf import settings
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import status, permissions, viewsets
-from .models import Payment, Booking
+from rest_framework import status, permissions, viewsets, generics
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.pagination import LimitOffsetPagination
+from .models import Payment, Booking, Listing, ArchivedBooking, ArchivedPayment
 from .serializers import PaymentSerializer, BookingSerializer, InitiatePaymentSerializer, ChapaWebhookSerializer
-from .tasks import send_payment_confirmation_email  # celery task
+from .serializers import QuoteRequestSerializer, QuoteSerializer
+from .serializers import ListingSerializer, NearbySearchSerializer, ListingSearchSerializer
+from .serializers import DailyReportQuerySerializer, ArchivedBookingSerializer, ArchivedPaymentSerializer
+from .serializers import PaymentStatusSerializer, ArchivedPaymentStatusSerializer
+from .serializers import SimilarListingsQuerySerializer, CalendarImportSerializer, BatchVerifySerializer
+from .pricing import quote_many
+from .geo import search_bbox, search_radius
+from .search import search as search_listings
+from .similar import similar_listings
+from . import ical
+from .rollups import report as rollup_report
+from .reconcile import apply_verification, verify_many
+from .idempotency import idempotent
+from .fieldsets import FIELDS_PARAM, EXCLUDE_PARAM, SparseFieldsetViewMixin, sparse_queryset
+from .fast_serializers import FastReadMixin
+from .conditional import ConditionalGetMixin, conditional_response, make_etag, object_validators, set_validators
+from .tiered_cache import TieredCache
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_safe
+from . import chapa
+from .throttling import InitiatePaymentThrottle, VerifyPaymentThrottle, ChapaWebhookThrottle
+from .throttling import BatchVerifyPaymentThrottle
 from django.views.decorators.csrf import csrf_exempt
-from rest_framework.decorators import api_view, action
-from .tasks import send_booking_confirmation
+from rest_framework.decorators import api_view, action, throttle_classes
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
 
 logger = logging.getLogger(__name__)
 
+# serialized listing detail, valid while the row's updated_at is unchanged
+listing_details = TieredCache("listing-detail")
 
-CHAPA_BASE = getattr(settings, "CHAPA_BASE_URL", "https://api.chapa.co/v1")
-CHAPA_INIT_ENDPOINT = f"{CHAPA_BASE}/transaction/initialize"
-CHAPA_VERIFY_ENDPOINT = f"{CHAPA_BASE}/transaction/verify"  # append /{tx_ref}
+
+def chapa_unavailable_response(exc):
+    return Response(
+        {"detail": "Payment provider temporarily unavailable", "retry_after": exc.retry_after},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+SPARSE_FIELDSET_PARAMS = [
+    openapi.Parameter(FIELDS_PARAM, openapi.IN_QUERY, type=openapi.TYPE_STRING, required=False,
+                      description="Comma-separated fields to return (others are not loaded)"),
+    openapi.Parameter(EXCLUDE_PARAM, openapi.IN_QUERY, type=openapi.TYPE_STRING, required=False,
+                      description="Comma-separated fields to leave out (e.g. description, metadata)"),
+]
+
+
+class ListPagination(LimitOffsetPagination):
+    default_limit = 50
+    max_limit = 500
+
+
+IDEMPOTENCY_KEY_PARAM = openapi.Parameter(
+    "Idempotency-Key", openapi.IN_HEADER, type=openapi.TYPE_STRING, required=False,
+    description="Retries with the same key replay the first response instead of creating a new record "
+                "(authenticated requests only; rejected with 400 otherwise)",
+)
 
 
 class InitiatePaymentView(APIView):
     permission_classes = [permissions.AllowAny]  # adjust as needed
+    throttle_classes = [InitiatePaymentThrottle]
 
     @swagger_auto_schema(request_body=InitiatePaymentSerializer,
+                         manual_parameters=[IDEMPOTENCY_KEY_PARAM],
                          responses={
                              200: openapi.Response(
                                  description="Init successful",
@@ -45,8 +95,13 @@ class InitiatePaymentView(APIView):
                                  )
                              ),
                              400: "Bad Request",
-                             502: "Payment initialization failed"
+                             409: "Duplicate request still in progress",
+                             422: "Idempotency-Key reused with a different body",
+                             429: "Rate limited, see Retry-After",
+                             502: "Payment initialization failed",
+                             503: "Payment provider unavailable (circuit open), see Retry-After",
                          })
+    @idempotent("payments-initiate")
     def post(self, request):
         """
         Create a Payment record and call Chapa to initialize a transaction.
@@ -63,6 +118,12 @@ class InitiatePaymentView(APIView):
         return_url = data.get("return_url")
         customer_email = request.user.email if request.user.is_authenticated else request.data.get("email")
 
+        # fail fast before creating a Payment row if Chapa is known to be down
+        try:
+            chapa.check_available()
+        except chapa.ChapaUnavailable as e:
+            return chapa_unavailable_response(e)
+
         # create unique tx_ref
         tx_ref = f"{booking_reference}-{uuid.uuid4().hex}"
 
@@ -91,20 +152,16 @@ class InitiatePaymentView(APIView):
         if callback_url:
             payload["callback_url"] = callback_url
 
-        headers = {
-            "Authorization": f"Bearer {settings.CHAPA_SECRET_KEY}",
-            "Content-Type": "application/json",
-        }
-
         try:
-            resp = requests.post(CHAPA_INIT_ENDPOINT, json=payload, headers=headers, timeout=15)
-            resp.raise_for_status()
-        except requests.RequestException as e:
+            body = chapa.initialize(payload)
+        except chapa.ChapaUnavailable as e:
+            payment.mark_failed(reason=str(e))
+            return chapa_unavailable_response(e)
+        except chapa.ChapaError as e:
             logger.exception("Chapa initialize failed")
             payment.mark_failed(reason=str(e))
             return Response({"detail": "Payment initialization failed", "error": str(e)}, status=502)
 
-        body = resp.json()
         payment.metadata = body
         chapa_tx_id = body.get("data", {}).get("id") or body.get("data", {}).get("tx_id") or body.get("data", {}).get("reference")
         checkout_url = body.get("data", {}).get("checkout_url") or body.get("data", {}).get("payment_link")
@@ -123,47 +180,83 @@ class InitiatePaymentView(APIView):
 
 class VerifyPaymentView(APIView):
     permission_classes = [permissions.AllowAny]  # you may restrict to your internal services
+    throttle_classes = [VerifyPaymentThrottle]
 
     def get(self, request, tx_ref):
         """
         Query Chapa verify endpoint and update Payment status.
+        Archived payments are final and answered without calling Chapa, as
+        are completed payments whose ETag the client already holds (304).
         """
-        try:
-            payment = Payment.objects.get(tx_ref=tx_ref)
-        except Payment.DoesNotExist:
-            return Response({"detail": "Payment not found"}, status=status.HTTP_404_NOT_FOUND)
+        current = Payment.objects.filter(tx_ref=tx_ref).values_list("status", "updated_at").first()
+        if current is None:
+            archived = ArchivedPayment.objects.filter(tx_ref=tx_ref).values_list("status", "updated_at").first()
+            if archived is None:
+                return Response({"detail": "Payment not found"}, status=status.HTTP_404_NOT_FOUND)
+            etag = make_etag("verify", tx_ref, *archived)
+            not_modified = conditional_response(request, etag, archived[1])
+            if not_modified is not None:
+                return not_modified
+            response = Response({"detail": "Payment archived", "payment_status": archived[0]}, status=200)
+            return set_validators(response, etag, archived[1])
+
+        if current[0] == "COMPLETED":
+            not_modified = conditional_response(request, make_etag("verify", tx_ref, *current), current[1])
+            if not_modified is not None:
+                return not_modified
+
+        payment = Payment.objects.get(tx_ref=tx_ref)
 
-        headers = {
-            "Authorization": f"Bearer {settings.CHAPA_SECRET_KEY}"
-        }
-        url = f"{CHAPA_VERIFY_ENDPOINT}/{tx_ref}"
         try:
-            resp = requests.get(url, headers=headers, timeout=15)
-            resp.raise_for_status()
-        except requests.RequestException as e:
+            body = chapa.verify(tx_ref)
+        except chapa.ChapaUnavailable as e:
+            return chapa_unavailable_response(e)
+        except chapa.ChapaError as e:
             logger.exception("Chapa verify failed")
             return Response({"detail": "verify failed", "error": str(e)}, status=502)
 
-        body = resp.json()
-        # The response should include success & status
-        status_data = body.get("data", {}).get("status") or body.get("message")
-        chapa_reference = body.get("data", {}).get("reference") or body.get("data", {}).get("tx_ref")
-
-        payment.metadata = {**(payment.metadata or {}), "verify_response": body}
-
-        if status_data and str(status_data).lower() in ("successful", "success", "completed", "paid"):
-            payment.mark_completed(chapa_tx_id=chapa_reference, extra={"verify_response": body})
+        if apply_verification(payment, body):
             # kick off email send asynchronously
             try:
+                from .tasks import send_payment_confirmation_email
+
                 send_payment_confirmation_email.delay(payment.id)
             except Exception:
                 logger.exception("Could not enqueue confirmation email")
-            return Response({"detail": "Payment completed", "payment_status": payment.status}, status=200)
+            response = Response({"detail": "Payment completed", "payment_status": payment.status}, status=200)
+            return set_validators(response, make_etag("verify", tx_ref, payment.status, payment.updated_at),
+                                  payment.updated_at)
         else:
-            payment.mark_failed(reason=body.get("message") or "not successful")
             return Response({"detail": "Payment not successful", "raw": body, "payment_status": payment.status}, status=200)
 
 
+class BatchVerifyPaymentView(APIView):
+    # each request can start many Chapa calls: partners sign in (staff see every payment)
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [BatchVerifyPaymentThrottle]
+
+    @swagger_auto_schema(request_body=BatchVerifySerializer,
+                         responses={200: "One result per tx_ref", 400: "Bad Request",
+                                    429: "Rate limited, see Retry-After"})
+    def post(self, request):
+        """
+        Verify up to BATCH_VERIFY["max_refs"] payments at once for partner
+        reconciliation. Settled and archived payments are answered from the
+        database; pending ones are verified with Chapa concurrently, within
+        the BATCH_VERIFY time and call budgets. Each result has tx_ref,
+        payment_status and source (database, archive, chapa, not_found,
+        unavailable or error). Non-staff callers only see their own payments.
+        """
+        serializer = BatchVerifySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        results = verify_many(serializer.validated_data["tx_refs"], user=request.user)
+        summary = {}
+        for result in results:
+            summary[result["source"]] = summary.get(result["source"], 0) + 1
+        return Response({"results": results, "summary": summary}, status=status.HTTP_200_OK)
+
+
 @csrf_exempt
 @swagger_auto_schema(
     method='post',
@@ -173,9 +266,11 @@ class VerifyPaymentView(APIView):
         201: openapi.Response(description="Created/Processed"),
         400: "Bad Request",
         404: "Payment not found",
+        429: "Rate limited, see Retry-After",
     },
 )
 @api_view(["POST"])
+@throttle_classes([ChapaWebhookThrottle])
 def chapa_webhook(request):
     """
     Endpoint to receive Chapa callback (if you configured callback_url on init).
@@ -211,6 +306,9 @@ def chapa_webhook(request):
     try:
         payment = Payment.objects.get(tx_ref=tx_ref)
     except Payment.DoesNotExist:
+        # late or replayed callback for a payment that is already final and archived
+        if ArchivedPayment.objects.filter(tx_ref=tx_ref).exists():
+            return Response({"ok": True, "tx_ref": tx_ref, "archived": True}, status=200)
         return Response({"detail": "Payment not found"}, status=404)
 
     # Recommended: if you want to be strict, call verify endpoint here.
@@ -220,6 +318,8 @@ def chapa_webhook(request):
             payment.mark_completed(chapa_tx_id=(payload.get("data") or {}).get("reference") or payment.chapa_tx_id, extra={"webhook": payload})
             # async email
             try:
+                from .tasks import send_payment_confirmation_email
+
                 send_payment_confirmation_email.delay(payment.id)
             except Exception:
                 logger.exception("Could not enqueue confirmation email")
@@ -233,29 +333,335 @@ def chapa_webhook(request):
     return Response({"ok": True, "tx_ref": tx_ref}, status=201)
 
 
-class BookingViewSet(viewsets.ModelViewSet):
+class BookingViewSet(FastReadMixin, SparseFieldsetViewMixin, viewsets.ModelViewSet):
+    """
+    The caller's bookings as guest or host (all bookings for staff). Past
+    bookings moved to the archive stay readable: retrieve falls back to the
+    archive, and ``?archived=true`` lists archived ones. Creation honours
+    Idempotency-Key. Only the guest (or staff) may change or delete a
+    booking; the host can read it.
+    """
     queryset = Booking.objects.all()
     serializer_class = BookingSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def _archived_requested(self):
+        return self.request.query_params.get("archived", "").lower() in ("1", "true", "yes")
+
+    def _visible(self, queryset):
+        user = self.request.user
+        if user.is_staff:
+            return queryset
+        return queryset.filter(Q(guest=user) | Q(listing__host=user))
+
+    def get_queryset(self):
+        if self.action == "list" and self._archived_requested():
+            return sparse_queryset(self._visible(ArchivedBooking.objects.all()), self.get_serializer())
+        return self._visible(super().get_queryset())
+
+    def get_serializer_class(self):
+        if self.action == "list" and self._archived_requested():
+            return ArchivedBookingSerializer
+        return super().get_serializer_class()
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            archived = get_object_or_404(self._visible(ArchivedBooking.objects.all()),
+                                         pk=kwargs[self.lookup_url_kwarg or self.lookup_field])
+            return Response(ArchivedBookingSerializer(archived, context=self.get_serializer_context()).data)
 
     def perform_create(self, serializer):
-        # Save booking instance
-        booking = serializer.save()
-        # Trigger the asynchronous email task
+        booking = serializer.save(guest=self.request.user)
+        from .tasks import send_booking_confirmation
+
         try:
             send_booking_confirmation.delay(booking.id)
-        except Exception as exc:
-            # If the broker is down, decide how to handle: log, set flag, or fallback to immediate send
-            # Example: log the exception and continue
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.exception("Failed to dispatch booking confirmation task: %s", exc)
+        except Exception:
+            # the booking stands even if the broker is down
+            logger.exception("Failed to dispatch booking confirmation task for %s", booking.id)
+
+    def _check_guest(self, booking):
+        user = self.request.user
+        if not (user.is_staff or booking.guest_id == user.pk):
+            raise PermissionDenied("Only the guest can change or delete this booking.")
 
+    def perform_update(self, serializer):
+        self._check_guest(serializer.instance)
+        serializer.save()
+
+    def perform_destroy(self, instance):
+        self._check_guest(instance)
+        instance.delete()
+
+    @swagger_auto_schema(manual_parameters=[IDEMPOTENCY_KEY_PARAM])
+    @idempotent("bookings-create")
     def create(self, request, *args, **kwargs):
-        serializer = self.get_serializer(data=request.data)
+        return super().create(request, *args, **kwargs)
+
+
+class QuoteView(APIView):
+    permission_classes = [permissions.AllowAny]
+
+    @swagger_auto_schema(request_body=QuoteRequestSerializer,
+                         responses={200: QuoteSerializer(many=True), 400: "Bad Request", 404: "Listing not found"})
+    def post(self, request):
+        """
+        Price the same stay for many listings (e.g. a page of search results) in one batch.
+        Expected payload: { listings: [uuid, ...], start_date, end_date }
+        """
+        serializer = QuoteRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        batch = [(pk, data["start_date"], data["end_date"]) for pk in data["listings"]]
+        try:
+            quotes = quote_many(batch)
+        except Listing.DoesNotExist as e:
+            return Response({"detail": str(e)}, status=status.HTTP_404_NOT_FOUND)
+        return Response(QuoteSerializer(quotes, many=True).data, status=status.HTTP_200_OK)
+
+
+class NearbyListingsView(APIView):
+    permission_classes = [permissions.AllowAny]
+
+    @swagger_auto_schema(query_serializer=NearbySearchSerializer,
+                         responses={200: ListingSerializer(many=True), 400: "Bad Request"})
+    def get(self, request):
+        """
+        Listings near a point (lat, lon, radius_km) or inside a bounding box,
+        nearest first. Each result carries a distance_km field.
+        """
+        serializer = NearbySearchSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        if data["mode"] == "radius":
+            results = search_radius(data["lat"], data["lon"], data["radius_km"], limit=data["limit"])
+        else:
+            results = search_bbox(data["min_lat"], data["min_lon"], data["max_lat"], data["max_lon"],
+                                  limit=data["limit"])
+
+        serialized = ListingSerializer([listing for listing, _ in results], many=True,
+                                       context={"request": request}).data
+        payload = []
+        for item, (_, distance) in zip(serialized, results):
+            item["distance_km"] = round(distance, 3)
+            payload.append(item)
+        return Response(payload, status=status.HTTP_200_OK)
+
+
+class ListingSearchView(APIView):
+    permission_classes = [permissions.AllowAny]
+
+    @swagger_auto_schema(query_serializer=ListingSearchSerializer,
+                         responses={200: ListingSerializer(many=True), 400: "Bad Request"})
+    def get(self, request):
+        """
+        Ranked keyword search over listing title and description, optionally
+        filtered by price, availability (check_in/check_out) and average rating.
+        Each result carries a relevance score.
+        """
+        serializer = ListingSearchSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        data = dict(serializer.validated_data)
+
+        results = search_listings(data.pop("q"), limit=data.pop("limit"), **data)
+        serialized = ListingSerializer([listing for listing, _ in results], many=True,
+                                       context={"request": request}).data
+        payload = []
+        for item, (_, score) in zip(serialized, results):
+            item["score"] = round(score, 4)
+            payload.append(item)
+        return Response(payload, status=status.HTTP_200_OK)
+
+
+class SimilarListingsView(APIView):
+    permission_classes = [permissions.AllowAny]
+
+    @swagger_auto_schema(query_serializer=SimilarListingsQuerySerializer,
+                         responses={200: ListingSerializer(many=True), 400: "Bad Request"})
+    def get(self, request, pk):
+        """
+        Listings most similar to this one (price, location, ratings), from the
+        table the refresh_similar_listings task maintains. Each result carries
+        its feature distance.
+        """
+        serializer = SimilarListingsQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+
+        results = similar_listings(pk, limit=serializer.validated_data["limit"])
+        serialized = ListingSerializer([listing for listing, _ in results], many=True,
+                                       context={"request": request}).data
+        payload = []
+        for item, (_, distance) in zip(serialized, results):
+            item["distance"] = round(distance, 4)
+            payload.append(item)
+        return Response(payload, status=status.HTTP_200_OK)
+
+
+@require_safe
+def listing_calendar(request, pk):
+    """
+    The listing's bookings as an iCal feed for other platforms to poll.
+    Served from cache until a booking of the listing changes; supports
+    If-None-Match / If-Modified-Since. A plain Django view, so calendar
+    clients sending ``Accept: text/calendar`` are not refused by DRF
+    content negotiation.
+    """
+    feed = ical.cached_feed(pk)
+    if feed is None:
+        raise Http404("No such listing")
+    response = conditional_response(request, feed["etag"], feed["last_modified"])
+    if response is None:
+        response = HttpResponse(feed["body"], content_type=ical.CONTENT_TYPE)
+    patch_cache_control(response, max_age=settings.ICAL_FEEDS["max_age"])
+    return set_validators(response, feed["etag"], feed["last_modified"])
+
+
+class ListingCalendarImportView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(request_body=CalendarImportSerializer,
+                         responses={200: "Imported", 202: "Queued", 400: "Bad Request", 404: "Not Found"})
+    def post(self, request, pk):
+        """
+        Import another platform's iCal feed as blocked dates (host or staff
+        only). ``ics`` is imported at once; ``url`` is fetched by a task.
+        """
+        hosts = Listing.objects.filter(pk=pk)
+        if not request.user.is_staff:
+            hosts = hosts.filter(host=request.user)
+        if not hosts.exists():
+            raise Http404("No such listing")
+        serializer = CalendarImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        if data.get("url"):
+            from .tasks import import_ical_feed
+
+            import_ical_feed.delay(str(pk), data["url"], data["source"])
+            return Response({"detail": "queued", "source": data["source"]}, status=status.HTTP_202_ACCEPTED)
+        result = ical.import_blocks(pk, data["source"], ical.parse_events(data["ics"]))
+        return Response({"source": data["source"], **result}, status=status.HTTP_200_OK)
+
+
+class ListingViewSet(ConditionalGetMixin, FastReadMixin, SparseFieldsetViewMixin,
+                     viewsets.ReadOnlyModelViewSet):
+    """
+    Listings, newest first. Supports ?fields= / ?exclude=, limit/offset paging
+    and conditional GET (ETag / If-None-Match). Full detail bodies are served
+    from the tiered cache when they match the updated_at that the
+    conditional GET check already read, so a warm detail costs one query.
+    """
+    queryset = Listing.objects.order_by("-created_at")
+    serializer_class = ListingSerializer
+    permission_classes = [permissions.AllowAny]
+    pagination_class = ListPagination
+
+    @swagger_auto_schema(manual_parameters=SPARSE_FIELDSET_PARAMS)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @swagger_auto_schema(manual_parameters=SPARSE_FIELDSET_PARAMS)
+    def retrieve(self, request, *args, **kwargs):
+        _, last_modified = self._validators
+        if last_modified is None or FIELDS_PARAM in request.query_params or EXCLUDE_PARAM in request.query_params:
+            return super().retrieve(request, *args, **kwargs)
+        key = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        cached = listing_details.get(key)
+        if cached is not None and cached["updated_at"] == last_modified:
+            return Response(cached["data"])
+        response = super().retrieve(request, *args, **kwargs)
+        if response.status_code == 200:
+            listing_details.set(key, {"updated_at": last_modified, "data": response.data})
+        return response
+
+
+class PaymentListView(ConditionalGetMixin, FastReadMixin, SparseFieldsetViewMixin,
+                      generics.ListAPIView):
+    """The caller's payments (all payments for staff), newest first."""
+    queryset = Payment.objects.order_by("-created_at")
+    serializer_class = PaymentSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ListPagination
+
+    def filter_queryset(self, queryset):
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(user=self.request.user)
+        return queryset
+
+    @swagger_auto_schema(manual_parameters=SPARSE_FIELDSET_PARAMS)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+class PaymentDetailView(ConditionalGetMixin, FastReadMixin, SparseFieldsetViewMixin,
+                        generics.RetrieveAPIView):
+    """
+    Stored status of one payment by tx_ref, without calling Chapa (use
+    payments/verify/ to refresh it). Archived payments are served too.
+    Meant for status polling: send If-None-Match to get 304 until it changes.
+    Anyone holding the tx_ref gets the status fields; the payer and staff
+    get the full record (payer, metadata with the Chapa responses).
+    """
+    queryset = Payment.objects.all()
+    serializer_class = PaymentSerializer
+    permission_classes = [permissions.AllowAny]  # same as verify: knowing the tx_ref is required
+    lookup_field = "tx_ref"
+
+    def _full_record(self, model):
+        if not hasattr(self, "_full_record_of"):
+            self._full_record_of = {}
+        if model not in self._full_record_of:
+            user = self.request.user
+            self._full_record_of[model] = user.is_staff or (
+                user.is_authenticated and model.objects.filter(tx_ref=self.kwargs["tx_ref"], user=user).exists())
+        return self._full_record_of[model]
+
+    def get_serializer_class(self):
+        return PaymentSerializer if self._full_record(Payment) else PaymentStatusSerializer
+
+    def get_validators(self, request, *args, **kwargs):
+        last_modified, version = super().get_validators(request, *args, **kwargs)
+        if last_modified is None:
+            last_modified, _ = object_validators(ArchivedPayment.objects.all(), tx_ref=kwargs["tx_ref"])
+            version = "archived" if last_modified else None
+        return last_modified, version
+
+    @swagger_auto_schema(manual_parameters=SPARSE_FIELDSET_PARAMS)
+    def get(self, request, *args, **kwargs):
+        try:
+            return super().get(request, *args, **kwargs)
+        except Http404:
+            serializer_class = (ArchivedPaymentSerializer if self._full_record(ArchivedPayment)
+                                else ArchivedPaymentStatusSerializer)
+            queryset = sparse_queryset(ArchivedPayment.objects.all(), serializer_class(
+                context=self.get_serializer_context()))
+            archived = get_object_or_404(queryset, tx_ref=kwargs["tx_ref"])
+            return Response(serializer_class(archived, context=self.get_serializer_context()).data)
+
+
+class DailyReportView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(query_serializer=DailyReportQuerySerializer,
+                         responses={200: "Daily series and totals", 400: "Bad Request"})
+    def get(self, request):
+        """
+        Booked nights, occupancy, bookings, cancellations, payment success rate
+        and revenue by currency per day, read from the daily rollup tables.
+        Hosts only see their own listings; staff may filter by any host.
+        """
+        serializer = DailyReportQuerySerializer(data=request.query_params)
         serializer.is_valid(raise_exception=True)
-        booking = serializer.save()
-        send_booking_confirmation.delay(booking.id)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        data = serializer.validated_data
+
+        host = data.get("host") if request.user.is_staff else request.user.pk
+        result = rollup_report(data["start"], data["end"], listing=data.get("listing"), host=host)
+        return Response(result, status=status.HTTP_200_OK)
 
 
 class PaymentViewSet(viewsets.ViewSet):